@@ -23,6 +23,9 @@ from action import Action
 
 class PDDL_Parser:
     SUPPORTED_REQUIREMENTS = [':strips', ':negative-preconditions', ':typing']
+    CHUNK_SIZE = 1 << 16
+    COMMENT = re.compile(r';.*$', re.MULTILINE)
+    TOKEN = re.compile(r'[()]|[^\s()]+')
 
     def __init__(self):
         self.domain_name = 'unknown'
@@ -41,47 +44,81 @@ class PDDL_Parser:
     # -----------------------------------------------
 
     def scan_tokens(self, filename):
+        """ Returns the tokens of a file given its name, or of a text stream such as io.StringIO. """
+        if hasattr(filename, 'read'):
+            return self.read_tokens(filename)
         with open(filename) as f:
-            # Remove single line comments
-            subst = re.sub(r';.*$', '', f.read(), flags=re.MULTILINE).lower()
-        # Tokenize
+            return self.read_tokens(f)
+
+    def read_tokens(self, stream):
+        """ Builds nested lists of lowercase tokens in a single pass over the stream, see read_chunks. """
         stack = []
         expr = []
-        for t in re.findall(r'[()]|[^\s()]+', subst):
-            if t == '(':
-                stack.append(expr)
-                expr = []
-            elif t == ')':
-                if stack:
-                    tmp = expr
-                    expr = stack.pop()
-                    expr.append(tmp)
+        for text in self.read_chunks(stream):
+            for t in self.TOKEN.findall(text.lower()):
+                if t == '(':
+                    stack.append(expr)
+                    expr = []
+                elif t == ')':
+                    if stack:
+                        tmp = expr
+                        expr = stack.pop()
+                        expr.append(tmp)
+                    else:
+                        raise Exception('Missing open parentheses')
                 else:
-                    raise Exception('Missing open parentheses')
-            else:
-                expr.append(t)
+                    expr.append(t)
         if stack:
             raise Exception('Missing close parentheses')
         if len(expr) != 1:
             raise Exception('Malformed expression')
         return expr[0]
 
+    def read_chunks(self, stream):
+        """ Yields the text of the stream without comments, reading CHUNK_SIZE characters at a time and cutting
+        them between tokens. A token that may continue in the next chunk is carried over, as is the state of a
+        comment still open at the end of a chunk. """
+        tail = ''
+        comment = False
+        chunk = True
+        while chunk:
+            chunk = stream.read(self.CHUNK_SIZE)
+            text = tail + chunk
+            tail = ''
+            if comment:
+                newline = text.find('\n')
+                if newline < 0:
+                    continue
+                text = text[newline:]
+                comment = False
+            if chunk:
+                # Keep the last token for the next chunk, it may be incomplete
+                cut = len(text)
+                while cut and not text[cut - 1].isspace() and text[cut - 1] not in '()':
+                    cut -= 1
+                text, tail = text[:cut], text[cut:]
+                # Remove single line comments, the last one may continue in the next chunk
+                if text.rfind(';') > text.rfind('\n'):
+                    comment = True
+                    tail = ''
+            yield self.COMMENT.sub('', text)
+
     # -----------------------------------------------
     # Parse domain
     # -----------------------------------------------
 
     def parse_domain(self, domain_filename):
         tokens = self.scan_tokens(domain_filename)
-        if type(tokens) is list and tokens.pop(0) == 'define':
+        if type(tokens) is list and tokens[0] == 'define':
             self.domain_name = 'unknown'
             self.requirements = []
             self.types = {}
             self.objects = {}
             self.actions = []
             self.predicates = {}
-            while tokens:
-                group = tokens.pop(0)
-                t = group.pop(0)
+            for k in range(1, len(tokens)):
+                t = tokens[k][0]
+                group = tokens[k][1:]
                 if t == 'domain':
                     self.domain_name = group[0]
                 elif t == ':requirements':
@@ -100,7 +137,7 @@ class PDDL_Parser:
                 else:
                     self.parse_domain_extended(t, group)
         else:
-            raise Exception('File ' + domain_filename + ' does not match domain pattern')
+            raise Exception('File ' + str(domain_filename) + ' does not match domain pattern')
 
     def parse_domain_extended(self, t, _group):
         print(str(t) + ' is not recognized in domain')
@@ -111,20 +148,22 @@ class PDDL_Parser:
 
     def parse_hierarchy(self, group, structure, name, redefine):
         lst = []
-        while group:
-            if redefine and group[0] in structure:
-                raise Exception('Redefined supertype of ' + group[0])
-            elif group[0] == '-':
+        i = 0
+        while i < len(group):
+            if redefine and group[i] in structure:
+                raise Exception('Redefined supertype of ' + group[i])
+            elif group[i] == '-':
                 if not lst:
                     raise Exception('Unexpected hyphen in ' + name)
-                group.pop(0)
-                typ = group.pop(0)
+                typ = group[i + 1]
+                i += 2
                 if typ not in structure:
                     structure[typ] = []
                 structure[typ] += lst
                 lst = []
             else:
-                lst.append(group.pop(0))
+                lst.append(group[i])
+                i += 1
         if lst:
             if 'object' not in structure:
                 structure['object'] = []
@@ -150,23 +189,27 @@ class PDDL_Parser:
 
     def parse_predicates(self, group):
         for pred in group:
-            predicate_name = pred.pop(0)
+            predicate_name = pred[0]
             if predicate_name in self.predicates:
                 raise Exception('Predicate ' + predicate_name + ' redefined')
             arguments = {}
             untyped_variables = []
-            while pred:
-                t = pred.pop(0)
+            i = 1
+            while i < len(pred):
+                t = pred[i]
+                i += 1
                 if t == '-':
                     if not untyped_variables:
                         raise Exception('Unexpected hyphen in predicates')
-                    typ = pred.pop(0)
-                    while untyped_variables:
-                        arguments[untyped_variables.pop(0)] = typ
+                    typ = pred[i]
+                    i += 1
+                    for variable in untyped_variables:
+                        arguments[variable] = typ
+                    untyped_variables = []
                 else:
                     untyped_variables.append(t)
-            while untyped_variables:
-                arguments[untyped_variables.pop(0)] = 'object'
+            for variable in untyped_variables:
+                arguments[variable] = 'object'
             self.predicates[predicate_name] = arguments
 
     # -----------------------------------------------
@@ -174,7 +217,7 @@ class PDDL_Parser:
     # -----------------------------------------------
 
     def parse_action(self, group):
-        name = group.pop(0)
+        name = group[0]
         if not type(name) is str:
             raise Exception('Action without name definition')
         for act in self.actions:
@@ -186,33 +229,45 @@ class PDDL_Parser:
         add_effects = []
         del_effects = []
         extensions = None
-        while group:
-            t = group.pop(0)
+        i = 1
+        while i < len(group):
+            t = group[i]
+            i += 1
             if t == ':parameters':
                 if not type(group) is list:
                     raise Exception('Error with ' + name + ' parameters')
                 parameters = []
                 untyped_parameters = []
-                p = group.pop(0)
-                while p:
-                    t = p.pop(0)
+                p = group[i]
+                i += 1
+                j = 0
+                while j < len(p):
+                    t = p[j]
+                    j += 1
                     if t == '-':
                         if not untyped_parameters:
                             raise Exception('Unexpected hyphen in ' + name + ' parameters')
-                        ptype = p.pop(0)
-                        while untyped_parameters:
-                            parameters.append([untyped_parameters.pop(0), ptype])
+                        ptype = p[j]
+                        j += 1
+                        for parameter in untyped_parameters:
+                            parameters.append([parameter, ptype])
+                        untyped_parameters = []
                     else:
                         untyped_parameters.append(t)
-                while untyped_parameters:
-                    parameters.append([untyped_parameters.pop(0), 'object'])
+                for parameter in untyped_parameters:
+                    parameters.append([parameter, 'object'])
             elif t == ':precondition':
-                self.split_predicates(group.pop(0), positive_preconditions, negative_preconditions, name,
+                self.split_predicates(group[i], positive_preconditions, negative_preconditions, name,
                                       ' preconditions')
+                i += 1
             elif t == ':effect':
-                self.split_predicates(group.pop(0), add_effects, del_effects, name, ' effects')
+                self.split_predicates(group[i], add_effects, del_effects, name, ' effects')
+                i += 1
             else:
+                # Extensions consume what they need from the remaining group
+                group = group[i:]
                 extensions = self.parse_action_extended(t, group)
+                i = 0
         self.actions.append(
             Action(name, parameters, positive_preconditions, negative_preconditions, add_effects, del_effects,
                    extensions))
@@ -230,14 +285,14 @@ class PDDL_Parser:
             return frozenset([tuple(item) for item in data])
 
         tokens = self.scan_tokens(problem_filename)
-        if type(tokens) is list and tokens.pop(0) == 'define':
+        if type(tokens) is list and tokens[0] == 'define':
             self.problem_name = 'unknown'
             self.state = frozenset()
             self.positive_goals = frozenset()
             self.negative_goals = frozenset()
-            while tokens:
-                group = tokens.pop(0)
-                t = group.pop(0)
+            for k in range(1, len(tokens)):
+                t = tokens[k][0]
+                group = tokens[k][1:]
                 if t == 'problem':
                     self.problem_name = group[0]
                 elif t == ':domain':
@@ -258,7 +313,7 @@ class PDDL_Parser:
                 else:
                     self.parse_problem_extended(t, group)
         else:
-            raise Exception('File ' + problem_filename + ' does not match problem pattern')
+            raise Exception('File ' + str(problem_filename) + ' does not match problem pattern')
 
     def parse_problem_extended(self, t, _group):
         print(str(t) + ' is not recognized in problem')
@@ -271,7 +326,7 @@ class PDDL_Parser:
         if not type(group) is list:
             raise Exception('Error with ' + name + part)
         if group[0] == 'and':
-            group.pop(0)
+            group = group[1:]
         else:
             group = [group]
         for predicate in group:
@@ -57,15 +57,32 @@ class Action:
     def __eq__(self, other):
         return self.__dict__ == other.__dict__
 
-    def groundify(self, objects, types):
-        """ Translates a task in the PDDL representation to a grounded representation, getting all 
-        valid instantiations that assign objects to the arguments of predicates and action parameters. """
+    def groundify(self, objects, types, facts=None, static=(), first=None):
+        """ Translates a task in the PDDL representation to a grounded representation, getting all
+        valid instantiations that assign objects to the arguments of predicates and action parameters.
+        When facts maps each predicate to the atoms that may hold, positive preconditions are joined against them
+        and only instances whose preconditions can be satisfied are yielded, in the same order. Negative
+        preconditions over static predicates are checked against facts as well. A first slice restricts the
+        objects of the first parameter, partitioning the instances in order. """
         if not self.parameters:
-            yield self
+            if facts is None or self.satisfiable(facts, static):
+                yield self
             return
+        type_map = self.parameter_objects(objects, types)
+        variables = [var for var, _ in self.parameters]
+        if first is not None:
+            type_map[0] = type_map[0][first]
+        if facts is None:
+            assignments = itertools.product(*type_map)
+        else:
+            assignments = self.join(variables, type_map, facts, static)
+        for assignment in assignments:
+            yield self.ground(variables, assignment)
+
+    def parameter_objects(self, objects, types):
+        """ Returns, for each parameter, the list of objects of its type or subtypes. """
         type_map = []
-        variables = []
-        for var, typ in self.parameters:
+        for _, typ in self.parameters:
             type_stack = [typ]
             items = []
             while type_stack:
@@ -77,24 +94,106 @@ class Action:
                 else:
                     raise TypeError('Unrecognized type ' + t)
             type_map.append(items)
-            variables.append(var)
-        for assignment in itertools.product(*type_map):
-            positive_preconditions = self.replace(self.positive_preconditions, variables, assignment)
-            negative_preconditions = self.replace(self.negative_preconditions, variables, assignment)
-            add_effects = self.replace(self.add_effects, variables, assignment)
-            del_effects = self.replace(self.del_effects, variables, assignment)
-            yield Action(self.name, assignment, positive_preconditions, negative_preconditions, add_effects,
-                         del_effects)
-
-    def replace(self, group, variables, assignment):
-        new_group = []
-        for pred in group:
-            pred = list(pred)
-            for i, p in enumerate(pred):
-                if p in variables:
-                    pred[i] = assignment[variables.index(p)]
-            new_group.append(pred)
-        return new_group
+        return type_map
+
+    def ground(self, variables, assignment):
+        substitution = dict(zip(variables, assignment))
+        return Action(self.name, assignment, self.substitute(self.positive_preconditions, substitution),
+                      self.substitute(self.negative_preconditions, substitution),
+                      self.substitute(self.add_effects, substitution), self.substitute(self.del_effects, substitution))
+
+    def satisfiable(self, facts, static):
+        for pred in self.positive_preconditions:
+            if pred not in facts.get(pred[0], ()):
+                return False
+        for pred in self.negative_preconditions:
+            if pred[0] in static and pred in facts.get(pred[0], ()):
+                return False
+        return True
+
+    # -----------------------------------------------
+    # Join
+    # -----------------------------------------------
+
+    def join(self, variables, type_map, facts, static):
+        """ Returns the assignments matching positive preconditions against facts, sorted as itertools.product
+        would emit them. Static preconditions are joined first as they are the most selective. """
+        index = {var: k for k, var in enumerate(variables)}
+        domains = [set(items) for items in type_map]
+        preconditions = sorted(self.positive_preconditions, key=lambda pred: (pred[0] not in static, pred))
+        assignment = [None] * len(variables)
+        found = []
+
+        def match(depth):
+            if depth == len(preconditions):
+                found.extend(self.complete(variables, type_map, assignment, facts, static))
+                return
+            pred = preconditions[depth]
+            for atom in facts.get(pred[0], ()):
+                bound = self.unify(pred, atom, index, domains, assignment)
+                if bound is not None:
+                    match(depth + 1)
+                    for k in bound:
+                        assignment[k] = None
+
+        match(0)
+        positions = [{} for _ in type_map]
+        for k, items in enumerate(type_map):
+            for j, obj in enumerate(items):
+                positions[k].setdefault(obj, j)
+        found.sort(key=lambda objs: [positions[k][obj] for k, obj in enumerate(objs)])
+        return found
+
+    def unify(self, pred, atom, index, domains, assignment):
+        """ Binds the parameters of a precondition to the objects of an atom in the assignment, returning the ids
+        of the parameters bound, or None with the assignment unchanged if the atom does not match. """
+        if len(atom) != len(pred):
+            return None
+        bound = []
+        for term, obj in zip(pred[1:], atom[1:]):
+            k = index.get(term)
+            if k is None:
+                if term != obj:
+                    break
+            elif assignment[k] is None:
+                if obj not in domains[k]:
+                    break
+                assignment[k] = obj
+                bound.append(k)
+            elif assignment[k] != obj:
+                break
+        else:
+            return bound
+        for k in bound:
+            assignment[k] = None
+        return None
+
+    def complete(self, variables, type_map, assignment, facts, static):
+        """ Returns the assignments binding the parameters left unbound to every object of their type, keeping
+        those allowed by negative static preconditions. """
+        unbound = [k for k, obj in enumerate(assignment) if obj is None]
+        found = []
+        for objs in itertools.product(*[type_map[k] for k in unbound]):
+            for k, obj in zip(unbound, objs):
+                assignment[k] = obj
+            if self.allowed(variables, assignment, facts, static):
+                found.append(tuple(assignment))
+        for k in unbound:
+            assignment[k] = None
+        return found
+
+    def allowed(self, variables, assignment, facts, static):
+        substitution = None
+        for pred in self.negative_preconditions:
+            if pred[0] in static:
+                if substitution is None:
+                    substitution = dict(zip(variables, assignment))
+                if tuple([substitution.get(t, t) for t in pred]) in facts.get(pred[0], ()):
+                    return False
+        return True
+
+    def substitute(self, group, substitution):
+        return [tuple([substitution.get(p, p) for p in pred]) for pred in group]
 
 
 def test_action():
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+
+from heuristic import Heuristic
+from planner import Planner
+from search import SEARCHES, peak_memory
+
+EXAMPLES = [
+    ('airport', 'examples/airport/airport.pddl', 'examples/airport/pb1.pddl'),
+    ('blocksworld', 'examples/blocksworld/blocksworld.pddl', 'examples/blocksworld/pb6.pddl'),
+    ('dinner', 'examples/dinner/dinner.pddl', 'examples/dinner/pb1.pddl'),
+    ('dwr', 'examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'),
+    ('gripper', 'examples/gripper/gripper.pddl', 'examples/gripper/pb1.pddl'),
+    ('n_puzzle', 'examples/n_puzzle/n_puzzle.pddl', 'examples/n_puzzle/eight_puzzle_pb1.pddl'),
+    ('tsp', 'examples/tsp/tsp.pddl', 'examples/tsp/pb1.pddl')
+]
+
+
+# -----------------------------------------------
+# Generators
+# -----------------------------------------------
+
+def generate_blocksworld(n, seed=0):
+    """ Returns a problem with n blocks in random towers to be stacked in a single tower. """
+    rng = random.Random(seed)
+    blocks = ['b' + str(i) for i in range(n)]
+    shuffled = blocks[:]
+    rng.shuffle(shuffled)
+    init = []
+    below = None
+    for block in shuffled:
+        if below is None or rng.random() < 0.3:
+            init.append('(onTable ' + block + ')')
+        else:
+            init.append('(on ' + block + ' ' + below + ')')
+            init.remove('(clear ' + below + ')')
+        init.append('(clear ' + block + ')')
+        below = block
+    init += ['(equal ' + block + ' ' + block + ')' for block in blocks]
+    goal = ['(on ' + blocks[i] + ' ' + blocks[i + 1] + ')' for i in range(n - 1)]
+    return ('(define (problem blocksworld-' + str(n) + ') (:domain blocksworld)\n  (:objects ' + ' '.join(blocks) +
+            ')\n  (:init ' + ' '.join(init) + ')\n  (:goal (and ' + ' '.join(goal) + ')))\n')
+
+
+def generate_n_puzzle(n, moves=20, seed=0):
+    """ Returns a domain and a problem of the n by n sliding puzzle, scrambled from the goal by random moves. """
+    rng = random.Random(seed)
+    slots = ['s' + str(i) for i in range(n * n)]
+    tiles = ['t' + str(i) for i in range(1, n * n)]
+    adjacent = []
+    for i in range(n * n):
+        row, col = divmod(i, n)
+        for r, c in [(row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)]:
+            if 0 <= r < n and 0 <= c < n:
+                adjacent.append((i, r * n + c))
+    goal = ['blank'] + tiles
+    board = goal[:]
+    blank = 0
+    for _ in range(moves):
+        swap = rng.choice([j for i, j in adjacent if i == blank])
+        board[blank], board[swap] = board[swap], board[blank]
+        blank = swap
+    domain = ('(define (domain n-puzzle-' + str(n) + ')\n  (:requirements :strips :typing :negative-preconditions)\n'
+              '  (:types tile slot)\n  (:constants ' + ' '.join(tiles) + ' blank - tile ' + ' '.join(slots) +
+              ' - slot)\n  (:predicates (adjacent ?s1 ?s2 - slot) (at ?t - tile ?s - slot))\n'
+              '  (:action move\n    :parameters (?t - tile ?s1 ?s2 - slot)\n'
+              '    :precondition (and (adjacent ?s1 ?s2) (at blank ?s1) (at ?t ?s2))\n'
+              '    :effect (and (at blank ?s2) (at ?t ?s1) (not (at blank ?s1)) (not (at ?t ?s2)))))\n')
+    problem = ('(define (problem n-puzzle-' + str(n) + ') (:domain n-puzzle-' + str(n) + ')\n  (:init ' +
+               ' '.join('(adjacent ' + slots[i] + ' ' + slots[j] + ')' for i, j in adjacent) + '\n    ' +
+               ' '.join('(at ' + tile + ' ' + slot + ')' for tile, slot in zip(board, slots)) +
+               ')\n  (:goal (and ' + ' '.join('(at ' + tile + ' ' + slot + ')' for tile, slot in zip(goal, slots)) +
+               ')))\n')
+    return domain, problem
+
+
+def generate_tsp(n, seed=0):
+    """ Returns a problem with n cities on a two-way ring plus random one-way roads. """
+    rng = random.Random(seed)
+    cities = ['c' + str(i) for i in range(n)]
+    roads = set()
+    for i in range(n):
+        roads.add((i, (i + 1) % n))
+        roads.add(((i + 1) % n, i))
+    for _ in range(n):
+        roads.add((rng.randrange(n), rng.randrange(n)))
+    return ('(define (problem tsp-' + str(n) + ') (:domain tsp)\n  (:objects ' + ' '.join(cities) +
+            ' - position)\n  (:init (at c0) ' +
+            ' '.join('(connected ' + cities[i] + ' ' + cities[j] + ')' for i, j in sorted(roads) if i != j) +
+            ')\n  (:goal (and (at c0) ' + ' '.join('(visited ' + city + ')' for city in cities) + ')))\n')
+
+
+def generate_dwr(n, seed=0):
+    """ Returns a problem with n containers stacked at the first location to be moved to the second one. """
+    rng = random.Random(seed)
+    containers = ['c' + str(i) for i in range(n)]
+    piles = {'p1': [], 'q1': []}
+    for container in containers:
+        piles[rng.choice(['p1', 'q1'])].append(container)
+    init = ['(adjacent l1 l2)', '(adjacent l2 l1)', '(attached p1 l1)', '(attached q1 l1)', '(attached p2 l2)',
+            '(attached q2 l2)', '(belong k1 l1)', '(belong k2 l2)', '(top pallet p2)', '(top pallet q2)',
+            '(at r1 l1)', '(unloaded r1)', '(occupied l1)', '(empty k1)', '(empty k2)']
+    for pile, stack in sorted(piles.items()):
+        below = 'pallet'
+        for container in stack:
+            init += ['(in ' + container + ' ' + pile + ')', '(on ' + container + ' ' + below + ')']
+            below = container
+        init.append('(top ' + below + ' ' + pile + ')')
+    init += ['(equal ' + c + ' ' + c + ')' for c in containers + ['pallet']]
+    goal = ['(in ' + container + ' ' + ('p2' if i % 2 else 'q2') + ')' for i, container in enumerate(containers)]
+    return ('(define (problem dwr-' + str(n) + ') (:domain dwr)\n  (:objects r1 - robot l1 l2 - location '
+            'k1 k2 - crane p1 q1 p2 q2 - pile ' + ' '.join(containers) + ' pallet - container)\n  (:init ' +
+            ' '.join(init) + ')\n  (:goal (and ' + ' '.join(goal) + ')))\n')
+
+
+def generate_instances(directory, sizes):
+    """ Writes the generated instances of the given sizes, a dictionary from generator name to list of sizes, and
+    returns them as (name, domain, problem) triples. """
+    instances = []
+
+    def write(filename, text):
+        path = os.path.join(directory, filename)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    for n in sizes.get('blocksworld', []):
+        instances.append(('blocksworld-' + str(n), 'examples/blocksworld/blocksworld.pddl',
+                          write('blocksworld-' + str(n) + '.pddl', generate_blocksworld(n))))
+    for n in sizes.get('n_puzzle', []):
+        domain, problem = generate_n_puzzle(n)
+        instances.append(('n_puzzle-' + str(n), write('n_puzzle-' + str(n) + '-domain.pddl', domain),
+                          write('n_puzzle-' + str(n) + '.pddl', problem)))
+    for n in sizes.get('tsp', []):
+        instances.append(('tsp-' + str(n), 'examples/tsp/tsp.pddl', write('tsp-' + str(n) + '.pddl', generate_tsp(n))))
+    for n in sizes.get('dwr', []):
+        instances.append(('dwr-' + str(n), 'examples/dwr/dwr.pddl', write('dwr-' + str(n) + '.pddl', generate_dwr(n))))
+    return instances
+
+
+# -----------------------------------------------
+# Measure
+# -----------------------------------------------
+
+def measure(name, domain, problem, options):
+    """ Returns parse, ground and search times in seconds, expanded nodes per second and peak RSS of one
+    instance. Meant to run in a fresh process so peak RSS only covers this instance. """
+    planner = Planner()
+    task = planner.ground(planner.parse(domain, problem), options.get('grounding', 'reachable'))
+    plan = planner.solve_task(task, **{k: v for k, v in options.items() if k != 'grounding'})
+    statistics = planner.statistics
+    rss = peak_memory()
+    return {
+        'name': name,
+        'status': 'unsolvable' if plan is None else 'solved',
+        'plan_length': None if plan is None else len(plan),
+        'actions': statistics.actions,
+        'atoms': statistics.atoms,
+        'parse': statistics.parse_time,
+        'ground': statistics.ground_time,
+        'search': statistics.search_time,
+        'expanded': statistics.expanded,
+        'generated': statistics.generated,
+        'nodes_per_second': statistics.expanded / statistics.search_time if statistics.search_time > 0 else None,
+        'peak_rss_kb': None if rss is None else rss >> 10
+    }
+
+
+def run_instances(instances, options):
+    """ Measures each instance in its own process, yielding results in order. """
+    context = multiprocessing.get_context()
+    for name, domain, problem in instances:
+        with context.Pool(1, maxtasksperchild=1) as pool:
+            yield pool.apply(measure, (name, domain, problem, options))
+
+
+# -----------------------------------------------
+# Compare
+# -----------------------------------------------
+
+def compare(results, baseline, tolerance=0.25, floor=0.01):
+    """ Returns a message for each phase time slower than the baseline by more than the tolerance ratio and by
+    more than floor seconds, and for each change of status or plan length. """
+    regressions = []
+    previous = {result['name']: result for result in baseline['results']}
+    for result in results:
+        old = previous.get(result['name'])
+        if old is None:
+            continue
+        for key in ['status', 'plan_length']:
+            if result[key] != old[key]:
+                regressions.append(result['name'] + ' ' + key + ' changed from ' + str(old[key]) + ' to ' +
+                                   str(result[key]))
+        for phase in ['parse', 'ground', 'search']:
+            if result[phase] > old[phase] * (1 + tolerance) and result[phase] - old[phase] > floor:
+                regressions.append('%s %s took %.4fs, baseline %.4fs' % (result['name'], phase, result[phase],
+                                                                         old[phase]))
+    return regressions
+
+
+def parse_sizes(text):
+    """ Parses sizes such as blocksworld=4,6 tsp=8 into a dictionary. """
+    sizes = {}
+    for item in text:
+        name, _, values = item.partition('=')
+        sizes[name] = [int(value) for value in values.split(',') if value]
+    return sizes
+
+
+def run_benchmark():
+    """ Interprets command-line arguments to run the benchmark suite. """
+    parser = argparse.ArgumentParser(description='Measures parse, ground and search time, expanded nodes per second '
+                                                 'and peak RSS over the bundled examples and generated instances.')
+    parser.add_argument('--sizes', nargs='*', default=['blocksworld=6,8', 'n_puzzle=3', 'tsp=6,8', 'dwr=2,3'],
+                        help='generated instance sizes, as generator=size,size with generators blocksworld, '
+                             'n_puzzle, tsp and dwr')
+    parser.add_argument('--no-examples', help='skips the bundled examples', action='store_true', default=False)
+    parser.add_argument('-s', '--search', choices=SEARCHES, default='astar')
+    parser.add_argument('-H', '--heuristic', choices=Heuristic.HEURISTICS, default='hff')
+    parser.add_argument('-o', '--output', help='writes results as JSON to this file')
+    parser.add_argument('-b', '--baseline', help='compares results against this JSON file, exiting with 1 on '
+                                                 'regressions')
+    parser.add_argument('--tolerance', help='slowdown ratio tolerated against the baseline', type=float,
+                        default=0.25)
+    parser.add_argument('--floor', help='slowdown in seconds tolerated against the baseline', type=float,
+                        default=0.01)
+    args = parser.parse_args()
+    options = {'search': args.search, 'heuristic': args.heuristic}
+    with tempfile.TemporaryDirectory() as directory:
+        instances = [] if args.no_examples else EXAMPLES[:]
+        instances += generate_instances(directory, parse_sizes(args.sizes))
+        results = []
+        for result in run_instances(instances, options):
+            print('%-16s %-10s parse %.4fs ground %.4fs search %.4fs %8d expanded %10.0f nodes/s %8s KB' % (
+                result['name'], result['status'], result['parse'], result['ground'], result['search'],
+                result['expanded'], result['nodes_per_second'] or 0, result['peak_rss_kb']), flush=True)
+            results.append(result)
+    report = {'options': options, 'python': sys.version.split()[0], 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.floor)
+        for regression in regressions:
+            print('Regression: ' + regression)
+        if regressions:
+            exit(1)
+
+
+# -----------------------------------------------
+# Main
+# -----------------------------------------------
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import zlib
+
+# Modules whose source defines what is cached, any change to them invalidates the cache
+SOURCES = ['PDDL.py', 'action.py', 'grounding.py', 'task.py']
+
+
+class TaskCache:
+    """ On-disk cache of parsed domains and grounded tasks keyed by file content hashes """
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, directory, max_size=256 << 20):
+        """ Entries are zlib compressed pickles stored under a subdirectory named after the parser version, a hash
+        of the source files that produce them. Subdirectories of other versions are removed. Once entries exceed
+        max_size bytes the least recently used are evicted. """
+        self.max_size = max_size
+        digest = hashlib.sha256()
+        for source in SOURCES:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), source), 'rb') as f:
+                digest.update(f.read())
+        self.version = 'v-' + digest.hexdigest()[:16]
+        self.directory = os.path.join(directory, self.version)
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.startswith('v-') and len(name) == len(self.version) and name != self.version:
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    # -----------------------------------------------
+    # Key
+    # -----------------------------------------------
+
+    def key(self, *filenames):
+        """ Returns the hash of the contents of the given files. """
+        digest = hashlib.sha256()
+        for filename in filenames:
+            with open(filename, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        return digest.hexdigest()
+
+    def path(self, store, key):
+        return os.path.join(self.directory, store + '-' + key)
+
+    # -----------------------------------------------
+    # Load
+    # -----------------------------------------------
+
+    def load(self, store, key):
+        """ Returns the cached object, or None on a miss. Unreadable entries are removed. """
+        path = self.path(store, key)
+        try:
+            with open(path, 'rb') as f:
+                obj = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError):
+            self.remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return obj
+
+    # -----------------------------------------------
+    # Store
+    # -----------------------------------------------
+
+    def store(self, store, key, obj):
+        """ Writes an entry atomically, so concurrent readers never see a partial file, and evicts if needed. """
+        data = zlib.compress(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL), 1)
+        fd, temp = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp, self.path(store, key))
+        except OSError:
+            self.remove(temp)
+            return
+        self.evict()
+
+    # -----------------------------------------------
+    # Evict
+    # -----------------------------------------------
+
+    def evict(self):
+        """ Removes the least recently used entries until the cache fits in max_size bytes. """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.startswith('.tmp-'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            self.remove(path)
+            total -= size
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
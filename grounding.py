@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import concurrent.futures
+import os
+import pickle
+import tempfile
+
+
+class Grounder:
+    """ Grounds action schemas, either every type-compatible instance or only relaxed reachable ones """
+
+    GROUNDINGS = ['reachable', 'full']
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, actions, objects, types):
+        self.actions = actions
+        self.objects = objects
+        self.types = types
+
+    # -----------------------------------------------
+    # Static predicates
+    # -----------------------------------------------
+
+    def static_predicates(self):
+        """ Returns the predicates never appearing in add or delete effects, whose atoms keep their initial value
+        in every reachable state. """
+        predicates = set()
+        fluents = set()
+        for action in self.actions:
+            for group in (action.positive_preconditions, action.negative_preconditions):
+                predicates.update(pred[0] for pred in group)
+            for group in (action.add_effects, action.del_effects):
+                fluents.update(pred[0] for pred in group)
+        return predicates - fluents
+
+    # -----------------------------------------------
+    # Ground
+    # -----------------------------------------------
+
+    def ground(self, state, grounding='reachable', workers=1):
+        """ Returns the list of ground actions in schema order. Reachable grounding runs a relaxed reachability
+        fixpoint from the given state, ignoring delete effects, and only keeps actions whose positive preconditions
+        are reachable and whose static negative preconditions hold. With many workers each schema is partitioned
+        by the objects of its first parameter over a process pool, and partitions are merged in order, so the
+        result does not depend on the number of workers. """
+        if grounding not in self.GROUNDINGS:
+            raise ValueError('Grounding ' + grounding + ' not supported')
+        if workers > 1:
+            with concurrent.futures.ProcessPoolExecutor(workers, initializer=init_grounding_worker,
+                                                        initargs=(self.actions, self.objects, self.types)) as pool:
+                return self.ground_with(state, grounding, pool, workers)
+        return self.ground_with(state, grounding)
+
+    def ground_with(self, state, grounding, pool=None, workers=1):
+        """ Grounds over the given pool of workers, if any. Reachable grounding sends the facts to workers through
+        a temporary directory holding, for each iteration of the fixpoint, a file of the atoms it added, so each
+        worker reads every fact once rather than receiving all of them with every partition. """
+        if grounding == 'full':
+            grounded = self.ground_schemas(range(len(self.actions)), None, (), pool, workers)
+            return [act for acts in grounded for act in acts]
+        if pool is None:
+            return self.ground_reachable(state)
+        with tempfile.TemporaryDirectory() as directory:
+            return self.ground_reachable(state, pool, workers, directory)
+
+    def ground_reachable(self, state, pool=None, workers=1, directory=None):
+        static = self.static_predicates()
+        facts = {}
+        for atom in state:
+            facts.setdefault(atom[0], set()).add(atom)
+        grounded = [None] * len(self.actions)
+        added = list(state)
+        changed = None
+        while changed is None or changed:
+            snapshot = None if directory is None else write_facts(directory, added)
+            new_facts = set()
+            schemas = [k for k, action in enumerate(self.actions)
+                       if changed is None or any(pred[0] in changed for pred in action.positive_preconditions)]
+            for k, acts in zip(schemas, self.ground_schemas(schemas, facts, static, pool, workers, snapshot)):
+                grounded[k] = acts
+                for act in acts:
+                    new_facts.update(act.add_effects)
+            changed = set()
+            added = []
+            for atom in new_facts:
+                if atom not in facts.setdefault(atom[0], set()):
+                    facts[atom[0]].add(atom)
+                    changed.add(atom[0])
+                    added.append(atom)
+        return [act for acts in grounded for act in acts]
+
+    def ground_schemas(self, schemas, facts, static, pool=None, workers=1, snapshot=None):
+        """ Returns a list of ground actions for each schema index given. Workers of the pool read the facts from
+        the snapshot written by write_facts, or ground every instance when there is none. """
+        if pool is None:
+            return [list(self.actions[k].groundify(self.objects, self.types, facts, static)) for k in schemas]
+        futures = []
+        for k in schemas:
+            action = self.actions[k]
+            if action.parameters:
+                size = len(action.parameter_objects(self.objects, self.types)[0])
+                step = max(1, -(-size // (4 * workers)))
+                futures.append([pool.submit(ground_partition, k, snapshot, static, slice(i, i + step))
+                                for i in range(0, size, step)])
+            else:
+                futures.append([pool.submit(ground_partition, k, snapshot, static, None)])
+        return [[act for future in parts for act in future.result()] for parts in futures]
+
+
+# -----------------------------------------------
+# Grounding worker
+# -----------------------------------------------
+
+grounding_worker = {}
+
+
+def init_grounding_worker(actions, objects, types):
+    grounding_worker.update(actions=actions, objects=objects, types=types)
+
+
+def ground_partition(k, snapshot, static, first):
+    action = grounding_worker['actions'][k]
+    facts = read_facts(snapshot)
+    return list(action.groundify(grounding_worker['objects'], grounding_worker['types'], facts, static, first))
+
+
+# -----------------------------------------------
+# Fact snapshots
+# -----------------------------------------------
+
+def write_facts(directory, atoms):
+    """ Writes the atoms added by an iteration of the fixpoint to the next file of the directory, and returns the
+    snapshot of the facts so far, the directory and its number of files. """
+    count = len(os.listdir(directory))
+    with open(os.path.join(directory, str(count)), 'wb') as f:
+        pickle.dump(atoms, f, pickle.HIGHEST_PROTOCOL)
+    return directory, count + 1
+
+
+def read_facts(snapshot):
+    """ Returns the facts of a snapshot, reading only the files this worker has not read yet. """
+    if snapshot is None:
+        return None
+    directory, count = snapshot
+    if grounding_worker.get('directory') != directory:
+        grounding_worker.update(directory=directory, facts={}, read=0)
+    facts = grounding_worker['facts']
+    for i in range(grounding_worker['read'], count):
+        with open(os.path.join(directory, str(i)), 'rb') as f:
+            for atom in pickle.load(f):
+                facts.setdefault(atom[0], set()).add(atom)
+    grounding_worker['read'] = count
+    return facts
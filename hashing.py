@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import random
+
+HASHINGS = ['state', 'zobrist', 'compact']
+
+
+class ZobristHasher:
+    """ Zobrist hashing of states, a random key for each atom XORed together """
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, task, compiled=True, seed=0):
+        """ Draws a 64-bit key for each atom of the task and precomputes the hash delta of each action, the XOR of
+        the keys of its effects. States are bitsets of the task when compiled, frozensets of atoms otherwise. Add
+        effects win over delete effects, so atoms both added and deleted only count as added. """
+        rng = random.Random(seed)
+        self.task = task
+        self.compiled = compiled
+        self.keys = [rng.getrandbits(64) for _ in task.atoms]
+        self.delta = []
+        if compiled:
+            self.add = task.add
+            self.delete = [~keep & ~add for keep, add in zip(task.keep, task.add)]
+            for i in range(len(task.actions)):
+                self.delta.append(self.hash(self.add[i] | self.delete[i]))
+        else:
+            self.atom_keys = dict(zip(task.atoms, self.keys))
+            self.add = [act.add_effects for act in task.actions]
+            self.delete = [act.del_effects - act.add_effects for act in task.actions]
+            for i in range(len(task.actions)):
+                self.delta.append(self.hash(self.add[i] | self.delete[i]))
+
+    # -----------------------------------------------
+    # Hash
+    # -----------------------------------------------
+
+    def hash(self, state):
+        """ Returns the XOR of the keys of the atoms in the state. """
+        h = 0
+        if self.compiled:
+            keys = self.keys
+            while state:
+                low = state & -state
+                h ^= keys[low.bit_length() - 1]
+                state ^= low
+        else:
+            for atom in state:
+                h ^= self.atom_keys[atom]
+        return h
+
+    def successor(self, h, state, i):
+        """ Returns the hash of the successor of a state of hash h by the i-th action in O(|effects|). The
+        precomputed delta applies when every add effect is false and every delete effect is true, otherwise only
+        the keys of atoms the action actually changes are XORed. """
+        add = self.add[i]
+        delete = self.delete[i]
+        if self.compiled:
+            if not state & add and state & delete == delete:
+                return h ^ self.delta[i]
+            changed = add & ~state | delete & state
+            keys = self.keys
+            while changed:
+                low = changed & -changed
+                h ^= keys[low.bit_length() - 1]
+                changed ^= low
+            return h
+        if add.isdisjoint(state) and delete <= state:
+            return h ^ self.delta[i]
+        keys = self.atom_keys
+        for atom in add:
+            if atom not in state:
+                h ^= keys[atom]
+        for atom in delete:
+            if atom in state:
+                h ^= keys[atom]
+        return h
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import heapq
+
+
+class Heuristic:
+    """ Delete-relaxation heuristics h_max, h_add and h_FF over a compiled task with unit action costs """
+
+    HEURISTICS = ['hmax', 'hadd', 'hff']
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, task, name='hff'):
+        if name not in self.HEURISTICS:
+            raise ValueError('Heuristic ' + name + ' not supported')
+        self.task = task
+        self.name = name
+        self.preconditions = [task.positive_preconditions(i) for i in range(len(task.actions))]
+        self.add_effects = [task.add_effects(i) for i in range(len(task.actions))]
+        self.watchers = [[] for _ in task.atoms]
+        self.free = []
+        for i, pre in enumerate(self.preconditions):
+            for atom in pre:
+                self.watchers[atom].append(i)
+            if not pre:
+                self.free.append(i)
+        self.goals = task.positive_goals()
+
+    # -----------------------------------------------
+    # Evaluate
+    # -----------------------------------------------
+
+    def __call__(self, state):
+        """ Returns the heuristic value of a state, or None when the relaxed task has no solution. """
+        cost, supporter = self.explore(state)
+        if cost is None:
+            return None
+        if self.name == 'hmax':
+            return max([cost[g] for g in self.goals], default=0)
+        if self.name == 'hadd':
+            return sum(cost[g] for g in self.goals)
+        relaxed_plan = set()
+        stack = list(self.goals)
+        while stack:
+            atom = stack.pop()
+            i = supporter[atom]
+            if i is not None and i not in relaxed_plan:
+                relaxed_plan.add(i)
+                stack += self.preconditions[i]
+        return len(relaxed_plan)
+
+    # -----------------------------------------------
+    # Explore
+    # -----------------------------------------------
+
+    def explore(self, state):
+        """ Generalized Dijkstra over the relaxed task, stopping once every goal is settled. Action costs combine
+        precondition costs with max for h_max and with sum otherwise. Returns the atom costs and best supporters,
+        or None when a goal is unreachable. """
+        combine_max = self.name == 'hmax'
+        cost, supporter, heap = self.initial_costs(state)
+        unsatisfied = [len(pre) for pre in self.preconditions]
+        action_cost = [0] * len(self.preconditions)
+        goals = set(self.goals)
+        settled = [False] * len(self.task.atoms)
+        while heap and goals:
+            c, atom = heapq.heappop(heap)
+            if settled[atom] or c > cost[atom]:
+                continue
+            settled[atom] = True
+            goals.discard(atom)
+            for i in self.watchers[atom]:
+                if combine_max:
+                    if c > action_cost[i]:
+                        action_cost[i] = c
+                else:
+                    action_cost[i] += c
+                unsatisfied[i] -= 1
+                if unsatisfied[i] == 0:
+                    new_cost = action_cost[i] + 1
+                    for added in self.add_effects[i]:
+                        if new_cost < cost[added]:
+                            cost[added] = new_cost
+                            supporter[added] = i
+                            heapq.heappush(heap, (new_cost, added))
+        if goals:
+            return None, None
+        return cost, supporter
+
+    def initial_costs(self, state):
+        """ Returns the atom costs and best supporters before exploring, 0 for the atoms of the state and 1 for
+        the effects of actions without preconditions, along with a heap of the atoms reached. """
+        cost = [float('inf')] * len(self.task.atoms)
+        supporter = [None] * len(self.task.atoms)
+        heap = []
+        for atom in self.task.bits(state):
+            cost[atom] = 0
+            heap.append((0, atom))
+        for i in self.free:
+            for atom in self.add_effects[i]:
+                if 1 < cost[atom]:
+                    cost[atom] = 1
+                    supporter[atom] = i
+                    heap.append((1, atom))
+        heapq.heapify(heap)
+        return cost, supporter, heap
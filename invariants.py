@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+
+import heapq
+import itertools
+
+ENCODINGS = ['atoms', 'sas']
+
+
+class MutexGroups:
+    """ Groups of atoms of a grounded task of which at most one holds in every reachable state """
+
+    # Largest number of predicates in a group
+    PATTERNS = 3
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, task):
+        """ Candidate groups come from patterns over predicates, see candidates, each checked against the ground
+        actions, see invariant. A cover of the atoms is then chosen greedily, largest groups first. Atoms which
+        never change, or which occur in negative preconditions or goals, are left out of every group. """
+        self.task = task
+        every = (1 << len(task.atoms)) - 1
+        self.fluents = 0
+        self.adders = [[] for _ in task.atoms]
+        self.deleters = [[] for _ in task.atoms]
+        negative = task.goal_mask & ~task.goal_value
+        for i in range(len(task.actions)):
+            self.fluents |= task.add[i] | ~task.keep[i] & every
+            negative |= task.pre_mask[i] & ~task.pre_value[i]
+            for atom in task.add_effects(i):
+                self.adders[atom].append(i)
+            for atom in task.del_effects(i):
+                self.deleters[atom].append(i)
+        self.eligible = self.fluents & ~negative
+        self.groups = self.cover([group for group in self.candidates() if self.invariant(group)])
+
+    # -----------------------------------------------
+    # Candidates
+    # -----------------------------------------------
+
+    def candidates(self):
+        """ Returns the candidate groups as bitsets. A pattern is a predicate with one counted argument position, or
+        none, and maps each atom to a key of its other arguments. A candidate joins the atoms of up to
+        PATTERNS patterns of distinct predicates sharing a key, such as the positions of an object with
+        (at ?obj ?pos) counted at ?pos, or the states of a hand with (holding ?obj) counted at ?obj and
+        (handempty). """
+        patterns = {}
+        for a in self.task.bits(self.eligible):
+            atom = self.task.atoms[a]
+            for counted in range(len(atom)):
+                key = atom[1:counted] + atom[counted + 1:] if counted else atom[1:]
+                keys = patterns.setdefault((len(key), atom[0], counted), {})
+                keys[key] = keys.get(key, 0) | 1 << a
+        by_length = {}
+        for pattern in sorted(patterns):
+            by_length.setdefault(pattern[0], []).append(pattern)
+        candidates = set()
+        for same_length in by_length.values():
+            for size in range(1, self.PATTERNS + 1):
+                for combination in itertools.combinations(same_length, size):
+                    if len({pattern[1] for pattern in combination}) == size:
+                        groups = {}
+                        for pattern in combination:
+                            for key, group in patterns[pattern].items():
+                                groups[key] = groups.get(key, 0) | group
+                        candidates.update(groups.values())
+        return sorted(group for group in candidates if group & (group - 1))
+
+    # -----------------------------------------------
+    # Invariant
+    # -----------------------------------------------
+
+    def invariant(self, group):
+        """ Tests if at most one atom of the group holds initially and every action keeps it so, and if each action
+        changing the group sets a value readable from its preconditions. An action adding an atom of the group adds
+        only one, and requires and deletes another atom of the group, so the state had exactly that one. An action
+        only deleting atoms of the group requires one of them, and empties the group when it deletes that one. """
+        task = self.task
+        init = task.init & group
+        if init & (init - 1):
+            return False
+        actions = set()
+        for a in task.bits(group):
+            actions.update(self.adders[a])
+            actions.update(self.deleters[a])
+        for i in actions:
+            add = task.add[i] & group
+            required = task.pre_value[i] & group
+            if add:
+                if add & (add - 1) or not required & ~task.keep[i]:
+                    return False
+            elif not required:
+                return False
+        return True
+
+    # -----------------------------------------------
+    # Cover
+    # -----------------------------------------------
+
+    def cover(self, groups):
+        """ Returns disjoint groups as sorted lists of atom ids, taking the largest group first and removing its
+        atoms from the others. Groups shrunk by a previous choice are checked again. """
+        heap = [(-self.size(group), group, group) for group in groups]
+        heapq.heapify(heap)
+        covered = 0
+        chosen = []
+        while heap:
+            size, original, group = heapq.heappop(heap)
+            remaining = group & ~covered
+            if remaining != group:
+                if remaining & (remaining - 1):
+                    heapq.heappush(heap, (-self.size(remaining), original, remaining))
+            elif group == original or self.invariant(group):
+                chosen.append(self.task.bits(group))
+                covered |= group
+        return chosen
+
+    def size(self, group):
+        return bin(group).count('1')
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+
+import itertools
+
+from grounding import Grounder
+
+
+class LiftedSuccessorGenerator:
+    """ Successor generator instantiating action schemas in each state, without grounding them up front """
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, actions, objects, types, state):
+        """ Parameters of preconditions and effects are replaced by their index, and positive preconditions are
+        ordered so each one binds as few new parameters as possible given the previous ones. States are frozensets
+        of atoms, and atoms of static predicates are indexed once from the given initial state. Only the instances
+        met during search are kept, interned to ids as (schema id, assignment), so memory grows with the reachable
+        instances rather than with every combination of objects. """
+        self.actions = actions
+        self.static = Grounder(actions, objects, types).static_predicates()
+        self.static_index = self.index(state, True)
+        self.schemas = [self.compile(action, objects, types) for action in actions]
+        self.instances = []
+        self.instance_ids = {}
+
+    def compile(self, action, objects, types):
+        """ Returns the schema as (domains, positions, join steps, free parameters, negative preconditions, add
+        effects, delete effects). Each join step matches a positive precondition as (predicate, arity, static,
+        checks, binds, repeats), where checks are (position, constant or parameter bound by previous steps), binds
+        are (position, parameter) bound by this step and repeats are (position, earlier position) of parameters
+        occurring twice. Free parameters occur in no positive precondition. """
+        type_map = action.parameter_objects(objects, types)
+        index = {var: k for k, (var, _) in enumerate(action.parameters)}
+        domains = [set(items) for items in type_map]
+        positions = [{} for _ in type_map]
+        for k, items in enumerate(type_map):
+            for j, obj in enumerate(items):
+                positions[k].setdefault(obj, j)
+
+        def template(group):
+            return sorted(((pred[0],) + tuple(index.get(term, term) for term in pred[1:]) for pred in group),
+                          key=str)
+
+        remaining = template(action.positive_preconditions)
+        steps = []
+        bound = set()
+        while remaining:
+            pre = min(remaining, key=lambda pre: (len(self.parameters(pre) - bound), -len(pre)))
+            remaining.remove(pre)
+            checks = []
+            binds = []
+            repeats = []
+            first = {}
+            for pos in range(1, len(pre)):
+                term = pre[pos]
+                if term.__class__ is not int or term in bound:
+                    checks.append((pos, term))
+                elif term in first:
+                    repeats.append((pos, first[term]))
+                else:
+                    first[term] = pos
+                    binds.append((pos, term))
+            steps.append((pre[0], len(pre), pre[0] in self.static, checks, binds, repeats))
+            bound |= first.keys()
+        free = [k for k in range(len(type_map)) if k not in bound]
+        return (domains, positions, steps, free, template(action.negative_preconditions),
+                template(action.add_effects), template(action.del_effects))
+
+    def parameters(self, pre):
+        return {term for term in pre[1:] if term.__class__ is int}
+
+    # -----------------------------------------------
+    # Index
+    # -----------------------------------------------
+
+    def index(self, state, static=False):
+        """ Maps each predicate to the atoms of the state, of either static or fluent predicates. Atoms by argument
+        are added on demand, see atoms. """
+        index = {}
+        for atom in state:
+            if (atom[0] in self.static) == static:
+                index.setdefault(atom[0], []).append(atom)
+        return index
+
+    def atoms(self, index, pred, pos, obj):
+        """ Returns the atoms of the predicate with the object at the argument position, indexing the atoms of the
+        predicate by that position on first use. """
+        objects = index.get((pred, pos))
+        if objects is None:
+            objects = index[(pred, pos)] = {}
+            for atom in index.get(pred, ()):
+                if pos < len(atom):
+                    objects.setdefault(atom[pos], []).append(atom)
+        return objects.get(obj, ())
+
+    # -----------------------------------------------
+    # Instantiate
+    # -----------------------------------------------
+
+    def instantiate(self, schema, state, index):
+        """ Returns the assignments of the parameters of a schema applicable in the state, sorted as
+        Action.groundify would emit them. Positive preconditions are joined against the atoms of the state, each
+        scanning the smallest index entry matching its bound arguments, parameters left unbound range over their
+        type and negative preconditions filter complete assignments. """
+        domains, positions, steps, free, negative, _, _ = schema
+        assignment = [None] * len(domains)
+        found = []
+
+        def match(depth):
+            if depth == len(steps):
+                found.extend(self.complete(free, positions, negative, state, assignment))
+                return
+            step = steps[depth]
+            values, candidates = self.candidates(step, index, assignment)
+            for atom in candidates:
+                if self.bind(atom, step, values, domains, assignment):
+                    match(depth + 1)
+
+        match(0)
+        found.sort(key=lambda objs: [positions[k][obj] for k, obj in enumerate(objs)])
+        return found
+
+    def candidates(self, step, index, assignment):
+        """ Returns the arguments of a step fixed by constants and bound parameters as pairs of position and object,
+        and the atoms of the smallest index entry matching them. """
+        pred, _, static, checks, _, _ = step
+        atoms_of = self.static_index if static else index
+        values = [(pos, assignment[term] if term.__class__ is int else term) for pos, term in checks]
+        candidates = atoms_of.get(pred, ())
+        for pos, obj in values:
+            atoms = self.atoms(atoms_of, pred, pos, obj)
+            if len(atoms) < len(candidates):
+                candidates = atoms
+        return values, candidates
+
+    def bind(self, atom, step, values, domains, assignment):
+        """ Binds the parameters of a step to the arguments of an atom, returning False if the atom does not match
+        the fixed arguments and repeated parameters of the step or an argument is outside its parameter domain. """
+        _, arity, _, _, binds, repeats = step
+        if len(atom) != arity:
+            return False
+        for pos, obj in values:
+            if atom[pos] != obj:
+                return False
+        for pos, earlier in repeats:
+            if atom[pos] != atom[earlier]:
+                return False
+        # Parameters bound by later steps are overwritten before being read
+        for pos, k in binds:
+            if atom[pos] not in domains[k]:
+                return False
+            assignment[k] = atom[pos]
+        return True
+
+    def complete(self, free, positions, negative, state, assignment):
+        """ Returns the assignments binding the free parameters to every object of their type, keeping those whose
+        negative preconditions are false in the state. """
+        found = []
+        for objs in itertools.product(*[positions[k] for k in free]):
+            for k, obj in zip(free, objs):
+                assignment[k] = obj
+            if all(self.ground(pre, assignment) not in state for pre in negative):
+                found.append(tuple(assignment))
+        return found
+
+    def ground(self, pre, assignment):
+        return (pre[0],) + tuple([assignment[term] if term.__class__ is int else term for term in pre[1:]])
+
+    def intern(self, k, assignment):
+        """ Returns the id of the instance of the k-th schema, assigning the next free id on first sight. """
+        key = (k, assignment)
+        i = self.instance_ids.get(key)
+        if i is None:
+            i = self.instance_ids[key] = len(self.instances)
+            self.instances.append(key)
+        return i
+
+    # -----------------------------------------------
+    # Applicable
+    # -----------------------------------------------
+
+    def applicable(self, state):
+        """ Returns the ids of the instances applicable in the given state, in schema and grounding order. """
+        index = self.index(state)
+        return [self.intern(k, assignment) for k, schema in enumerate(self.schemas)
+                for assignment in self.instantiate(schema, state, index)]
+
+    # -----------------------------------------------
+    # Successors
+    # -----------------------------------------------
+
+    def successors(self, state):
+        """ Returns the pairs (instance id, successor state) of the given state, in schema and grounding order. """
+        index = self.index(state)
+        return [(self.intern(k, assignment), self.result(state, schema, assignment))
+                for k, schema in enumerate(self.schemas) for assignment in self.instantiate(schema, state, index)]
+
+    def apply(self, state, i):
+        """ Returns the successor of the given state by the i-th instance. """
+        k, assignment = self.instances[i]
+        return self.result(state, self.schemas[k], assignment)
+
+    def result(self, state, schema, assignment):
+        return state.difference([self.ground(pre, assignment) for pre in schema[6]]).union(
+            [self.ground(pre, assignment) for pre in schema[5]])
+
+    # -----------------------------------------------
+    # Plan
+    # -----------------------------------------------
+
+    def plan(self, indices):
+        """ Decodes a sequence of instance ids to ground Action objects, equal to those of Action.groundify. """
+        plan = []
+        for i in indices:
+            k, assignment = self.instances[i]
+            action = self.actions[k]
+            if action.parameters:
+                action = action.ground([var for var, _ in action.parameters], assignment)
+            plan.append(action)
+        return plan
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+
+from action import Action
+from grounding import Grounder
+from task import Task
+
+MAGIC = b'PDDLTASK'
+VERSION = 1
+# Header: magic, version, byte order of the arrays, number of atoms and actions
+HEADER = struct.Struct('<8sI1s3xQQ')
+# Sections of uint32 arrays, or utf-8 text for names, each listed as (offset, length) in bytes after the header.
+# Lists of atom ids per action are stored as compressed rows, an offsets array of one more item than the actions
+# delimiting the ids of each action.
+SECTIONS = ['atom_offsets', 'atom_text', 'action_offsets', 'action_text', 'pre_pos_offsets', 'pre_pos',
+            'pre_neg_offsets', 'pre_neg', 'add_offsets', 'add', 'del_offsets', 'del', 'init', 'goal_pos', 'goal_neg']
+TABLE = struct.Struct('<' + 'QQ' * len(SECTIONS))
+ALIGNMENT = 8
+
+
+# -----------------------------------------------
+# Write
+# -----------------------------------------------
+
+def write_task(task, filename):
+    """ Writes a Task to a flat binary file, which MappedTask opens without copying it. Atoms and actions are
+    stored by name, preconditions, effects, initial state and goals as arrays of atom ids. """
+    if array('I').itemsize != 4:
+        raise ValueError('Platform without 32 bits unsigned arrays')
+    atoms = [' '.join(atom) for atom in task.atoms]
+    actions = [' '.join((act.name,) + tuple(act.parameters)) for act in task.actions]
+    rows = {'pre_pos': task.positive_preconditions, 'pre_neg': task.negative_preconditions,
+            'add': task.add_effects, 'del': task.del_effects}
+    sections = {}
+    for name, strings in (('atom', atoms), ('action', actions)):
+        offsets = array('I', [0])
+        text = bytearray()
+        for string in strings:
+            text += string.encode('utf-8')
+            offsets.append(len(text))
+        sections[name + '_offsets'] = offsets.tobytes()
+        sections[name + '_text'] = bytes(text)
+    for name, row in rows.items():
+        offsets = array('I', [0])
+        ids = array('I')
+        for i in range(len(task.actions)):
+            ids.extend(row(i))
+            offsets.append(len(ids))
+        sections[name + '_offsets'] = offsets.tobytes()
+        sections[name] = ids.tobytes()
+    sections['init'] = array('I', task.bits(task.init)).tobytes()
+    sections['goal_pos'] = array('I', task.bits(task.goal_value)).tobytes()
+    sections['goal_neg'] = array('I', task.bits(task.goal_mask & ~task.goal_value)).tobytes()
+    table = []
+    offset = HEADER.size + TABLE.size
+    for name in SECTIONS:
+        offset += -offset % ALIGNMENT
+        table += [offset, len(sections[name])]
+        offset += len(sections[name])
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, b'<' if sys.byteorder == 'little' else b'>', len(atoms), len(actions)))
+        f.write(TABLE.pack(*table))
+        for k, name in enumerate(SECTIONS):
+            f.write(b'\0' * (table[2 * k] - f.tell()))
+            f.write(sections[name])
+
+
+# -----------------------------------------------
+# Lazy list
+# -----------------------------------------------
+
+class LazyList:
+    """ Read-only sequence computing each item on first access """
+
+    def __init__(self, size, item):
+        self.items = [None] * size
+        self.item = item
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, i):
+        value = self.items[i]
+        if value is None:
+            value = self.items[i] = self.item(i)
+        return value
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self.items)))
+
+
+class MappedTask(Task):
+    """ Grounded planning task read from a binary file of write_task mapped in memory """
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, filename):
+        """ The file is mapped read-only and its arrays are read in place, so processes opening the same file share
+        one copy in the page cache. Atoms, actions and the masks of each action follow Task, but are only built on
+        first access and kept afterwards. Actions are rebuilt as ground Action objects from the stored atoms. """
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER.size + TABLE.size:
+            raise ValueError('Task file ' + str(filename) + ' truncated')
+        magic, version, byteorder, n_atoms, n_actions = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Task file ' + str(filename) + ' of another format or version')
+        if byteorder != (b'<' if sys.byteorder == 'little' else b'>'):
+            raise ValueError('Task file ' + str(filename) + ' written with another byte order')
+        table = TABLE.unpack_from(self.map, HEADER.size)
+        self.view = memoryview(self.map)
+        self.sections = {}
+        for k, name in enumerate(SECTIONS):
+            offset, length = table[2 * k], table[2 * k + 1]
+            if offset + length > len(self.map):
+                raise ValueError('Task file ' + str(filename) + ' truncated')
+            section = self.view[offset:offset + length]
+            self.sections[name] = section if name.endswith('_text') else section.cast('I')
+        self.atoms = LazyList(n_atoms, self.atom)
+        self.actions = LazyList(n_actions, self.action)
+        self.init = self.mask(self.sections['init'])
+        goal_pos = self.mask(self.sections['goal_pos'])
+        self.goal_mask = goal_pos | self.mask(self.sections['goal_neg'])
+        self.goal_value = goal_pos
+        self.pre_mask = LazyList(n_actions, lambda i: self.row_mask('pre_pos', i) | self.row_mask('pre_neg', i))
+        self.pre_value = LazyList(n_actions, lambda i: self.row_mask('pre_pos', i))
+        self.keep = LazyList(n_actions, lambda i: ~self.row_mask('del', i))
+        self.add = LazyList(n_actions, lambda i: self.row_mask('add', i))
+        self._atom_ids = None
+
+    def close(self):
+        """ Releases the mapping, the task is no longer usable. """
+        for section in self.sections.values():
+            section.release()
+        self.view.release()
+        self.map.close()
+
+    # -----------------------------------------------
+    # Sections
+    # -----------------------------------------------
+
+    def string(self, name, i):
+        offsets = self.sections[name + '_offsets']
+        return str(self.sections[name + '_text'][offsets[i]:offsets[i + 1]], 'utf-8')
+
+    def row(self, name, i):
+        """ Returns the atom ids of the given section for the i-th action. """
+        offsets = self.sections[name + '_offsets']
+        return self.sections[name][offsets[i]:offsets[i + 1]].tolist()
+
+    def mask(self, ids):
+        bits = 0
+        for i in ids:
+            bits |= 1 << i
+        return bits
+
+    def row_mask(self, name, i):
+        return self.mask(self.row(name, i))
+
+    def atom(self, i):
+        return tuple(self.string('atom', i).split(' '))
+
+    def action(self, i):
+        name, *parameters = self.string('action', i).split(' ')
+        atoms = [[self.atoms[a] for a in self.row(section, i)] for section in ('pre_pos', 'pre_neg', 'add', 'del')]
+        # Ground instances take a tuple of objects, schemas without parameters are their own instance
+        return Action(name, tuple(parameters) if parameters else [], *atoms)
+
+    # -----------------------------------------------
+    # Encode
+    # -----------------------------------------------
+
+    @property
+    def atom_ids(self):
+        if self._atom_ids is None:
+            self._atom_ids = {atom: i for i, atom in enumerate(self.atoms)}
+        return self._atom_ids
+
+    def intern(self, atom):
+        """ Returns the id of a ground atom, the atoms of a mapped task are fixed. """
+        return self.atom_ids[atom]
+
+    # -----------------------------------------------
+    # Atom lists
+    # -----------------------------------------------
+
+    def positive_preconditions(self, i):
+        return self.row('pre_pos', i)
+
+    def negative_preconditions(self, i):
+        return self.row('pre_neg', i)
+
+    def add_effects(self, i):
+        return self.row('add', i)
+
+    def del_effects(self, i):
+        return self.row('del', i)
+
+    def positive_goals(self):
+        return self.sections['goal_pos'].tolist()
+
+
+# -----------------------------------------------
+# Main
+# -----------------------------------------------
+
+def run_mapped():
+    # Imported here, the planner opens mapped tasks
+    from planner import Planner
+    parser = argparse.ArgumentParser(description='Writes a grounded task to a binary file mapped by MappedTask.')
+    parser.add_argument('domain_file', help='PDDL domain file')
+    parser.add_argument('problem_file', help='PDDL problem file')
+    parser.add_argument('output_file', help='binary task file written')
+    parser.add_argument('-g', '--grounding', help='grounding of actions', choices=Grounder.GROUNDINGS,
+                        default='reachable')
+    args = parser.parse_args()
+    write_task(Planner().prepare(args.domain_file, args.problem_file, args.grounding), args.output_file)
+
+
+if __name__ == '__main__':
+    run_mapped()
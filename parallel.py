@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import heapq
+import multiprocessing
+import os
+import queue
+import tempfile
+import time
+
+from heuristic import Heuristic
+from mapped import MappedTask, write_task
+from search import SearchStatistics
+from successor import GENERATORS, CodeSuccessorGenerator, SuccessorGenerator
+
+PARALLEL_SEARCHES = ['bfs', 'astar', 'gbfs', 'wastar']
+# Searches returning optimal plans, which go on until no open state can lead to a shorter plan
+OPTIMAL_SEARCHES = ['bfs', 'astar']
+# Counters of each worker in the shared statistics array
+COUNTERS = ['expanded', 'generated', 'duplicates', 'dead_ends', 'frontier_peak', 'nodes']
+
+
+class HashDistributedSearch:
+    """ Hash-distributed best-first search (HDA*) over worker processes, each owning the states of its hash """
+
+    # Seconds between checks of termination, limits and progress
+    poll = 0.01
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, task, workers=None, search='bfs', heuristic=None, weight=2, generator='tree'):
+        """ Each state belongs to the worker of index hash(state) modulo workers, all cores by default, which keeps
+        its g value and parent, and its own open list. Successors owned by other workers are sent to them over
+        queues in batches. Workers open the task as a MappedTask, from the file of a MappedTask or from a file the
+        given task is written to, so they share one copy. Breadth-first search and A* go on after a goal is found
+        until no open state can lead to a shorter plan, so plans are as short as sequential ones, while greedy
+        best-first and weighted A* stop at the first goal. Options are checked here, as workers failing on them
+        would stop the search. """
+        if search not in PARALLEL_SEARCHES:
+            raise ValueError('Search ' + search + ' not supported by parallel search')
+        if heuristic is not None and heuristic not in Heuristic.HEURISTICS:
+            raise ValueError('Heuristic ' + heuristic + ' not supported')
+        if generator not in GENERATORS:
+            raise ValueError('Generator ' + generator + ' not supported')
+        self.task = task
+        self.workers = workers or os.cpu_count() or 1
+        self.search = search
+        if heuristic is None and search != 'bfs':
+            heuristic = 'hmax' if search == 'astar' else 'hff'
+        self.heuristic = heuristic
+        self.weight = weight
+        self.generator = generator
+
+    # -----------------------------------------------
+    # Search
+    # -----------------------------------------------
+
+    def run(self, statistics=None, observer=None, limits=None):
+        """ Returns a list of action ids or None. The coordinating process detects termination once every worker is
+        idle and every batch sent was received, checks limits on the total nodes and expansions, time and the
+        token, and calls on_progress of the observer with the counters summed over workers. The plan is then
+        traced back from the goal through the parents kept by the owners of its states. Memory limits are not
+        supported, as each worker runs in its own process. """
+        if statistics is None:
+            statistics = SearchStatistics()
+        if limits is not None and limits.max_memory is not None:
+            raise ValueError('Memory limits not supported by parallel search')
+        if self.task.goal_reached(self.task.init):
+            statistics.record(0, 0, 0, 0, 1)
+            statistics.finish([])
+            return []
+        if isinstance(self.task, MappedTask):
+            return self.run_file(self.task.filename, statistics, observer, limits)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'task')
+            write_task(self.task, filename)
+            return self.run_file(filename, statistics, observer, limits)
+
+    def run_file(self, filename, statistics, observer, limits):
+        context = multiprocessing.get_context()
+        shared = SharedState(context, self.workers)
+        processes = [context.Process(target=run_search_worker, daemon=True,
+                                     args=(k, filename, self.search, self.heuristic, self.weight, self.generator,
+                                           shared))
+                     for k in range(self.workers)]
+        for process in processes:
+            process.start()
+        try:
+            shared.send(owner(self.task.init, self.workers), ('states', [(self.task.init, 0, None, -1)]))
+            plan, reason = self.coordinate(shared, processes, statistics, observer, limits)
+        finally:
+            shared.stop.set()
+            for process in processes:
+                process.join()
+        statistics.record(*shared.totals()[:5])
+        statistics.finish(plan, reason)
+        if plan is not None and observer is not None:
+            observer.on_goal(plan, statistics)
+        return plan
+
+    def coordinate(self, shared, processes, statistics, observer, limits):
+        """ Waits for the search to end, returning the plan or None and the reason it stopped early if it did.
+        Raises RuntimeError once a worker process has died, as its states would never be expanded. """
+        optimal = self.search in OPTIMAL_SEARCHES
+        while True:
+            time.sleep(self.poll)
+            check_workers(processes)
+            with shared.lock:
+                found = shared.best[0] != float('inf')
+                done = all(shared.idle) and shared.counters[0] == shared.counters[1]
+            if found and (done or not optimal):
+                break
+            totals = shared.totals()
+            if observer is not None:
+                statistics.record(*totals[:5])
+                observer.on_progress(statistics)
+            reason = None if limits is None else self.limit_reason(limits, totals)
+            if reason is not None:
+                return None, reason
+            if done:
+                break
+        if not found:
+            return None, None
+        shared.inboxes[int(shared.best[1])].put(('trace', [], None))
+        while True:
+            try:
+                return shared.results.get(timeout=self.poll), None
+            except queue.Empty:
+                check_workers(processes)
+
+    def limit_reason(self, limits, totals):
+        """ Returns the reason the search stops given the counters summed over workers, or None. """
+        if limits.max_nodes is not None and totals[5] > limits.max_nodes:
+            return 'limit'
+        if limits.max_expansions is not None and totals[0] >= limits.max_expansions:
+            return 'budget'
+        if limits.token is not None and limits.token.cancelled:
+            return 'cancelled'
+        if limits.deadline is not None and time.monotonic() >= limits.deadline:
+            return 'timeout'
+        return None
+
+
+def check_workers(processes):
+    """ Raises RuntimeError if a worker process exited, which only happens once the search stopped unless it
+    failed. """
+    for process in processes:
+        if process.exitcode is not None:
+            raise RuntimeError('Search worker exited with code ' + str(process.exitcode))
+
+
+def owner(state, workers):
+    return hash(state) % workers
+
+
+# -----------------------------------------------
+# Shared state
+# -----------------------------------------------
+
+class SharedState:
+    """ Queues and counters shared by the coordinating process and the workers """
+
+    def __init__(self, context, workers):
+        """ Batches sent and received are counted, and workers flag when they are idle, under one lock, so a
+        consistent snapshot shows no batch in flight. The best plan cost found and the worker owning its goal
+        are kept in best. """
+        self.workers = workers
+        self.inboxes = [context.Queue() for _ in range(workers)]
+        self.results = context.Queue()
+        self.lock = context.Lock()
+        self.counters = context.Array('q', 2, lock=False)
+        self.idle = context.Array('b', workers, lock=False)
+        self.best = context.Array('d', [float('inf'), -1], lock=False)
+        self.statistics = context.Array('q', len(COUNTERS) * workers, lock=False)
+        self.stop = context.Event()
+
+    def send(self, k, message):
+        with self.lock:
+            self.counters[0] += 1
+        self.inboxes[k].put(message)
+
+    def totals(self):
+        return [sum(self.statistics[c::len(COUNTERS)]) for c in range(len(COUNTERS))]
+
+
+# -----------------------------------------------
+# Worker
+# -----------------------------------------------
+
+class SearchWorker:
+    """ Open list, g values and parents of the states owned by one worker of HashDistributedSearch """
+
+    # Successors buffered for a worker before they are sent
+    batch = 256
+    # Expansions between checks of the inbox and sending every buffer
+    interval = 32
+
+    def __init__(self, k, task, search, heuristic, weight, generator, shared):
+        self.k = k
+        self.task = task
+        self.search = search
+        self.heuristic = None if heuristic is None else Heuristic(task, heuristic)
+        self.weight = weight
+        tree = SuccessorGenerator(task.actions, task)
+        self.generator = CodeSuccessorGenerator(tree) if generator == 'code' else tree
+        self.shared = shared
+        self.workers = shared.workers
+        self.optimal = search in OPTIMAL_SEARCHES
+        self.fringe = []
+        self.g_values = {}
+        self.parents = {}
+        self.goal = None
+        self.counter = 0
+        self.outboxes = [[] for _ in range(self.workers)]
+        self.counts = [0] * len(COUNTERS)
+
+    # -----------------------------------------------
+    # Run
+    # -----------------------------------------------
+
+    def run(self):
+        shared = self.shared
+        idle = False
+        expanded = 0
+        while not shared.stop.is_set():
+            if expanded % self.interval == 0 or not self.fringe:
+                self.flush()
+                if not self.fringe and not idle:
+                    with shared.lock:
+                        shared.idle[self.k] = idle = True
+                try:
+                    message = shared.inboxes[self.k].get(timeout=0.05) if idle else shared.inboxes[self.k].get_nowait()
+                except queue.Empty:
+                    message = None
+                if message is not None:
+                    if message[0] == 'trace':
+                        self.trace(message[1], message[2])
+                    else:
+                        with shared.lock:
+                            shared.counters[1] += 1
+                            shared.idle[self.k] = idle = False
+                        for node in message[1]:
+                            self.insert(*node)
+                    continue
+            if self.fringe:
+                self.expand()
+                expanded += 1
+        self.publish()
+
+    def publish(self):
+        self.counts[4] = max(self.counts[4], len(self.fringe))
+        self.counts[5] = len(self.g_values)
+        self.shared.statistics[self.k * len(COUNTERS):(self.k + 1) * len(COUNTERS)] = self.counts
+
+    def flush(self):
+        """ Sends every buffered successor and publishes the counters of the worker. """
+        for k, outbox in enumerate(self.outboxes):
+            if outbox:
+                self.shared.send(k, ('states', outbox))
+                self.outboxes[k] = []
+        self.publish()
+
+    # -----------------------------------------------
+    # Insert
+    # -----------------------------------------------
+
+    def insert(self, state, g, parent, i):
+        """ Adds a state owned by this worker reached with cost g, unless it was reached as cheaply before or, for
+        optimal searches, it cannot lead to a plan shorter than the best one found. Goals are tested here. """
+        old_g = self.g_values.get(state)
+        if old_g is not None and (self.search == 'gbfs' or old_g <= g):
+            self.counts[2] += 1
+            return
+        h = 0
+        if self.heuristic is not None:
+            h = self.heuristic(state)
+            if h is None:
+                self.counts[3] += 1
+                return
+        if self.optimal and g + h >= self.shared.best[0]:
+            return
+        self.g_values[state] = g
+        self.parents[state] = None if parent is None else (parent, i)
+        if self.task.goal_reached(state):
+            with self.shared.lock:
+                if g < self.shared.best[0]:
+                    self.shared.best[0] = g
+                    self.shared.best[1] = self.k
+                    self.goal = state
+            return
+        self.counter += 1
+        if self.search == 'gbfs':
+            f = h
+        else:
+            f = g + (self.weight * h if self.search == 'wastar' else h)
+        heapq.heappush(self.fringe, (f, h, self.counter, g, state))
+        if len(self.fringe) > self.counts[4]:
+            self.counts[4] = len(self.fringe)
+
+    # -----------------------------------------------
+    # Expand
+    # -----------------------------------------------
+
+    def expand(self):
+        f, _, _, g, state = heapq.heappop(self.fringe)
+        if g > self.g_values[state] or self.optimal and f >= self.shared.best[0]:
+            return
+        self.counts[0] += 1
+        successors = self.generator.successors(state)
+        self.counts[1] += len(successors)
+        if not successors:
+            self.counts[3] += 1
+        for i, new_state in successors:
+            k = owner(new_state, self.workers)
+            if k == self.k:
+                self.insert(new_state, g + 1, state, i)
+            else:
+                outbox = self.outboxes[k]
+                outbox.append((new_state, g + 1, state, i))
+                if len(outbox) >= self.batch:
+                    self.shared.send(k, ('states', outbox))
+                    self.outboxes[k] = []
+
+    # -----------------------------------------------
+    # Trace
+    # -----------------------------------------------
+
+    def trace(self, plan, state):
+        """ Follows parents from a state, the goal of this worker if None, prepending their actions to the plan,
+        and passes the trace on to the owner of the first parent owned by another worker. """
+        if state is None:
+            state = self.goal
+        while self.parents[state] is not None:
+            state, i = self.parents[state]
+            plan.append(i)
+            k = owner(state, self.workers)
+            if k != self.k:
+                self.shared.inboxes[k].put(('trace', plan, state))
+                return
+        plan.reverse()
+        self.shared.results.put(plan)
+
+
+def run_search_worker(k, filename, search, heuristic, weight, generator, shared):
+    task = MappedTask(filename)
+    try:
+        SearchWorker(k, task, search, heuristic, weight, generator, shared).run()
+    finally:
+        task.close()
+        # Batches left unread once the search stopped must not keep the process from exiting
+        for inbox in shared.inboxes:
+            inbox.cancel_join_thread()
+        shared.results.cancel_join_thread()
@@ -16,56 +16,310 @@ See the GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/> """
 import argparse
+import asyncio
+import concurrent.futures
+import copy
+import cProfile
+import functools
+import glob
+import json
+import pstats
+import signal
+import sys
 import time
 
+from cache import TaskCache
+from grounding import Grounder
+from hashing import HASHINGS, ZobristHasher
+from heuristic import Heuristic
+from invariants import ENCODINGS, MutexGroups
+from lifted import LiftedSuccessorGenerator
+from mapped import MappedTask
+from parallel import HashDistributedSearch
 from PDDL import PDDL_Parser
+from pruning import PRUNINGS, StubbornSetGenerator
+from search import (SEARCHES, CancellationToken, SearchLimits, SearchStatistics, anytime_search, beam_search,
+                    best_first_search, breadth_first_search, hashed_breadth_first_search, ida_star_search,
+                    iterated_width_search)
+from successor import GENERATORS, CodeSuccessorGenerator, FiniteDomainSuccessorGenerator, SuccessorGenerator
+from symmetry import ObjectSymmetries
+from task import FiniteDomainTask, Task
 
 
 class Planner:
     """ Classical planner """
 
+    GROUNDINGS = Grounder.GROUNDINGS + ['lifted']
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, cache_dir=None, cache_size=256 << 20, grounding_workers=1):
+        """ With a cache_dir, parsed domains and grounded tasks are kept on disk, see TaskCache. More than one
+        grounding worker grounds action schemas in parallel, see Grounder.ground. The statistics of the last solve
+        are kept in statistics. """
+        self.cache = TaskCache(cache_dir, cache_size) if cache_dir else None
+        self.grounding_workers = grounding_workers
+        self.statistics = SearchStatistics()
+
     # -----------------------------------------------
     # Solve
     # -----------------------------------------------
 
-    def solve(self, domain, problem):
-        """ Plans out a solution, given a planning domain and problem in PDDL. """
-        # Parser
-        parser = PDDL_Parser()
-        parser.parse_domain(domain)
-        parser.parse_problem(problem)
+    def solve(self, domain, problem, compiled=False, grounding='reachable', search='bfs', heuristic=None, weight=2,
+              time_limit=None, **options):
+        """ Plans out a solution, given a planning domain and problem in PDDL. With compiled set, the search runs
+        over a Task where atoms are interned to integers and states are bitsets. Grounding is either reachable or
+        full, see Grounder.ground, or lifted, skipping grounding for solve_lifted. Searches other than bfs always
+        run over a Task, see search_task. Counters and phase times are left in statistics. The time limit in
+        seconds counts from this call, and other options are passed to solve_task. """
+        start_time = time.monotonic()
+        self.statistics = SearchStatistics()
+        if grounding == 'lifted':
+            task = self.parse(domain, problem)
+        else:
+            task = self.prepare(domain, problem, grounding)
+        if time_limit is not None:
+            time_limit -= time.monotonic() - start_time
+        if grounding == 'lifted':
+            return self.solve_lifted(task, compiled, search, heuristic, weight, time_limit=time_limit, **options)
+        return self.solve_task(task, compiled, search, heuristic, weight, time_limit=time_limit, **options)
+
+    async def solve_async(self, domain, problem, executor=None, **options):
+        """ Runs solve in an executor, the default thread pool of the event loop unless given, so an event loop
+        can serve many planning requests at once. Each call runs on a shallow copy of the planner, sharing its
+        cache, and its statistics are passed to the observer and left in statistics once it returns, those of the
+        last call to return with concurrent calls. Cancelling the awaiting task cancels the search through the
+        token of the call, created when not given. """
+        planner = copy.copy(self)
+        token = options['token'] = options.get('token') or CancellationToken()
+        loop = asyncio.get_running_loop()
+        try:
+            plan = await loop.run_in_executor(executor, functools.partial(planner.solve, domain, problem, **options))
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
+        self.statistics = planner.statistics
+        return plan
+
+    def solve_task(self, task, compiled=False, search='bfs', heuristic=None, weight=2, observer=None,
+                   hashing='state', width=100, max_nodes=None, max_memory=None, fallback=None, pruning='none',
+                   symmetry=False, max_expansions=None, time_limit=None, token=None, encoding='atoms',
+                   generator='tree', search_workers=1, max_width=2):
+        """ Plans out a solution of a grounded task, starting over with the fallback search at limits. """
+        self.check_options(search, hashing, pruning, symmetry, encoding, generator, search_workers, fallback, max_width)
+        start_time = time.perf_counter()
+        if encoding == 'sas':
+            task = FiniteDomainTask(task, MutexGroups(task).groups)
+        self.statistics.atoms = len(task.atoms)
+        self.statistics.actions = len(task.actions)
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        limits = self.search_limits(max_nodes, max_memory, max_expansions, deadline, token)
+        compiled = compiled or search != 'bfs' or encoding != 'atoms' or isinstance(task, MappedTask)
+        canonical = None
+        if symmetry:
+            symmetries = ObjectSymmetries(task, compiled)
+            if symmetries.classes:
+                canonical = symmetries.canonical
+        if search_workers > 1:
+            plan = HashDistributedSearch(task, search_workers, search, heuristic, weight, generator).run(
+                self.statistics, observer, limits)
+            plan = None if plan is None else task.plan(plan)
+        elif compiled:
+            plan = self.search_task(task, search, heuristic, weight, observer, hashing, width, limits, pruning,
+                                    canonical, generator, max_width)
+        else:
+            plan = self.search_sets(task, observer, hashing, limits, pruning, canonical, generator)
+        if self.statistics.status == 'limit' and fallback:
+            limits = self.search_limits(None, None, max_expansions, deadline, token)
+            plan = self.search_task(task, fallback, heuristic, weight, observer, width=width, limits=limits,
+                                    pruning=pruning, generator=generator, max_width=max_width)
+            self.statistics.fallback = fallback
+        self.statistics.search_time = time.perf_counter() - start_time
+        return plan
+
+    def solve_lifted(self, parser, compiled=False, search='bfs', heuristic=None, weight=2, observer=None,
+                     hashing='state', width=100, max_nodes=None, max_memory=None, fallback=None, pruning='none',
+                     symmetry=False, max_expansions=None, time_limit=None, token=None, encoding='atoms',
+                     generator='tree', search_workers=1, max_width=2):
+        """ Plans out a solution of a parsed task without grounding it, by breadth-first search over states as
+        frozensets of atoms where applicable actions are instantiated in each state, see LiftedSuccessorGenerator.
+        Options are those of solve_task, except that searches over a Task are not supported. The number of actions
+        in statistics counts the instances met during search. """
+        if (compiled or search != 'bfs' or hashing != 'state' or pruning != 'none' or symmetry or fallback or
+                encoding != 'atoms' or generator != 'tree' or search_workers > 1):
+            raise ValueError('Lifted grounding only supported by bfs over sets')
+        start_time = time.perf_counter()
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        limits = self.search_limits(max_nodes, max_memory, max_expansions, deadline, token)
+        generator = LiftedSuccessorGenerator(parser.actions, parser.objects, parser.types, parser.state)
+        plan = breadth_first_search(parser.state, generator.successors,
+                                    lambda new_state: self.applicable(new_state, parser.positive_goals,
+                                                                      parser.negative_goals),
+                                    self.statistics, observer, limits)
+        self.statistics.actions = len(generator.instances)
+        self.statistics.search_time = time.perf_counter() - start_time
+        return None if plan is None else generator.plan(plan)
+
+    def check_options(self, search='bfs', hashing='state', pruning='none', symmetry=False, encoding='atoms',
+                      generator='tree', search_workers=1, fallback=None, max_width=2):
+        """ Raises ValueError for options of solve_task not supported or not supported together. """
+        for name, value, choices in [('Generator', generator, GENERATORS), ('Encoding', encoding, ENCODINGS),
+                                     ('Pruning', pruning, PRUNINGS), ('Hashing', hashing, HASHINGS)]:
+            if value not in choices:
+                raise ValueError(name + ' ' + value + ' not supported')
+        sequential = encoding != 'atoms' or hashing != 'state' or pruning != 'none' or symmetry or fallback
+        for conflict, message in [
+                (encoding != 'atoms' and (hashing != 'state' or pruning != 'none' or symmetry),
+                 'Encoding ' + encoding + ' not supported with hashing, pruning or symmetry'),
+                (search_workers > 1 and sequential,
+                 'Parallel search not supported with encoding, hashing, pruning, symmetry or fallback'),
+                (hashing != 'state' and search != 'bfs', 'Hashing ' + hashing + ' only supported by bfs'),
+                (encoding != 'atoms' and search in ('iw', 'siw'), 'Search ' + search + ' only supported over atoms'),
+                (max_width < 1, 'Max width must be at least 1'),
+                (symmetry and (hashing != 'state' or search in ('idastar', 'beam', 'iw', 'siw')),
+                 'Symmetry not supported by ' + (search if hashing == 'state' else hashing))]:
+            if conflict:
+                raise ValueError(message)
+
+    def search_limits(self, max_nodes=None, max_memory=None, max_expansions=None, deadline=None, token=None):
+        """ Returns the SearchLimits of the given limits, or None without any. """
+        if (max_nodes, max_memory, max_expansions, deadline, token) == (None,) * 5:
+            return None
+        return SearchLimits(max_nodes, max_memory, max_expansions, deadline, token)
+
+    def search_sets(self, task, observer=None, hashing='state', limits=None, pruning='none', canonical=None,
+                    generator='tree'):
+        """ Breadth-first search over states as frozensets of ground atoms. """
         # Parsed data
-        state = parser.state
-        goal_pos = parser.positive_goals
-        goal_not = parser.negative_goals
-        # Do nothing
-        if self.applicable(state, goal_pos, goal_not):
-            return []
-        # Grounding process
-        ground_actions = []
-        for action in parser.actions:
-            for act in action.groundify(parser.objects, parser.types):
-                ground_actions.append(act)
+        state = task.decode(task.init)
+        goal_pos = task.decode(task.goal_value)
+        goal_not = task.decode(task.goal_mask & ~task.goal_value)
+        generator = self.successor_generator(task.actions, None, generator)
+        if pruning == 'stubborn':
+            generator = StubbornSetGenerator(generator, task)
         # Search
-        visited = {state}
-        fringe = [state, None]
-        while fringe:
-            state = fringe.pop(0)
-            plan = fringe.pop(0)
-            for act in ground_actions:
-                if self.applicable(state, act.positive_preconditions, act.negative_preconditions):
-                    new_state = self.apply(state, act.add_effects, act.del_effects)
-                    if new_state not in visited:
-                        if self.applicable(new_state, goal_pos, goal_not):
-                            full_plan = [act]
-                            while plan:
-                                act, plan = plan
-                                full_plan.insert(0, act)
-                            return full_plan
-                        visited.add(new_state)
-                        fringe.append(new_state)
-                        fringe.append((act, plan))
-        return None
+        if hashing != 'state':
+            plan = hashed_breadth_first_search(state, generator.applicable, generator.apply,
+                                               lambda new_state: self.applicable(new_state, goal_pos, goal_not),
+                                               ZobristHasher(task, False), hashing == 'compact', self.statistics,
+                                               observer, limits)
+        else:
+            plan = breadth_first_search(state, generator.successors,
+                                        lambda new_state: self.applicable(new_state, goal_pos, goal_not),
+                                        self.statistics, observer, limits, canonical)
+        return None if plan is None else task.plan(plan)
+
+    # -----------------------------------------------
+    # Solve batch
+    # -----------------------------------------------
+
+    def solve_batch(self, domain, problems, workers=None, timeout=None, grounding='reachable', **options):
+        """ Solves many problems of one domain over a pool of worker processes, yielding a result for each problem
+        as soon as it finishes, see solve_batch_problem. The domain is parsed once and shipped to each worker along
+        with a copy of the planner, so its cache and grounding workers are used for every problem. The timeout in
+        seconds applies to each problem. Searches check it cooperatively, while parsing and grounding are
+        interrupted by SIGALRM where available. """
+        domain_parser = PDDL_Parser()
+        domain_parser.parse_domain(domain)
+        initargs = (self, domain, domain_parser, grounding, timeout, options)
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=init_batch_worker, initargs=initargs) as pool:
+            futures = [pool.submit(solve_batch_problem, problem) for problem in problems]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+
+    # -----------------------------------------------
+    # Prepare
+    # -----------------------------------------------
+
+    def parse(self, domain, problem, domain_parser=None):
+        """ Returns a parser holding the domain and problem, reusing the cached domain when available, or a copy of
+        the given domain_parser holding the parsed domain. """
+        start_time = time.perf_counter()
+        parser = None if domain_parser is None else copy.deepcopy(domain_parser)
+        if self.cache and parser is None:
+            key = self.cache.key(domain)
+            parser = self.cache.load('domain', key)
+            if parser is None:
+                parser = PDDL_Parser()
+                parser.parse_domain(domain)
+                self.cache.store('domain', key, parser)
+        if parser is None:
+            parser = PDDL_Parser()
+            parser.parse_domain(domain)
+        parser.parse_problem(problem)
+        self.statistics.parse_time = time.perf_counter() - start_time
+        return parser
+
+    def ground(self, parser, grounding='reachable'):
+        """ Grounds the parsed task and compiles it to a Task. """
+        start_time = time.perf_counter()
+        grounder = Grounder(parser.actions, parser.objects, parser.types)
+        ground_actions = grounder.ground(parser.state, grounding, self.grounding_workers)
+        task = Task(parser.state, parser.positive_goals, parser.negative_goals, ground_actions)
+        self.statistics.ground_time = time.perf_counter() - start_time
+        return task
+
+    def prepare(self, domain, problem, grounding='reachable', domain_parser=None):
+        """ Parses and grounds a task, reusing the cached grounded task of the same domain and problem files. """
+        if self.cache:
+            key = self.cache.key(domain, problem) + '-' + grounding
+            task = self.cache.load('task', key)
+            if task is None:
+                task = self.ground(self.parse(domain, problem, domain_parser), grounding)
+                self.cache.store('task', key, task)
+            return task
+        return self.ground(self.parse(domain, problem, domain_parser), grounding)
+
+    # -----------------------------------------------
+    # Search task
+    # -----------------------------------------------
+
+    def search_task(self, task, search='bfs', heuristic=None, weight=2, observer=None, hashing='state', width=100,
+                    limits=None, pruning='none', canonical=None, generator='tree', max_width=2):
+        """ Searches over the bitset states of a compiled task with breadth-first search, A*, greedy best-first
+        search, weighted A*, IDA*, beam search, anytime weighted A*, iterated width or serialized iterated width.
+        The heuristic defaults to the admissible hmax for A* and IDA* and to hff otherwise. """
+        if search not in SEARCHES:
+            raise ValueError('Search ' + search + ' not supported')
+        generator = self.successor_generator(task.actions, task, generator)
+        if pruning == 'stubborn':
+            generator = StubbornSetGenerator(generator, task)
+        if search == 'bfs':
+            if hashing != 'state':
+                plan = hashed_breadth_first_search(task.init, generator.applicable, task.apply, task.goal_reached,
+                                                   ZobristHasher(task), hashing == 'compact', self.statistics,
+                                                   observer, limits)
+            else:
+                plan = breadth_first_search(task.init, generator.successors, task.goal_reached, self.statistics,
+                                            observer, limits, canonical)
+            return None if plan is None else task.plan(plan)
+        if search in ('iw', 'siw'):
+            plan = iterated_width_search(task, generator, max_width, search == 'siw', self.statistics, observer,
+                                         limits)
+            return None if plan is None else task.plan(plan)
+        if heuristic is None:
+            heuristic = 'hmax' if search in ('astar', 'idastar') else 'hff'
+        heuristic = Heuristic(task, heuristic)
+        if search == 'idastar':
+            plan = ida_star_search(task, generator, heuristic, self.statistics, observer, limits)
+        elif search == 'beam':
+            plan = beam_search(task, generator, heuristic, width, self.statistics, observer, limits)
+        elif search == 'anytime':
+            plan = anytime_search(task, generator, heuristic, weight, self.statistics, observer, limits, canonical)
+        else:
+            plan = best_first_search(task, generator, heuristic, weight if search == 'wastar' else 1,
+                                     search == 'gbfs', self.statistics, observer, limits, canonical)
+        return None if plan is None else task.plan(plan)
+
+    def successor_generator(self, actions, task=None, generator='tree'):
+        """ Builds the successor generator used by searches, subclasses may return their own. """
+        if isinstance(task, FiniteDomainTask):
+            tree = FiniteDomainSuccessorGenerator(task)
+        else:
+            tree = SuccessorGenerator(actions, task)
+        return CodeSuccessorGenerator(tree) if generator == 'code' else tree
 
     # -----------------------------------------------
     # Applicable
@@ -86,6 +340,121 @@ class Planner:
         return state.difference(negative).union(positive)
 
 
+# -----------------------------------------------
+# Batch worker
+# -----------------------------------------------
+
+batch_worker = {}
+
+
+def init_batch_worker(planner, domain, domain_parser, grounding, timeout, options):
+    batch_worker.update(planner=planner, domain=domain, domain_parser=domain_parser, grounding=grounding,
+                        timeout=timeout, options=options)
+    if timeout and hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, raise_timeout)
+
+
+def raise_timeout(_signum, _frame):
+    raise TimeoutError()
+
+
+def solve_batch_problem(problem):
+    """ Returns a dictionary with the problem, its status among solved, unsolvable, limit, budget, timeout and
+    error, the time spent in seconds, the plan as a list of strings in the format printed by run_planner and the
+    search statistics. """
+    start_time = time.time()
+    result = {'problem': problem, 'status': 'error', 'time': 0, 'plan': None}
+    planner = batch_worker['planner']
+    planner.statistics = SearchStatistics()
+    timeout = batch_worker['timeout']
+    alarm = timeout and hasattr(signal, 'SIGALRM')
+    try:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        domain, domain_parser = batch_worker['domain'], batch_worker['domain_parser']
+        lifted = batch_worker['grounding'] == 'lifted'
+        if lifted:
+            task = planner.parse(domain, problem, domain_parser)
+        else:
+            task = planner.prepare(domain, problem, batch_worker['grounding'], domain_parser)
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        time_limit = timeout - (time.time() - start_time) if timeout else None
+        solve = planner.solve_lifted if lifted else planner.solve_task
+        plan = solve(task, time_limit=time_limit, **batch_worker['options'])
+        if plan is None:
+            result['status'] = planner.statistics.status or 'unsolvable'
+        else:
+            result['status'] = 'solved'
+            result['plan'] = [' '.join([act.name] + list(act.parameters)) for act in plan]
+    except TimeoutError:
+        result['status'] = 'timeout'
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    result['time'] = time.time() - start_time
+    result['statistics'] = planner.statistics.to_dict()
+    return result
+
+
+def expand_problems(patterns):
+    """ Expands glob patterns and @files listing one problem file per line. """
+    problems = []
+    for pattern in patterns:
+        if pattern.startswith('@'):
+            with open(pattern[1:]) as f:
+                problems += [line.strip() for line in f if line.strip()]
+        elif glob.has_magic(pattern):
+            problems += sorted(glob.glob(pattern))
+        else:
+            problems.append(pattern)
+    return problems
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError('must be at least 1')
+    return value
+
+
+def search_options(args):
+    """ Returns the options of solve_task given by command-line arguments. """
+    return dict(compiled=args.compiled, search=args.search, heuristic=args.heuristic, weight=args.weight,
+                hashing=args.hashing, width=args.width, max_nodes=args.max_nodes,
+                max_memory=None if args.max_memory is None else args.max_memory << 20, fallback=args.fallback,
+                pruning=args.pruning, symmetry=args.symmetry, max_expansions=args.max_expansions,
+                encoding=args.encoding, generator=args.generator, search_workers=args.search_workers,
+                max_width=args.max_width)
+
+
+def run_batch(planner, args, problems, options):
+    """ Solves many problems given by command-line arguments, printing results as JSON lines. The statistics of
+    each problem are printed to stderr, keeping the output parseable, and written to a JSON file as a dictionary
+    from problem to statistics. """
+    statistics = {}
+    for result in planner.solve_batch(args.domain_file, problems, args.jobs, args.timeout, args.grounding, **options):
+        print(json.dumps(result), flush=True)
+        statistics[result['problem']] = result['statistics']
+        if args.stats:
+            print('Problem: ' + result['problem'], file=sys.stderr)
+            print_statistics(result['statistics'], sys.stderr)
+    if args.stats_json:
+        with open(args.stats_json, 'w') as f:
+            json.dump(statistics, f, indent=2)
+
+
+def print_statistics(statistics, file=sys.stdout):
+    """ Prints the statistics of a search given as a dictionary, see SearchStatistics.to_dict. """
+    print('Parse: %(parse_time).4fs ground: %(ground_time).4fs search: %(search_time).4fs' % statistics, file=file)
+    print('Atoms: %(atoms)d actions: %(actions)d' % statistics, file=file)
+    print('Expanded: %(expanded)d generated: %(generated)d duplicates: %(duplicates)d dead ends: %(dead_ends)d'
+          % statistics, file=file)
+    print('Branching factor: %(branching_factor).2f frontier peak: %(frontier_peak)d' % statistics, file=file)
+
+
 def run_planner():
     """ Interprets command-line arguments to configure and execute the
     planner. """
@@ -96,17 +465,93 @@ def run_planner():
     parser.add_argument('domain_file', help='defines a problem domain via requirements, predicates, constants and '
                                             'actions using Planning Domain Definition Language (PDDL)')
     parser.add_argument('problem_file', help='defines problem by describing its domain, objects, initial state and '
-                                             'goal state using Planning Domain Definition Language (PDDL)')
+                                             'goal state using Planning Domain Definition Language (PDDL), many '
+                                             'problems, glob patterns or @files listing problems run in batch mode',
+                        nargs='+')
+    parser.add_argument('-c', '--compiled', help='searches over integer atoms and bitset states', action='store_true',
+                        default=False)
+    parser.add_argument('-g', '--grounding', help='grounds only relaxed reachable actions or every instance, or '
+                                                  'with lifted instantiates actions in each state of bfs',
+                        choices=Planner.GROUNDINGS, default='reachable')
+    parser.add_argument('--grounding-workers', help='grounds action schemas over this many processes',
+                        type=positive_int, default=1)
+    parser.add_argument('-s', '--search', help='search algorithm, heuristic searches run over a compiled task',
+                        choices=SEARCHES, default='bfs')
+    parser.add_argument('-H', '--heuristic', help='delete-relaxation heuristic, hmax for astar and hff otherwise '
+                                                  'by default', choices=Heuristic.HEURISTICS)
+    parser.add_argument('-w', '--weight', help='heuristic weight of wastar and anytime', type=float, default=2)
+    parser.add_argument('--width', help='number of states kept per layer by beam search', type=positive_int,
+                        default=100)
+    parser.add_argument('--max-width', help='largest size of the atom tuples whose novelty iw and siw test',
+                        type=positive_int, default=2)
+    parser.add_argument('--max-nodes', help='stops the search once it keeps more than this many nodes', type=int)
+    parser.add_argument('--max-expansions', help='stops the search after expanding this many states', type=int)
+    parser.add_argument('--max-memory', help='stops the search once the process exceeds this many MB', type=int)
+    parser.add_argument('--fallback', help='search started over when a limit is reached, such as beam or idastar',
+                        choices=SEARCHES)
+    parser.add_argument('--hashing', help='detects duplicate states of bfs by hashing whole states, by incremental '
+                                          'zobrist hashes or, with compact, keeping only hashes and possibly '
+                                          'missing plans on collisions', choices=HASHINGS, default='state')
+    parser.add_argument('-p', '--pruning', help='expands only the actions of a strong stubborn set of each state',
+                        choices=PRUNINGS, default='none')
+    parser.add_argument('--symmetry', help='detects interchangeable objects and prunes states symmetric to visited '
+                                           'ones', action='store_true', default=False)
+    parser.add_argument('-e', '--encoding', help='searches over atoms or, with sas, over finite-domain variables '
+                                                 'of mutex groups packed in integer states', choices=ENCODINGS,
+                        default='atoms')
+    parser.add_argument('--generator', help='finds applicable actions with a decision tree or, with code, with '
+                                            'Python functions generated from it', choices=GENERATORS, default='tree')
+    parser.add_argument('--search-workers', help='distributes states by hash over this many search processes',
+                        type=positive_int, default=1)
+    parser.add_argument('--cache-dir', help='caches parsed domains and grounded tasks in this directory')
+    parser.add_argument('--cache-size', help='evicts least recently used cache entries beyond this size in MB',
+                        type=int, default=256)
+    parser.add_argument('-j', '--jobs', help='number of worker processes in batch mode, all cores by default',
+                        type=positive_int)
+    parser.add_argument('-t', '--timeout', help='time limit in seconds of each problem in batch mode', type=float)
+    parser.add_argument('--stats', help='prints search statistics and the time of each phase', action='store_true',
+                        default=False)
+    parser.add_argument('--stats-json', help='writes search statistics to this file as JSON')
+    parser.add_argument('--profile', help='profiles the planner and prints the functions with most cumulative time',
+                        action='store_true', default=False)
     parser.add_argument('-v', '--verbose', help='gives verbose output for debugging purposes', action='store_true',
                         default=False)
     args = parser.parse_args()
-    planner = Planner()
-    plan = planner.solve(args.domain_file, args.problem_file)
+    planner = Planner(args.cache_dir, args.cache_size << 20, args.grounding_workers)
+    problems = expand_problems(args.problem_file)
+    options = search_options(args)
+    if len(problems) != 1 or args.jobs or args.timeout:
+        if args.profile:
+            parser.error('argument --profile: not supported in batch mode')
+        run_batch(planner, args, problems, options)
+        return
+    run_single(planner, args, problems[0], options, start_time)
+
+
+def run_single(planner, args, problem, options, start_time):
+    """ Solves one problem given by command-line arguments, printing the plan, and exits with status 1 when no plan
+    is found. """
+    profile = cProfile.Profile() if args.profile else None
+    if profile:
+        profile.enable()
+    plan = planner.solve(args.domain_file, problem, grounding=args.grounding, **options)
+    if profile:
+        profile.disable()
     print('Time: ' + str(time.time() - start_time) + 's')
+    if args.stats:
+        print_statistics(planner.statistics.to_dict())
+    if args.stats_json:
+        with open(args.stats_json, 'w') as f:
+            json.dump(planner.statistics.to_dict(), f, indent=2)
+    if profile:
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(20)
     if type(plan) is list:
         print('plan:')
         for act in plan:
             print(act if args.verbose else act.name + ' ' + ' '.join(act.parameters))
+    elif planner.statistics.status != 'unsolvable':
+        print('No plan was found within the search limits')
+        exit(1)
     else:
         print('No plan was found')
         exit(1)
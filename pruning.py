@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+
+PRUNINGS = ['none', 'stubborn']
+
+
+class StubbornSetGenerator:
+    """ Successor generator pruning applicable actions to a strong stubborn set """
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, generator, task):
+        """ Wraps a successor generator over the states of a task, bitsets or frozensets of atoms as the generator
+        expects. The actions achieving each atom and the actions interfering with each action are computed once.
+        Two actions interfere when one disables the other or their effects conflict. """
+        self.generator = generator
+        self.task = task
+        self.compiled = generator.task is not None
+        n = len(task.atoms)
+        self.adders = [0] * n
+        self.deleters = [0] * n
+        requirers = [0] * n
+        forbidders = [0] * n
+        for i in range(len(task.actions)):
+            bit = 1 << i
+            for p in task.add_effects(i):
+                self.adders[p] |= bit
+            for p in task.bits(~task.keep[i] & ~task.add[i]):
+                self.deleters[p] |= bit
+            for p in task.positive_preconditions(i):
+                requirers[p] |= bit
+            for p in task.negative_preconditions(i):
+                forbidders[p] |= bit
+        self.interference = [self.interfering(i, requirers, forbidders) for i in range(len(task.actions))]
+
+    def interfering(self, i, requirers, forbidders):
+        """ Returns the bitset of actions other than i interfering with it, given the bitsets of actions requiring
+        and forbidding each atom. """
+        task = self.task
+        interfering = 0
+        for p in task.bits(~task.keep[i] & ~task.add[i]):
+            interfering |= requirers[p] | self.adders[p]
+        for p in task.add_effects(i):
+            interfering |= forbidders[p] | self.deleters[p]
+        for p in task.positive_preconditions(i):
+            interfering |= self.deleters[p]
+        for p in task.negative_preconditions(i):
+            interfering |= self.adders[p]
+        return interfering & ~(1 << i)
+
+    # -----------------------------------------------
+    # Applicable
+    # -----------------------------------------------
+
+    def applicable(self, state):
+        """ Returns the applicable actions of a strong stubborn set of the given state, in grounding order. The set
+        starts from the achievers of an unsatisfied goal and is closed by adding the actions interfering with each
+        applicable action in it and the achievers of an unsatisfied precondition of each inapplicable one. At least
+        one action of every plan from the state is kept, so searches stay complete and optimal. Sets of actions are
+        bitsets over action ids, and the closure stops early once every applicable action is in. """
+        ids = self.generator.applicable(state)
+        if len(ids) <= 1:
+            return ids
+        task = self.task
+        bits = state if self.compiled else task.encode(state)
+        stubborn = self.achievers(bits, task.goal_mask, task.goal_value)
+        if not stubborn:
+            return ids
+        applicable = 0
+        for i in ids:
+            applicable |= 1 << i
+        queue = stubborn
+        while queue:
+            low = queue & -queue
+            queue ^= low
+            i = low.bit_length() - 1
+            if applicable & low:
+                new = self.interference[i] & ~stubborn
+            else:
+                new = self.achievers(bits, task.pre_mask[i], task.pre_value[i]) & ~stubborn
+            if new:
+                stubborn |= new
+                queue |= new
+                if not applicable & ~stubborn:
+                    return ids
+        return [i for i in ids if stubborn >> i & 1]
+
+    def achievers(self, bits, mask, value):
+        """ Returns the bitset of actions making true the lowest unsatisfied condition, or 0 if all are
+        satisfied. """
+        missing = value & ~bits
+        if missing:
+            return self.adders[(missing & -missing).bit_length() - 1]
+        present = mask & ~value & bits
+        if present:
+            return self.deleters[(present & -present).bit_length() - 1]
+        return 0
+
+    # -----------------------------------------------
+    # Successors
+    # -----------------------------------------------
+
+    def successors(self, state):
+        apply = self.generator.apply
+        return [(i, apply(state, i)) for i in self.applicable(state)]
+
+    def apply(self, state, i):
+        return self.generator.apply(state, i)
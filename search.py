@@ -0,0 +1,742 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import heapq
+import itertools
+import mmap
+import sys
+import threading
+import time
+from array import array
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SEARCHES = ['bfs', 'astar', 'gbfs', 'wastar', 'idastar', 'beam', 'anytime', 'iw', 'siw']
+
+
+# -----------------------------------------------
+# Statistics
+# -----------------------------------------------
+
+class SearchStatistics:
+    """ Counters of one search and the time spent in each phase of the planner """
+
+    FIELDS = ['status', 'fallback', 'plan_length', 'expanded', 'generated', 'duplicates', 'dead_ends', 'frontier_peak',
+              'atoms', 'actions', 'parse_time', 'ground_time', 'search_time']
+
+    def __init__(self):
+        self.status = None
+        self.fallback = None
+        self.plan_length = None
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.dead_ends = 0
+        self.frontier_peak = 0
+        self.atoms = 0
+        self.actions = 0
+        self.parse_time = 0
+        self.ground_time = 0
+        self.search_time = 0
+
+    def record(self, expanded, generated, duplicates, dead_ends, frontier_peak):
+        self.expanded = expanded
+        self.generated = generated
+        self.duplicates = duplicates
+        self.dead_ends = dead_ends
+        self.frontier_peak = frontier_peak
+
+    def finish(self, plan, reason=None):
+        """ Records the outcome of a search given its plan or None, and the reason it stopped early if it did,
+        see SearchLimits. """
+        self.status = 'solved' if plan is not None else reason or 'unsolvable'
+        self.plan_length = None if plan is None else len(plan)
+
+    @property
+    def branching_factor(self):
+        """ Average number of successors generated per expanded state. """
+        return self.generated / self.expanded if self.expanded else 0
+
+    @property
+    def total_time(self):
+        return self.parse_time + self.ground_time + self.search_time
+
+    def to_dict(self):
+        result = {field: getattr(self, field) for field in self.FIELDS}
+        result['branching_factor'] = self.branching_factor
+        result['total_time'] = self.total_time
+        return result
+
+
+# -----------------------------------------------
+# Limits
+# -----------------------------------------------
+
+class SearchLimits:
+    """ Budgets on the nodes a search keeps and expands, the memory of the process and the time, and a cancellation
+    token """
+
+    interval = 64
+
+    def __init__(self, max_nodes=None, max_memory=None, max_expansions=None, deadline=None, token=None):
+        """ Searches stop once they keep more than max_nodes nodes or the resident memory of the process exceeds
+        max_memory bytes, with the reason limit, once they expand max_expansions states, with the reason budget, once
+        time.monotonic() passes the deadline, with the reason timeout, or once the CancellationToken is cancelled,
+        with the reason cancelled. Memory, time and the token are checked every interval expansions. Memory is the
+        current use of the process, see current_memory, so a larger search run earlier does not stop later ones,
+        and max_memory is not checked where it cannot be measured. """
+        self.max_nodes = max_nodes
+        self.max_memory = max_memory
+        self.max_expansions = max_expansions
+        self.deadline = deadline
+        self.token = token
+        self.reason = None
+
+    def reached(self, nodes, expanded):
+        if self.max_nodes is not None and nodes > self.max_nodes:
+            self.reason = 'limit'
+        elif self.max_expansions is not None and expanded >= self.max_expansions:
+            self.reason = 'budget'
+        elif expanded % self.interval:
+            return False
+        elif self.token is not None and self.token.cancelled:
+            self.reason = 'cancelled'
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            self.reason = 'timeout'
+        elif self.max_memory is not None and (current_memory() or 0) > self.max_memory:
+            self.reason = 'limit'
+        else:
+            return False
+        return True
+
+
+class CancellationToken:
+    """ Flag shared with a running search, which stops soon after it is cancelled from any thread """
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+
+def current_memory():
+    """ Returns the resident set size of the current process in bytes, read from /proc where available, or None
+    elsewhere. """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def peak_memory():
+    """ Returns the peak resident set size of the current process in bytes, or None where unavailable. """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+# -----------------------------------------------
+# Observer
+# -----------------------------------------------
+
+class SearchObserver:
+    """ Hooks called by searches, subclasses override the ones they need. on_expand is called before each
+    expansion, on_progress every interval expansions and on_goal with the plan as a list of action ids. The
+    statistics passed are only kept up to date while an observer is given, so searches without one pay nothing. """
+
+    interval = 1000
+
+    def on_expand(self, state, statistics):
+        pass
+
+    def on_progress(self, statistics):
+        pass
+
+    def on_goal(self, plan, statistics):
+        pass
+
+
+class SearchMonitor:
+    """ Statistics, observer and limits of one search, checked by the search before each expansion """
+
+    def __init__(self, statistics=None, observer=None, limits=None):
+        """ Searches only call stop while active, that is given an observer or limits. The reason the limits
+        stopped the search is kept in reason. """
+        self.statistics = SearchStatistics() if statistics is None else statistics
+        self.observer = observer
+        self.limits = limits
+        self.active = observer is not None or limits is not None
+        self.reason = None
+
+    def stop(self, state, nodes, expanded, generated, duplicates, dead_ends, peak):
+        """ Returns True once the limits are reached with the given number of nodes kept, otherwise passes the
+        state about to be expanded and the counters to the observer. """
+        if self.limits is not None and self.limits.reached(nodes, expanded):
+            self.reason = self.limits.reason
+            return True
+        if self.observer is not None:
+            self.statistics.record(expanded, generated, duplicates, dead_ends, peak)
+            self.observer.on_expand(state, self.statistics)
+            if expanded % self.observer.interval == 0:
+                self.observer.on_progress(self.statistics)
+        return False
+
+    def goal(self, plan, expanded, generated, duplicates, dead_ends, peak):
+        """ Passes a plan found and the counters to the observer. """
+        if self.observer is not None:
+            self.statistics.record(expanded, generated, duplicates, dead_ends, peak)
+            self.observer.on_goal(plan, self.statistics)
+
+    def finish(self, plan, expanded, generated, duplicates, dead_ends, peak):
+        """ Records the counters and the outcome of the search, passes a plan found to the observer and returns
+        the plan. """
+        self.statistics.record(expanded, generated, duplicates, dead_ends, peak)
+        self.statistics.finish(plan, self.reason)
+        if plan is not None:
+            self.goal(plan, expanded, generated, duplicates, dead_ends, peak)
+        return plan
+
+
+def trace_nodes(i, node, parents, actions):
+    """ Returns the plan ending with action i applied to a node, following the arrays of parent ids and action ids
+    back to node 0. """
+    plan = [i]
+    while node:
+        plan.append(actions[node])
+        node = parents[node]
+    plan.reverse()
+    return plan
+
+
+def trace_states(state, parents):
+    """ Returns the plan reaching a state, following a dictionary from states to their parent state and action id,
+    or None for the initial state. """
+    plan = []
+    while parents[state] is not None:
+        state, i = parents[state]
+        plan.append(i)
+    plan.reverse()
+    return plan
+
+
+# -----------------------------------------------
+# Breadth-first search
+# -----------------------------------------------
+
+def breadth_first_search(state, successors, goal, statistics=None, observer=None, limits=None, canonical=None):
+    """ Breadth-first search testing goals on generation. Nodes are ids into a list of states with parallel arrays
+    of parent ids and action ids, and since nodes are expanded in creation order the open list is just the id of
+    the next node to expand. Returns a list of action ids or None. Counters are kept in locals and written to the
+    given statistics at the end, or at each expansion while an observer is given. Given limits, a SearchLimits,
+    the search stops once reached with the status limit in statistics. A canonical function maps states to their
+    keys in the visited set, such as ObjectSymmetries.canonical, while the states themselves are expanded. """
+    monitor = SearchMonitor(statistics, observer, limits)
+    plan = None
+    generated = dead_ends = 0
+    peak = 1
+    node = 0
+    if goal(state):
+        plan = []
+    visited = {state if canonical is None else canonical(state)}
+    states = [state]
+    parents = array('l', [-1])
+    actions = array('l', [-1])
+    while plan is None and node < len(states):
+        if monitor.active and monitor.stop(states[node], len(states), node, generated, generated - len(states) + 1,
+                                           dead_ends, peak):
+            break
+        new_states = successors(states[node])
+        generated += len(new_states)
+        if not new_states:
+            dead_ends += 1
+        for i, new_state in new_states:
+            key = new_state if canonical is None else canonical(new_state)
+            if key not in visited:
+                if goal(new_state):
+                    # Successors after the goal are never looked at
+                    generated -= len(new_states) - 1 - new_states.index((i, new_state))
+                    plan = trace_nodes(i, node, parents, actions)
+                    break
+                visited.add(key)
+                states.append(new_state)
+                parents.append(node)
+                actions.append(i)
+        node += 1
+        if len(states) - node > peak:
+            peak = len(states) - node
+    # Every generated state is either a duplicate, a new node or the goal
+    new = len(states) - 1 + (plan is not None and node > 0)
+    return monitor.finish(plan, node, generated, generated - new, dead_ends, peak)
+
+
+def hashed_breadth_first_search(state, applicable, apply, goal, hasher, compact=False, statistics=None,
+                                observer=None, limits=None):
+    """ Breadth-first search detecting duplicates by incremental Zobrist hashes, see ZobristHasher. The hash of a
+    successor is computed from its parent and action before the successor itself is built. Visited states are
+    kept in a dictionary from hash to state, so states are only compared when hashes match, and states with a hash
+    already taken by another state go to a set of collisions, see visit_state. With compact set only hashes are
+    kept, duplicates are never built and states are dropped once expanded, so memory holds little more than the
+    frontier, while a collision prunes a state never visited and may miss plans, see visit_hash. """
+    monitor = SearchMonitor(statistics, observer, limits)
+    plan = None
+    generated = duplicates = dead_ends = 0
+    peak = 1
+    node = 0
+    if goal(state):
+        plan = []
+    h = hasher.hash(state)
+    visited = {h} if compact else {h: state}
+    visit = visit_hash if compact else visit_state
+    collisions = set()
+    states = [state]
+    hashes = array('Q', [h])
+    parents = array('l', [-1])
+    actions = array('l', [-1])
+    successor_hash = hasher.successor
+    while plan is None and node < len(states):
+        state = states[node]
+        if monitor.active and monitor.stop(state, len(states) - node if compact else len(states), node, generated,
+                                           duplicates, dead_ends, peak):
+            break
+        if compact:
+            states[node] = None
+        h = hashes[node]
+        ids = applicable(state)
+        generated += len(ids)
+        if not ids:
+            dead_ends += 1
+        for i in ids:
+            new_h = successor_hash(h, state, i)
+            new_state = visit(visited, collisions, new_h, state, i, apply)
+            if new_state is None:
+                duplicates += 1
+                continue
+            if goal(new_state):
+                # Successors after the goal are never looked at
+                generated -= len(ids) - 1 - ids.index(i)
+                plan = trace_nodes(i, node, parents, actions)
+                break
+            states.append(new_state)
+            hashes.append(new_h)
+            parents.append(node)
+            actions.append(i)
+        node += 1
+        if len(states) - node > peak:
+            peak = len(states) - node
+    return monitor.finish(plan, node, generated, duplicates, dead_ends, peak)
+
+
+def visit_state(visited, collisions, new_h, state, i, apply):
+    """ Returns the successor of a state by action i with hash new_h, adding it to the visited dictionary from
+    hashes to states, or to the collisions when its hash is taken by another state, or None if already visited. """
+    new_state = apply(state, i)
+    old_state = visited.get(new_h)
+    if old_state is None:
+        visited[new_h] = new_state
+    elif old_state == new_state or new_state in collisions:
+        return None
+    else:
+        collisions.add(new_state)
+    return new_state
+
+
+def visit_hash(visited, collisions, new_h, state, i, apply):
+    """ Returns the successor of a state by action i with hash new_h, adding the hash to the visited set, or None
+    without building the successor when the hash is already visited. """
+    if new_h in visited:
+        return None
+    visited.add(new_h)
+    return apply(state, i)
+
+
+# -----------------------------------------------
+# Best-first search
+# -----------------------------------------------
+
+def best_first_search(task, generator, heuristic, weight=1, greedy=False, statistics=None, observer=None,
+                      limits=None, canonical=None):
+    """ Best-first search on a heap-based open list ordered by f = g + weight * h, or by h alone when greedy.
+    Ties are broken by h and then by insertion order. States reached again with a lower g are reopened, so A*
+    with an admissible heuristic returns optimal plans, while greedy search never reopens. Returns a list of action
+    ids or None. States reached again without improvement count as duplicates and states with an infinite
+    heuristic as dead ends. With a canonical function g values are kept by the key of each state, and parents by
+    the state itself, so plans only follow real transitions. """
+    monitor = SearchMonitor(statistics, observer, limits)
+    plan = None
+    expanded = generated = duplicates = dead_ends = 0
+    peak = 1
+    state = task.init
+    h = heuristic(state)
+    fringe = []
+    if h is None:
+        dead_ends += 1
+    else:
+        key = state if canonical is None else canonical(state)
+        g_values = {key: 0}
+        parents = {state: None}
+        counter = 0
+        fringe.append((h if greedy else weight * h, h, counter, 0, state, key))
+    while fringe:
+        _, h, _, g, state, key = heapq.heappop(fringe)
+        if g > g_values[key]:
+            continue
+        if task.goal_reached(state):
+            plan = trace_states(state, parents)
+            break
+        if monitor.active and monitor.stop(state, len(g_values), expanded, generated, duplicates, dead_ends, peak):
+            break
+        expanded += 1
+        for i in generator.applicable(state):
+            new_state = task.apply(state, i)
+            generated += 1
+            new_g = g + 1
+            key = new_state if canonical is None else canonical(new_state)
+            old_g = g_values.get(key)
+            if old_g is not None and (greedy or old_g <= new_g):
+                duplicates += 1
+                continue
+            new_h = heuristic(new_state)
+            if new_h is None:
+                dead_ends += 1
+                continue
+            g_values[key] = new_g
+            parents[new_state] = (state, i)
+            counter += 1
+            f = new_h if greedy else new_g + weight * new_h
+            heapq.heappush(fringe, (f, new_h, counter, new_g, new_state, key))
+        if len(fringe) > peak:
+            peak = len(fringe)
+    return monitor.finish(plan, expanded, generated, duplicates, dead_ends, peak)
+
+
+# -----------------------------------------------
+# IDA*
+# -----------------------------------------------
+
+def ida_star_search(task, generator, heuristic, statistics=None, observer=None, limits=None):
+    """ Iterative deepening A*, depth-first searches bounded by f = g + h, each raising the bound to the smallest f
+    that exceeded the previous one, see bounded_search. Only the current path is kept, so memory grows with the
+    plan length, and states already on the path are pruned. With an admissible heuristic plans are optimal.
+    Returns a list of action ids or None. """
+    monitor = SearchMonitor(statistics, observer, limits)
+    counts = [0, 0, 0, 0, 1]
+    plan = None
+    bound = heuristic(task.init)
+    if bound is None:
+        counts[3] += 1
+    elif task.goal_reached(task.init):
+        plan = []
+    while plan is None and bound is not None and monitor.reason is None:
+        plan, bound = bounded_search(task, generator, heuristic, bound, counts, monitor)
+    return monitor.finish(plan, *counts)
+
+
+def bounded_search(task, generator, heuristic, bound, counts, monitor):
+    """ One iteration of IDA*, a depth-first search from the initial state pruning states with f above the bound.
+    Returns the plan, or None and the smallest f above the bound, or None without any. Counters are added to
+    counts, the list of expanded, generated, duplicate and dead end states and the frontier peak. """
+    expanded, generated, duplicates, dead_ends, peak = counts
+    plan = next_bound = None
+    path = [task.init]
+    on_path = {task.init}
+    ids = []
+    stack = [iter(generator.applicable(task.init))]
+    expanded += 1
+    while stack:
+        i = next(stack[-1], None)
+        if i is None:
+            stack.pop()
+            on_path.discard(path.pop())
+            del ids[-1:]
+            continue
+        generated += 1
+        new_state = task.apply(path[-1], i)
+        if new_state in on_path:
+            duplicates += 1
+            continue
+        new_h = heuristic(new_state)
+        if new_h is None:
+            dead_ends += 1
+            continue
+        f = len(path) + new_h
+        if f > bound:
+            next_bound = f if next_bound is None else min(f, next_bound)
+            continue
+        if task.goal_reached(new_state):
+            plan = ids + [i]
+            break
+        if monitor.active and monitor.stop(new_state, len(path), expanded, generated, duplicates, dead_ends, peak):
+            break
+        expanded += 1
+        ids.append(i)
+        path.append(new_state)
+        on_path.add(new_state)
+        stack.append(iter(generator.applicable(new_state)))
+        if len(path) > peak:
+            peak = len(path)
+    counts[:] = expanded, generated, duplicates, dead_ends, peak
+    return plan, next_bound
+
+
+# -----------------------------------------------
+# Beam search
+# -----------------------------------------------
+
+def beam_search(task, generator, heuristic, width=100, statistics=None, observer=None, limits=None):
+    """ Breadth-first search keeping only the width successors of lowest heuristic value at each layer, ties broken
+    by generation order, see expand_layer. Memory is bounded by width times the plan length, but the search is
+    incomplete and returns None when the beam empties, even if a plan exists, the reason being limit once successors
+    were cut. Returns a list of action ids or None. """
+    monitor = SearchMonitor(statistics, observer, limits)
+    counts = [0, 0, 0, 0, 1]
+    plan = None
+    state = task.init
+    layer = []
+    parents = {state: None}
+    if heuristic(state) is None:
+        counts[3] += 1
+    elif task.goal_reached(state):
+        plan = []
+    else:
+        layer.append(state)
+    while layer and plan is None:
+        plan, candidates = expand_layer(task, generator, heuristic, layer, parents, counts, monitor)
+        counts[4] = max(counts[4], len(candidates))
+        if len(candidates) > width:
+            monitor.reason = monitor.reason or 'limit'
+        layer = []
+        for _, _, new_state, state, i in heapq.nsmallest(width, candidates):
+            parents[new_state] = (state, i)
+            layer.append(new_state)
+    return monitor.finish(plan, *counts)
+
+
+def expand_layer(task, generator, heuristic, layer, parents, counts, monitor):
+    """ Expands the states of a layer of beam search, skipping those in parents. Returns the plan once a goal is
+    generated, otherwise None and the successors as tuples of heuristic value, generation order, state, parent and
+    action id, none when the limits are reached. Counters are added to counts, see bounded_search. """
+    expanded, generated, duplicates, dead_ends, peak = counts
+    plan = None
+    candidates = []
+    seen = set()
+    for state in layer:
+        if monitor.active and monitor.stop(state, len(parents) + len(candidates), expanded, generated, duplicates,
+                                           dead_ends, peak):
+            candidates = []
+            break
+        expanded += 1
+        for i in generator.applicable(state):
+            generated += 1
+            new_state = task.apply(state, i)
+            if new_state in parents or new_state in seen:
+                duplicates += 1
+                continue
+            if task.goal_reached(new_state):
+                parents[new_state] = (state, i)
+                plan = trace_states(new_state, parents)
+                candidates = []
+                break
+            new_h = heuristic(new_state)
+            if new_h is None:
+                dead_ends += 1
+                continue
+            seen.add(new_state)
+            candidates.append((new_h, len(candidates), new_state, state, i))
+        if plan is not None:
+            break
+    counts[:] = expanded, generated, duplicates, dead_ends, peak
+    return plan, candidates
+
+
+# -----------------------------------------------
+# Anytime search
+# -----------------------------------------------
+
+def anytime_search(task, generator, heuristic, weight=2, statistics=None, observer=None, limits=None,
+                   canonical=None):
+    """ Anytime weighted A*, a weighted A* that goes on after finding a plan, pruning states with g + h at least
+    the length of the best plan so far and reopening states reached with a lower g. Each better plan is passed to
+    the observer as found. The search ends when the open list empties, when the best plan is optimal given an
+    admissible heuristic, or when limits are reached, and returns the best plan found or None. """
+    monitor = SearchMonitor(statistics, observer, limits)
+    plan = None
+    expanded = generated = duplicates = dead_ends = 0
+    peak = 1
+    state = task.init
+    h = heuristic(state)
+    fringe = []
+    if h is None:
+        dead_ends += 1
+    else:
+        key = state if canonical is None else canonical(state)
+        g_values = {key: 0}
+        parents = {state: None}
+        counter = 0
+        fringe.append((weight * h, h, counter, 0, state, key))
+    while fringe:
+        _, h, _, g, state, key = heapq.heappop(fringe)
+        if g > g_values[key] or plan is not None and g + h >= len(plan):
+            continue
+        if task.goal_reached(state):
+            plan = trace_states(state, parents)
+            monitor.goal(plan, expanded, generated, duplicates, dead_ends, peak)
+            continue
+        if monitor.active and monitor.stop(state, len(g_values), expanded, generated, duplicates, dead_ends, peak):
+            break
+        expanded += 1
+        for i in generator.applicable(state):
+            new_state = task.apply(state, i)
+            generated += 1
+            new_g = g + 1
+            key = new_state if canonical is None else canonical(new_state)
+            old_g = g_values.get(key)
+            if old_g is not None and old_g <= new_g:
+                duplicates += 1
+                continue
+            new_h = heuristic(new_state)
+            if new_h is None:
+                dead_ends += 1
+                continue
+            if plan is not None and new_g + new_h >= len(plan):
+                continue
+            g_values[key] = new_g
+            parents[new_state] = (state, i)
+            counter += 1
+            heapq.heappush(fringe, (new_g + weight * new_h, new_h, counter, new_g, new_state, key))
+        peak = max(peak, len(fringe))
+    # Plans were passed to the observer as found
+    monitor.statistics.record(expanded, generated, duplicates, dead_ends, peak)
+    monitor.statistics.finish(plan, monitor.reason)
+    return plan
+
+
+# -----------------------------------------------
+# Iterated width
+# -----------------------------------------------
+
+class NoveltyTable:
+    """ Tuples of up to k atoms made true by the states seen so far """
+
+    def __init__(self, k, atoms):
+        """ For k of 1 the table is a bitset of the atoms seen, for k of 2 a bitset for each atom of the atoms seen
+        along with it, and for larger k a set of tuples of atom ids. """
+        self.k = k
+        self.seen = 0
+        self.pairs = [0] * atoms if k == 2 else None
+        self.tuples = set()
+
+    def novel(self, state, ids):
+        """ Records the tuples of a bitset state, whose atom ids are given, returning True if any was new. """
+        if self.k == 1:
+            new = state & ~self.seen
+            self.seen |= state
+            return new != 0
+        if self.k == 2:
+            new = False
+            pairs = self.pairs
+            for a in ids:
+                if state & ~pairs[a]:
+                    new = True
+                    pairs[a] |= state
+            return new
+        size = len(self.tuples)
+        self.tuples.update(itertools.combinations_with_replacement(ids, self.k))
+        return len(self.tuples) > size
+
+
+def width_search(task, generator, state, goal, k, counts, monitor):
+    """ IW(k), a breadth-first search from the given state pruning every generated state that makes no new tuple of
+    up to k atoms true, so at most O(n^k) states of n atoms are expanded. Returns the plan and the state reached,
+    or None and None when the goal is not found or the limits of the monitor, a SearchMonitor, are reached.
+    Counters are added to counts, the list of expanded, generated, pruned and dead end states and the frontier
+    peak. """
+    table = NoveltyTable(k, len(task.atoms))
+    table.novel(state, task.bits(state))
+    states = [state]
+    parents = array('l', [-1])
+    actions = array('l', [-1])
+    node = 0
+    while node < len(states):
+        if monitor.active and monitor.stop(states[node], len(states), *counts):
+            return None, None
+        new_states = generator.successors(states[node])
+        counts[0] += 1
+        counts[1] += len(new_states)
+        if not new_states:
+            counts[3] += 1
+        for i, new_state in new_states:
+            if goal(new_state):
+                return trace_nodes(i, node, parents, actions), new_state
+            if not table.novel(new_state, task.bits(new_state)):
+                counts[2] += 1
+                continue
+            states.append(new_state)
+            parents.append(node)
+            actions.append(i)
+        node += 1
+        if len(states) - node > counts[4]:
+            counts[4] = len(states) - node
+    return None, None
+
+
+def iterated_width_search(task, generator, max_width=2, serialized=False, statistics=None, observer=None,
+                          limits=None):
+    """ Iterated width, running IW(1), IW(2) and so on up to IW(max_width) until one reaches the goal, see
+    width_search. Serialized, as SIW, each iteration only looks for a state satisfying more goals, keeping those
+    already satisfied, and the next ones start from it, so goals made of many atoms are achieved one at a time.
+    Returns a list of action ids or None. States pruned by novelty count as duplicates. As the search is
+    incomplete, failing within max_width stops it with the status limit, so a fallback search can take over. """
+    monitor = SearchMonitor(statistics, observer, limits)
+    counts = [0, 0, 0, 0, 1]
+    plan = []
+    state = task.init
+    while plan is not None and not task.goal_reached(state):
+        goal = serialized_goal(task, state) if serialized else task.goal_reached
+        steps = None
+        for k in range(1, max_width + 1):
+            steps, new_state = width_search(task, generator, state, goal, k, counts, monitor)
+            if steps is not None or monitor.reason:
+                break
+        if steps is None:
+            plan = None
+            monitor.reason = monitor.reason or 'limit'
+        else:
+            plan += steps
+            state = new_state
+    return monitor.finish(plan, *counts)
+
+
+def serialized_goal(task, state):
+    """ Returns the goal test of the states satisfying the goals satisfied by a state and more. """
+    done = ~(state ^ task.goal_value) & task.goal_mask
+
+    def goal(new_state):
+        satisfied = ~(new_state ^ task.goal_value) & task.goal_mask
+        return satisfied != done and satisfied & done == done
+
+    return goal
@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+
+import argparse
+import collections
+import concurrent.futures
+import copy
+import hashlib
+import io
+import json
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+from mapped import MappedTask, write_task
+from PDDL import PDDL_Parser
+from planner import Planner, positive_int
+from search import SearchStatistics
+
+
+class LRUCache:
+    """ Thread-safe in-memory mapping keeping the most recently used entries """
+
+    def __init__(self, max_size, evict=None):
+        """ Calls evict, if given, with each value evicted or replaced. """
+        self.max_size = max_size
+        self.evict = evict
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """ Returns the entry of the key, or None on a miss. """
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """ Stores an entry and evicts the least recently used ones beyond max_size. """
+        with self.lock:
+            evicted = []
+            if key in self.entries and self.entries[key] is not value:
+                evicted.append(self.entries[key])
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                evicted.append(self.entries.popitem(last=False)[1])
+        if self.evict:
+            for value in evicted:
+                self.evict(value)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class PlanningServer:
+    """ Long-lived planner answering JSON requests, keeping parsed domains and grounded tasks in memory """
+
+    # Request keys not passed to Planner.solve_task
+    KEYS = ['id', 'domain', 'domain_text', 'problem', 'problem_text', 'grounding']
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, workers=4, max_domains=32, max_tasks=128, grounding_workers=1):
+        """ Requests are read, parsed and grounded by a pool of threads sharing the caches, and searched by a pool
+        of as many processes, so searches run in parallel. Parsed domains are keyed by the hash of their text,
+        grounded tasks by the hashes of the domain and problem texts and the grounding, so repeated requests only
+        pay for the search. Grounded tasks are cached as files of a temporary directory, see write_task, which
+        search processes map rather than receive with each request, sharing one copy of each task. """
+        self.planner = Planner(grounding_workers=grounding_workers)
+        self.pool = concurrent.futures.ThreadPoolExecutor(workers)
+        self.solvers = concurrent.futures.ProcessPoolExecutor(workers, initializer=init_server_worker,
+                                                              initargs=(max_tasks,))
+        self.directory = tempfile.TemporaryDirectory()
+        self.domains = LRUCache(max_domains)
+        self.tasks = LRUCache(max_tasks, self.remove_task)
+
+    def close(self):
+        self.pool.shutdown()
+        self.solvers.shutdown()
+        self.directory.cleanup()
+
+    # -----------------------------------------------
+    # Handle
+    # -----------------------------------------------
+
+    def handle(self, request):
+        """ Solves a request, a dictionary with the domain and problem given either as file paths in domain and
+        problem or as PDDL text in domain_text and problem_text, the grounding and other options of
+        Planner.solve_task, such as search, heuristic or time_limit. Returns a dictionary with the id of the
+        request, its status among solved, unsolvable, limit, budget, timeout, cancelled and error, the time spent
+        in seconds, the plan as a list of strings in the format printed by run_planner and the search
+        statistics. """
+        start_time = time.time()
+        response = {'id': request.get('id'), 'status': 'error', 'time': 0, 'plan': None}
+        planner = copy.copy(self.planner)
+        planner.statistics = SearchStatistics()
+        statistics = planner.statistics
+        try:
+            options = {key: value for key, value in request.items() if key not in self.KEYS}
+            for key in ('observer', 'token'):
+                if key in options:
+                    raise ValueError('Option ' + key + ' not supported')
+            grounding = request.get('grounding', 'reachable')
+            plan, statistics = self.solve(planner, self.text(request, 'domain'), self.text(request, 'problem'),
+                                          grounding, options)
+            statistics.parse_time = planner.statistics.parse_time
+            statistics.ground_time = planner.statistics.ground_time
+            if plan is None:
+                response['status'] = statistics.status or 'unsolvable'
+            else:
+                response['status'] = 'solved'
+                response['plan'] = plan
+        except Exception as e:
+            response['error'] = str(e)
+        response['time'] = time.time() - start_time
+        response['statistics'] = statistics.to_dict()
+        return response
+
+    def solve(self, planner, domain_text, problem_text, grounding, options):
+        """ Searches the task in a search process and returns the plan and the search statistics, see
+        solve_request. A task evicted from the cache before the process maps its file is grounded again. """
+        task = self.task(planner, domain_text, problem_text, grounding)
+        try:
+            return self.solvers.submit(solve_request, task, grounding, options).result()
+        except FileNotFoundError:
+            if grounding == 'lifted' or os.path.exists(task):
+                raise
+        task = self.task(planner, domain_text, problem_text, grounding)
+        return self.solvers.submit(solve_request, task, grounding, options).result()
+
+    def text(self, request, name):
+        """ Returns the PDDL text of the domain or problem of a request. """
+        if name + '_text' in request:
+            return request[name + '_text']
+        if name in request:
+            with open(request[name]) as f:
+                return f.read()
+        raise ValueError('Request without ' + name)
+
+    # -----------------------------------------------
+    # Task
+    # -----------------------------------------------
+
+    def task(self, planner, domain_text, problem_text, grounding='reachable'):
+        """ Returns the file of the grounded task, or the parser with lifted grounding, parsing the problem over a
+        copy of the cached domain on a miss. Tasks are shared between concurrent requests, searches never modify
+        them. """
+        domain_key = hashlib.sha256(domain_text.encode()).hexdigest()
+        task_key = (domain_key, hashlib.sha256(problem_text.encode()).hexdigest(), grounding)
+        task = self.tasks.get(task_key)
+        if task is None:
+            start_time = time.perf_counter()
+            parser = self.domains.get(domain_key)
+            if parser is None:
+                parser = PDDL_Parser()
+                parser.parse_domain(io.StringIO(domain_text))
+                self.domains.put(domain_key, parser)
+            parser = copy.deepcopy(parser)
+            parser.parse_problem(io.StringIO(problem_text))
+            planner.statistics.parse_time = time.perf_counter() - start_time
+            task = parser if grounding == 'lifted' else self.write_task(planner.ground(parser, grounding))
+            self.tasks.put(task_key, task)
+        return task
+
+    def write_task(self, task):
+        """ Writes a grounded task to a new file of the temporary directory and returns its name. """
+        fd, filename = tempfile.mkstemp('.task', dir=self.directory.name)
+        os.close(fd)
+        write_task(task, filename)
+        return filename
+
+    def remove_task(self, task):
+        """ Removes the file of a task evicted from the cache, search processes having it mapped keep their copy. """
+        if isinstance(task, str) and os.path.exists(task):
+            os.remove(task)
+
+    # -----------------------------------------------
+    # Serve
+    # -----------------------------------------------
+
+    def serve(self, reader, writer):
+        """ Reads requests as JSON lines and writes each response as a JSON line as soon as it is ready, so
+        responses may come out of order and are matched by id. Returns once every request read is answered. """
+        lock = threading.Lock()
+
+        def write(response):
+            with lock:
+                writer.write(json.dumps(response) + '\n')
+                writer.flush()
+
+        futures = []
+        for line in reader:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('Request is not an object')
+            except ValueError as e:
+                write({'id': None, 'status': 'error', 'error': str(e)})
+                continue
+            futures.append(self.pool.submit(lambda request: write(self.handle(request)), request))
+        concurrent.futures.wait(futures)
+
+    def serve_socket(self, path):
+        """ Serves connections on a Unix socket at the given path until interrupted, each connection a stream of
+        JSON lines as in serve. """
+        if os.path.exists(path):
+            os.remove(path)
+        with UnixServer(path, self) as server:
+            try:
+                server.serve_forever()
+            finally:
+                os.remove(path)
+
+
+# -----------------------------------------------
+# Search worker
+# -----------------------------------------------
+
+server_worker = {}
+
+
+def init_server_worker(max_tasks):
+    server_worker.update(tasks=LRUCache(max_tasks, MappedTask.close))
+
+
+def solve_request(task, grounding, options):
+    """ Solves a task given as a file of the server, or a parser with lifted grounding, in a search process, and
+    returns the plan as a list of strings, or None, and the search statistics. """
+    planner = Planner()
+    if grounding == 'lifted':
+        plan = planner.solve_lifted(task, **options)
+    else:
+        mapped = server_worker['tasks'].get(task)
+        if mapped is None:
+            mapped = MappedTask(task)
+            server_worker['tasks'].put(task, mapped)
+        plan = planner.solve_task(mapped, **options)
+    if plan is not None:
+        plan = [' '.join([act.name] + list(act.parameters)) for act in plan]
+    return plan, planner.statistics
+
+
+# -----------------------------------------------
+# Unix socket
+# -----------------------------------------------
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, planning_server):
+        self.planning_server = planning_server
+        super().__init__(path, ConnectionHandler)
+
+
+class ConnectionHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        self.server.planning_server.serve(io.TextIOWrapper(self.rfile, 'utf-8'),
+                                          io.TextIOWrapper(self.wfile, 'utf-8', write_through=True))
+
+
+def run_server():
+    """ Interprets command-line arguments to run the planning server over
+    stdin/stdout or a Unix socket. """
+    parser = argparse.ArgumentParser(description='Long-lived planner answering JSON lines requests, keeping parsed '
+                                                 'domains and grounded tasks in memory.')
+    parser.add_argument('--socket', help='serves connections on a Unix socket at this path instead of stdin/stdout')
+    parser.add_argument('-j', '--jobs', help='number of threads serving requests and of processes searching',
+                        type=positive_int, default=4)
+    parser.add_argument('--max-domains', help='number of parsed domains kept in memory', type=positive_int,
+                        default=32)
+    parser.add_argument('--max-tasks', help='number of grounded tasks kept in memory', type=positive_int, default=128)
+    parser.add_argument('--grounding-workers', help='grounds action schemas over this many processes',
+                        type=positive_int, default=1)
+    args = parser.parse_args()
+    server = PlanningServer(args.jobs, args.max_domains, args.max_tasks, args.grounding_workers)
+    try:
+        if args.socket:
+            server.serve_socket(args.socket)
+        else:
+            server.serve(sys.stdin, sys.stdout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+# -----------------------------------------------
+# Main
+# -----------------------------------------------
+if __name__ == '__main__':
+    run_server()
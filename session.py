@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+
+import copy
+import time
+
+from grounding import Grounder
+from planner import Planner
+from search import SearchStatistics, breadth_first_search
+
+
+class PlanningSession:
+    """ Planning session solving a sequence of problems of one domain that differ by a few initial facts or goals """
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, domain, problem, grounding='reachable', planner=None, **options):
+        """ Parses and grounds the first problem. Options are passed to Planner.solve_task when solving from
+        scratch, and the limits among them also bound repairs. The statistics of the last call are kept in the
+        statistics of the planner. """
+        self.planner = planner or Planner()
+        self.grounding = grounding
+        self.options = options
+        self.planner.statistics = SearchStatistics()
+        self.parser = self.planner.parse(domain, problem)
+        self.static = Grounder(self.parser.actions, self.parser.objects, self.parser.types).static_predicates()
+        self.set_task(self.planner.ground(self.parser, grounding))
+        self.plan = None
+
+    def set_task(self, task):
+        """ Uses a newly grounded task, whose successor generator is built on first use. """
+        self.task = task
+        self.generator = None
+        self.reachable = task.init
+        for add in task.add:
+            self.reachable |= add
+        self.action_ids = {(act.name, tuple(act.parameters)): i for i, act in enumerate(task.actions)}
+
+    # -----------------------------------------------
+    # Solve
+    # -----------------------------------------------
+
+    def solve(self):
+        """ Plans out a solution of the current problem from scratch. """
+        self.planner.statistics = SearchStatistics()
+        self.plan = self.planner.solve_task(self.task, **self.options)
+        return self.plan
+
+    # -----------------------------------------------
+    # Update
+    # -----------------------------------------------
+
+    def update(self, add_init=(), remove_init=(), add_goals=(), remove_goals=(), time_limit=None):
+        """ Changes the initial state and goals of the current problem and repairs the previous plan, see repair.
+        Atoms are tuples or strings such as '(at r1 l2)', added goals are positive and removed goals are either.
+        The grounded task is kept unless the change may enable other actions, when an added fact was not reachable
+        before or a fact of a static predicate changed, and is then grounded again. """
+        start_time = time.perf_counter()
+        self.planner.statistics = SearchStatistics()
+        add_init = set(map(self.atom, add_init))
+        remove_init = set(map(self.atom, remove_init))
+        parser = self.parser
+        parser.state = parser.state.difference(remove_init).union(add_init)
+        remove_goals = set(map(self.atom, remove_goals))
+        parser.positive_goals = parser.positive_goals.difference(remove_goals).union(map(self.atom, add_goals))
+        parser.negative_goals = parser.negative_goals.difference(remove_goals)
+        if self.grounding == 'reachable' and (
+                any(atom[0] in self.static for atom in add_init | remove_init) or
+                any(atom not in self.task.atom_ids or not self.reachable >> self.task.atom_ids[atom] & 1
+                    for atom in add_init)):
+            self.set_task(self.planner.ground(parser, self.grounding))
+        else:
+            # Atoms new to the task are interned in copies, leaving the previous task as it was
+            task = copy.copy(self.task)
+            task.atoms = list(task.atoms)
+            task.atom_ids = dict(task.atom_ids)
+            task.init = task.encode(parser.state)
+            goal_pos = task.encode(parser.positive_goals)
+            task.goal_mask = goal_pos | task.encode(parser.negative_goals)
+            task.goal_value = goal_pos
+            self.task = task
+        self.plan = self.repair(self.plan or [], time_limit)
+        self.planner.statistics.search_time = time.perf_counter() - start_time - self.planner.statistics.ground_time
+        return self.plan
+
+    def atom(self, atom):
+        if isinstance(atom, str):
+            atom = atom.strip().strip('()').split()
+        return tuple(term.lower() for term in atom)
+
+    # -----------------------------------------------
+    # Repair
+    # -----------------------------------------------
+
+    def repair(self, plan, time_limit=None):
+        """ Returns a plan of the current task reusing a suffix of the given plan. The goals are regressed through
+        each suffix of the plan, giving the states from which the suffix still reaches them, and breadth-first
+        search from the initial state stops at the first state satisfying any of them. The plan is then the path
+        to that state followed by the shortest suffix it allows. The empty suffix only needs the goals, so the
+        search is complete, and a plan still valid needs no search at all. Steps after the goals are first reached
+        are dropped, but repaired plans are not necessarily shortest. """
+        task = self.task
+        statistics = self.planner.statistics
+        statistics.atoms = len(task.atoms)
+        statistics.actions = len(task.actions)
+        ids = [self.action_ids.get((act.name, tuple(act.parameters))) for act in plan]
+        conditions = self.suffix_conditions(ids)
+
+        def goal(state):
+            for _, mask, value in conditions:
+                if state & mask == value:
+                    return True
+            return False
+
+        if self.generator is None:
+            self.generator = self.planner.successor_generator(task.actions, task,
+                                                              self.options.get('generator', 'tree'))
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        limits = self.planner.search_limits(self.options.get('max_nodes'), self.options.get('max_memory'),
+                                            self.options.get('max_expansions'), deadline)
+        prefix = breadth_first_search(task.init, self.generator.successors, goal, statistics, None, limits)
+        if prefix is None:
+            return None
+        state = task.init
+        for i in prefix:
+            state = task.apply(state, i)
+        k = next(k for k, mask, value in conditions if state & mask == value)
+        return task.plan(self.trim(prefix + ids[k:]))
+
+    def suffix_conditions(self, ids):
+        """ Returns the conditions (k, mask, value) on states from which the suffix of the plan of action ids
+        starting at step k reaches the goals, shortest suffix first, stopping at the first step that no longer
+        applies or is not an action of the task. """
+        task = self.task
+        conditions = [(len(ids), task.goal_mask, task.goal_value)]
+        mask, value = task.goal_mask, task.goal_value
+        for k in range(len(ids) - 1, -1, -1):
+            if ids[k] is None:
+                break
+            condition = self.regress(mask, value, ids[k])
+            if condition is None:
+                break
+            mask, value = condition
+            conditions.append((k, mask, value))
+        return conditions
+
+    def trim(self, plan):
+        """ Returns the plan of action ids without the steps after the goals are first reached. """
+        state = self.task.init
+        for length, i in enumerate(plan):
+            if self.task.goal_reached(state):
+                return plan[:length]
+            state = self.task.apply(state, i)
+        return plan
+
+    def regress(self, mask, value, i):
+        """ Returns the condition (mask, value) on states where the i-th action applies and leads to a state
+        satisfying the given condition, or None when there is none. """
+        task = self.task
+        add = task.add[i]
+        delete = ~task.keep[i] & ~add
+        if value & delete or mask & ~value & add:
+            return None
+        mask &= ~(add | delete)
+        value &= mask
+        if mask & task.pre_mask[i] & (value ^ task.pre_value[i]):
+            return None
+        return mask | task.pre_mask[i], value | task.pre_value[i]
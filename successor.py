@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import functools
+
+GENERATORS = ['tree', 'code']
+
+
+class SuccessorGenerator:
+    """ Decision tree over preconditions returning the ground actions applicable in a state """
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, actions, task=None):
+        """ Builds the tree once after grounding. Each node branches on one atom and only the subtree matching the
+        state is visited. Atoms changed by some effect are tested before static ones, so the upper levels split
+        actions on facts that actually vary between states. States are frozensets of atoms, or bitsets of the given
+        compiled task, whose atom ids are then read from the task rather than from the actions. """
+        self.actions = actions
+        self.task = task
+        if task is None:
+            positive = [act.positive_preconditions for act in actions]
+            negative = [act.negative_preconditions for act in actions]
+            effects = [act.add_effects | act.del_effects for act in actions]
+        else:
+            positive = [task.positive_preconditions(i) for i in range(len(actions))]
+            negative = [task.negative_preconditions(i) for i in range(len(actions))]
+            effects = [task.add_effects(i) + task.del_effects(i) for i in range(len(actions))]
+        fluents = set()
+        for atoms in effects:
+            fluents.update(atoms)
+        entries = []
+        for i in range(len(actions)):
+            conditions = [(atom not in fluents, atom, True) for atom in positive[i]]
+            conditions += [(atom not in fluents, atom, False) for atom in negative[i]]
+            conditions.sort()
+            entries.append(([(atom, value) for _, atom, value in conditions], i))
+        self.root = self.build(entries, 0)
+
+    # -----------------------------------------------
+    # Build
+    # -----------------------------------------------
+
+    def build(self, entries, depth):
+        """ Returns a node (leaves, branches), where leaves are action ids with all conditions tested and each
+        branch is (key, node if atom holds, node otherwise). """
+        leaves = []
+        groups = {}
+        for conditions, i in entries:
+            if depth == len(conditions):
+                leaves.append(i)
+            else:
+                atom, value = conditions[depth]
+                groups.setdefault(atom, ([], []))[0 if value else 1].append((conditions, i))
+        branches = []
+        for atom, (on, off) in groups.items():
+            branches.append((self.key(atom), self.build(on, depth + 1) if on else None,
+                             self.build(off, depth + 1) if off else None))
+        return leaves, branches
+
+    def key(self, atom):
+        return atom if self.task is None else 1 << atom
+
+    # -----------------------------------------------
+    # Applicable
+    # -----------------------------------------------
+
+    def applicable(self, state, node=None):
+        """ Returns the ids of the actions applicable in the given state, in grounding order, or only those below the
+        given node of the tree. """
+        ids = []
+        stack = [self.root if node is None else node]
+        if self.task is None:
+            while stack:
+                leaves, branches = stack.pop()
+                ids += leaves
+                for key, on, off in branches:
+                    child = on if key in state else off
+                    if child is not None:
+                        stack.append(child)
+        else:
+            while stack:
+                leaves, branches = stack.pop()
+                ids += leaves
+                for key, on, off in branches:
+                    child = on if state & key else off
+                    if child is not None:
+                        stack.append(child)
+        ids.sort()
+        return ids
+
+    # -----------------------------------------------
+    # Successors
+    # -----------------------------------------------
+
+    def successors(self, state):
+        """ Returns the pairs (action id, successor state) of the given state, in grounding order. """
+        if self.task is None:
+            return [(i, state.difference(self.actions[i].del_effects).union(self.actions[i].add_effects))
+                    for i in self.applicable(state)]
+        task = self.task
+        return [(i, state & task.keep[i] | task.add[i]) for i in self.applicable(state)]
+
+    def apply(self, state, i):
+        """ Returns the successor of the given state by the i-th action. """
+        if self.task is None:
+            return state.difference(self.actions[i].del_effects).union(self.actions[i].add_effects)
+        return state & self.task.keep[i] | self.task.add[i]
+
+
+class FiniteDomainSuccessorGenerator(SuccessorGenerator):
+    """ Decision tree over the variable values of a FiniteDomainTask """
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, task):
+        """ Each node branches on the value of one variable, tested as a (mask, value) pair of its field, in the
+        order of the variables. """
+        self.actions = task.actions
+        self.task = task
+        self.root = self.build([([(condition, True) for condition in task.condition_masks(i)], i)
+                                for i in range(len(task.actions))], 0)
+
+    def key(self, condition):
+        return condition
+
+    # -----------------------------------------------
+    # Applicable
+    # -----------------------------------------------
+
+    def applicable(self, state, node=None):
+        """ Returns the ids of the actions applicable in the given packed state, in grounding order. """
+        ids = []
+        stack = [self.root if node is None else node]
+        while stack:
+            leaves, branches = stack.pop()
+            ids += leaves
+            for (mask, value), on, _ in branches:
+                if on is not None and state & mask == value:
+                    stack.append(on)
+        ids.sort()
+        return ids
+
+
+class CodeSuccessorGenerator:
+    """ Successor generator running the decision tree of another one as generated Python code """
+
+    # Nesting levels of generated if statements, deeper subtrees are walked, the compiler allows 100 indents
+    MAX_DEPTH = 50
+    # Bitsets of more bits are named constants rather than literals in the generated code
+    MAX_LITERAL = 64
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, generator):
+        """ Translates the tree of a SuccessorGenerator, or FiniteDomainSuccessorGenerator, to nested if statements
+        testing each atom or mask of the tree, with the successor of each leaf action built inline from its masks.
+        The source of the applicable and successors functions is compiled once, with compiled code cached by
+        source so searches of the same task reuse it, and the functions are called directly by searches. """
+        self.generator = generator
+        self.actions = generator.actions
+        self.task = generator.task
+        self.constants = {}
+        lines = ['def applicable(state):', '    ids = []']
+        self.emit(generator.root, 1, lines, lambda i: 'ids.append(%s)' % i)
+        lines += ['    ids.sort()', '    return ids', '', 'def successors(state):', '    result = []']
+        self.emit(generator.root, 1, lines, self.successor)
+        lines += ['    result.sort()', '    return result']
+        self.source = '\n'.join(lines) + '\n'
+        namespace = dict(self.constants, walk=self.walk, apply=generator.apply)
+        exec(compile_source(self.source), namespace)
+        self.applicable = namespace['applicable']
+        self.successors = namespace['successors']
+        self.apply = generator.apply
+
+    # -----------------------------------------------
+    # Emit
+    # -----------------------------------------------
+
+    def emit(self, node, depth, lines, statement):
+        """ Appends the lines visiting a node at the given indentation depth, statement giving the line of an action
+        id in a leaf, an int or the name of a variable. """
+        indent = '    ' * depth
+        if depth > self.MAX_DEPTH:
+            lines.append(indent + 'for i in walk(%s, state):' % self.constant(node))
+            lines.append(indent + '    ' + statement('i'))
+            return
+        leaves, branches = node
+        for i in leaves:
+            lines.append(indent + statement(i))
+        for key, on, off in branches:
+            if on is not None:
+                lines.append(indent + 'if ' + self.test(key) + ':')
+                self.emit(on, depth + 1, lines, statement)
+                if off is not None:
+                    lines.append(indent + 'else:')
+                    self.emit(off, depth + 1, lines, statement)
+            elif off is not None:
+                lines.append(indent + 'if not ' + self.test(key) + ':')
+                self.emit(off, depth + 1, lines, statement)
+
+    def test(self, key):
+        """ Returns the condition of a branch on the state, a packed field for finite-domain tasks, a bitset
+        otherwise or a frozenset of atoms without task. """
+        if isinstance(self.generator, FiniteDomainSuccessorGenerator):
+            return 'state & %s == %s' % (self.literal(key[0]), self.literal(key[1]))
+        if self.task is None:
+            return '%s in state' % self.constant(key)
+        return 'state & ' + self.literal(key)
+
+    def successor(self, i):
+        if not isinstance(i, int):
+            return 'result.append((%s, apply(state, %s)))' % (i, i)
+        if self.task is None:
+            act = self.actions[i]
+            return 'result.append((%d, state.difference(%s).union(%s)))' % (i, self.constant(act.del_effects),
+                                                                            self.constant(act.add_effects))
+        return 'result.append((%d, state & %s | %s))' % (i, self.literal(self.task.keep[i]),
+                                                         self.literal(self.task.add[i]))
+
+    def literal(self, bits):
+        if bits.bit_length() > self.MAX_LITERAL:
+            return self.constant(bits)
+        return str(bits)
+
+    def constant(self, value):
+        """ Returns the name of a constant of the generated code holding the given value. """
+        name = 'c%d' % len(self.constants)
+        self.constants[name] = value
+        return name
+
+    def walk(self, node, state):
+        return self.generator.applicable(state, node)
+
+
+@functools.lru_cache(maxsize=16)
+def compile_source(source):
+    return compile(source, '<successors>', 'exec')
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+
+class ObjectSymmetries:
+    """ Classes of interchangeable objects of a grounded task and canonical forms of states under them """
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, task, compiled=True):
+        """ Finds the classes of objects whose permutations map the initial state, the goals and the ground actions
+        to themselves, see find_classes. States are bitsets of the task when compiled, frozensets of atoms
+        otherwise. """
+        self.task = task
+        self.compiled = compiled
+        self.classes = self.find_classes()
+        tokens = {obj: '?' + str(k) for k, objs in enumerate(self.classes) for obj in objs}
+        # Atoms mentioning symmetric objects, with the features they give to each of them
+        self.movable = 0
+        self.features = {}
+        for a, atom in enumerate(task.atoms):
+            positions = [(pos, obj) for pos, obj in enumerate(atom[1:]) if obj in tokens]
+            if positions:
+                self.movable |= 1 << a
+                abstract = (atom[0],) + tuple(tokens.get(obj, obj) for obj in atom[1:])
+                self.features[a] = [(obj, (abstract, pos)) for pos, obj in positions]
+
+    # -----------------------------------------------
+    # Find classes
+    # -----------------------------------------------
+
+    def find_classes(self):
+        """ Returns the sorted lists of at least two objects where every transposition of two objects is a
+        symmetry of the task. Only objects occurring with the same predicates and actions at the same positions
+        are compared, and an object joins a class when its transposition with any member is a symmetry, as the
+        transpositions then generate every permutation of the class. """
+        task = self.task
+        init = task.decode(task.init)
+        goals = (task.decode(task.goal_value), task.decode(task.goal_mask & ~task.goal_value))
+        actions, profiles = self.occurrences(init, goals)
+        signatures = set(signature for mentioned in actions.values() for signature in mentioned)
+        candidates = {}
+        for obj, profile in profiles.items():
+            candidates.setdefault(tuple(sorted(profile)), []).append(obj)
+        classes = []
+        for objs in candidates.values():
+            found = []
+            for obj in sorted(objs):
+                for members in found:
+                    if self.transposition(members[0], obj, init, goals, actions, signatures):
+                        members.append(obj)
+                        break
+                else:
+                    found.append([obj])
+            classes += [members for members in found if len(members) > 1]
+        return sorted(classes)
+
+    def occurrences(self, init, goals):
+        """ Returns the signatures of the ground actions mentioning each object, and the profile of each object, the
+        predicates and actions it occurs in with its positions. """
+        actions = {}
+        profiles = {}
+        for act in self.task.actions:
+            signature = (act.name, tuple(act.parameters), act.positive_preconditions, act.negative_preconditions,
+                         act.add_effects, act.del_effects)
+            mentioned = set(act.parameters)
+            for group in signature[2:]:
+                for atom in group:
+                    mentioned.update(atom[1:])
+            for obj in mentioned:
+                actions.setdefault(obj, []).append(signature)
+            for pos, obj in enumerate(act.parameters):
+                profiles.setdefault(obj, []).append((act.name, pos))
+        for group in (init,) + goals:
+            for atom in group:
+                for pos, obj in enumerate(atom[1:]):
+                    profiles.setdefault(obj, []).append((atom[0], pos))
+        return actions, profiles
+
+    def transposition(self, a, b, init, goals, actions, signatures):
+        """ Tests if swapping objects a and b maps the initial state, the goals and the ground actions to
+        themselves. """
+        swap = {a: b, b: a}
+
+        def rename(atoms):
+            return frozenset((atom[0],) + tuple(swap.get(obj, obj) for obj in atom[1:]) for atom in atoms)
+
+        if rename(init) != init or any(rename(group) != group for group in goals):
+            return False
+        for name, parameters, *groups in actions.get(a, []) + actions.get(b, []):
+            image = (name, tuple(swap.get(obj, obj) for obj in parameters)) + tuple(rename(group) for group in groups)
+            if image not in signatures:
+                return False
+        return True
+
+    # -----------------------------------------------
+    # Canonical
+    # -----------------------------------------------
+
+    def canonical(self, state):
+        """ Returns the bitset of a state symmetric to the given one, used as its key in visited sets. The
+        objects of each class are ranked by the atoms they occur in and renamed to the class members in order, so
+        states differing by a permutation of objects mostly share a key, and two states only share a key when they
+        are symmetric. """
+        task = self.task
+        if not self.compiled:
+            state = task.encode(state)
+        movable = state & self.movable
+        if not movable:
+            return state
+        ids = task.bits(movable)
+        signatures = {}
+        for a in ids:
+            for obj, feature in self.features[a]:
+                signatures.setdefault(obj, []).append(feature)
+        mapping = {}
+        for objs in self.classes:
+            ranked = sorted(objs, key=lambda obj: (sorted(signatures.get(obj, ())), obj))
+            for old, new in zip(ranked, objs):
+                if old != new:
+                    mapping[old] = new
+        if not mapping:
+            return state
+        key = state & ~self.movable
+        atoms = task.atoms
+        atom_ids = task.atom_ids
+        for a in ids:
+            atom = atoms[a]
+            key |= 1 << atom_ids[(atom[0],) + tuple(mapping.get(obj, obj) for obj in atom[1:])]
+        return key
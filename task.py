@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+
+class Task:
+    """ Grounded planning task compiled to integer atoms and bitset states """
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, state, positive_goals, negative_goals, actions):
+        """ Interns every ground atom to a dense integer id. States become Python ints where bit i is set when
+        atom i holds, so applicability and effects are mask operations. """
+        self.atoms = []
+        self.atom_ids = {}
+        self.actions = actions
+        self.init = self.encode(state)
+        goal_pos = self.encode(positive_goals)
+        goal_neg = self.encode(negative_goals)
+        self.goal_mask = goal_pos | goal_neg
+        self.goal_value = goal_pos
+        self.pre_mask = []
+        self.pre_value = []
+        self.keep = []
+        self.add = []
+        for act in actions:
+            pre_pos = self.encode(act.positive_preconditions)
+            pre_neg = self.encode(act.negative_preconditions)
+            self.pre_mask.append(pre_pos | pre_neg)
+            self.pre_value.append(pre_pos)
+            self.keep.append(~self.encode(act.del_effects))
+            self.add.append(self.encode(act.add_effects))
+
+    # -----------------------------------------------
+    # Encode
+    # -----------------------------------------------
+
+    def intern(self, atom):
+        """ Returns the id of a ground atom, assigning the next free id on first sight. """
+        i = self.atom_ids.get(atom)
+        if i is None:
+            i = self.atom_ids[atom] = len(self.atoms)
+            self.atoms.append(atom)
+        return i
+
+    def encode(self, atoms):
+        """ Translates a collection of ground atoms to a bitset. """
+        bits = 0
+        for atom in atoms:
+            bits |= 1 << self.intern(atom)
+        return bits
+
+    def decode(self, state):
+        """ Translates a bitset back to a frozenset of ground atoms. """
+        return frozenset(self.atoms[i] for i in self.bits(state))
+
+    def bits(self, bits):
+        """ Returns the ids of the atoms set in a bitset, in increasing order. """
+        ids = []
+        while bits:
+            low = bits & -bits
+            ids.append(low.bit_length() - 1)
+            bits ^= low
+        return ids
+
+    # -----------------------------------------------
+    # Atom lists
+    # -----------------------------------------------
+
+    def positive_preconditions(self, i):
+        return self.bits(self.pre_value[i])
+
+    def negative_preconditions(self, i):
+        return self.bits(self.pre_mask[i] & ~self.pre_value[i])
+
+    def add_effects(self, i):
+        return self.bits(self.add[i])
+
+    def del_effects(self, i):
+        return self.bits(~self.keep[i])
+
+    def positive_goals(self):
+        return self.bits(self.goal_value)
+
+    # -----------------------------------------------
+    # Applicable
+    # -----------------------------------------------
+
+    def applicable(self, state, i):
+        """ Tests if the i-th action can be applied to the given state. """
+        return state & self.pre_mask[i] == self.pre_value[i]
+
+    # -----------------------------------------------
+    # Apply
+    # -----------------------------------------------
+
+    def apply(self, state, i):
+        """ Applies the effects of the i-th action, add effects winning over delete effects. """
+        return state & self.keep[i] | self.add[i]
+
+    # -----------------------------------------------
+    # Goal
+    # -----------------------------------------------
+
+    def goal_reached(self, state):
+        return state & self.goal_mask == self.goal_value
+
+    # -----------------------------------------------
+    # Plan
+    # -----------------------------------------------
+
+    def plan(self, indices):
+        """ Decodes a sequence of action ids to the grounded Action objects. """
+        return [self.actions[i] for i in indices]
+
+
+class FiniteDomainTask:
+    """ Grounded planning task compiled to finite-domain variables packed in integer states """
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, task, groups):
+        """ Each mutex group of the Task, see MutexGroups, becomes a variable whose value is the index of its true
+        atom, or the group size when none holds, and every other fluent atom a binary variable. Values are packed
+        in bit fields of an int, so a state takes about log2 of the group size bits per group rather than one bit
+        per atom. Static atoms are dropped, along with the actions whose static preconditions never hold. Actions
+        and states otherwise follow Task, with masks over the packed fields. Facts are the (variable, value) pairs,
+        listed in atoms with their atom, or None for values where no atom of the group holds. """
+        every = (1 << len(task.atoms)) - 1
+        fluents = 0
+        for i in range(len(task.actions)):
+            fluents |= task.add[i] | ~task.keep[i] & every
+        self.task = task
+        self.static = every & ~fluents
+        self.static_atoms = task.decode(task.init & self.static)
+        self.variables, self.variable_of = self.find_variables(groups, fluents)
+        self.actions, self.conditions, self.effects, empty = self.translate_actions()
+        self.layout(empty)
+        self.pre_mask = []
+        self.pre_value = []
+        self.keep = []
+        self.add = []
+        for condition, effect in zip(self.conditions, self.effects):
+            mask, value = self.pack(condition)
+            self.pre_mask.append(mask)
+            self.pre_value.append(value)
+            mask, value = self.pack(effect)
+            self.keep.append(~mask)
+            self.add.append(value)
+        self.init = self.encode(task.decode(task.init))
+        static = self.static & task.goal_mask
+        self.goals = self.values(task.goal_value & ~static, task.goal_mask & ~task.goal_value & ~static)
+        if self.goals is None or task.init & static != task.goal_value & static:
+            # Goals which never hold, no state matches a value outside the mask
+            self.goals = {}
+            self.goal_mask = 0
+            self.goal_value = 1
+        else:
+            self.goal_mask, self.goal_value = self.pack(self.goals)
+
+    def find_variables(self, groups, fluents):
+        """ Returns the variables, the mutex groups followed by a binary variable for each other fluent atom, and
+        the dictionary from each of their atoms to its variable and value. """
+        grouped = 0
+        variables = []
+        for group in groups:
+            variables.append(list(group))
+            for a in group:
+                grouped |= 1 << a
+        variables += [[a] for a in self.task.bits(fluents & ~grouped)]
+        variable_of = {}
+        for x, group in enumerate(variables):
+            for value, a in enumerate(group):
+                variable_of[a] = (x, value)
+        return variables, variable_of
+
+    def translate_actions(self):
+        """ Returns the actions of the Task kept, their preconditions and effects as dictionaries of variable
+        values, value None leaving the group empty, and the set of variables that may be left empty. """
+        task = self.task
+        conditions = []
+        effects = []
+        actions = []
+        empty = set(x for x, group in enumerate(self.variables) if len(group) == 1 or not task.init & self.mask(group))
+        for i, act in enumerate(task.actions):
+            static = self.static & task.pre_mask[i]
+            condition = self.values(task.pre_value[i] & ~static, task.pre_mask[i] & ~task.pre_value[i] & ~static)
+            if condition is None or task.init & static != task.pre_value[i] & static:
+                continue
+            effect = {}
+            for a in task.del_effects(i):
+                x, value = self.variable_of[a]
+                if len(self.variables[x]) == 1 or condition.get(x) == value:
+                    effect[x] = None
+                    empty.add(x)
+            for a in task.add_effects(i):
+                effect[self.variable_of[a][0]] = self.variable_of[a][1]
+            actions.append(act)
+            conditions.append(condition)
+            effects.append(effect)
+        return actions, conditions, effects, empty
+
+    def layout(self, empty):
+        """ Lays out the bit field of each variable, with one more value for those that may be left empty, and
+        lists its facts in atoms. """
+        self.offsets = []
+        self.widths = []
+        self.facts = []
+        self.atoms = []
+        offset = 0
+        for x, group in enumerate(self.variables):
+            size = len(group) + (x in empty)
+            self.offsets.append(offset)
+            self.widths.append(max(1, (size - 1).bit_length()))
+            offset += self.widths[x]
+            self.facts.append(len(self.atoms))
+            self.atoms += [self.task.atoms[a] for a in group] + [None] * (x in empty)
+
+    def mask(self, group):
+        bits = 0
+        for a in group:
+            bits |= 1 << a
+        return bits
+
+    def values(self, positive, negative):
+        """ Translates positive and negative atoms of the Task to a dictionary of variable values, or None when
+        they contradict each other. """
+        values = {}
+        for a in self.task.bits(positive):
+            x, value = self.variable_of[a]
+            if values.setdefault(x, value) != value:
+                return None
+        for a in self.task.bits(negative):
+            # Atoms of negative conditions are left out of groups, their variables are binary
+            x, _ = self.variable_of[a]
+            if values.setdefault(x, None) is not None:
+                return None
+        return values
+
+    def pack(self, values):
+        """ Returns the mask of the fields of the given variables and their packed values. """
+        mask = 0
+        bits = 0
+        for x, value in values.items():
+            if value is None:
+                value = len(self.variables[x])
+            mask |= ((1 << self.widths[x]) - 1) << self.offsets[x]
+            bits |= value << self.offsets[x]
+        return mask, bits
+
+    # -----------------------------------------------
+    # Encode
+    # -----------------------------------------------
+
+    def encode(self, atoms):
+        """ Translates a collection of ground atoms, holding in a state, to a packed state. """
+        values = dict.fromkeys(range(len(self.variables)))
+        for atom in atoms:
+            a = self.task.atom_ids.get(atom)
+            if a in self.variable_of:
+                x, value = self.variable_of[a]
+                values[x] = value
+        return self.pack(values)[1]
+
+    def decode(self, state):
+        """ Translates a packed state back to a frozenset of ground atoms, static ones included. """
+        return self.static_atoms.union(self.atoms[fact] for fact in self.bits(state) if self.atoms[fact] is not None)
+
+    def bits(self, state):
+        """ Returns the facts holding in a packed state, one for each variable. """
+        return [self.facts[x] + (state >> self.offsets[x] & (1 << self.widths[x]) - 1)
+                for x in range(len(self.variables))]
+
+    # -----------------------------------------------
+    # Fact lists
+    # -----------------------------------------------
+
+    def fact(self, x, value):
+        return self.facts[x] + (len(self.variables[x]) if value is None else value)
+
+    def positive_preconditions(self, i):
+        return [self.fact(x, value) for x, value in self.conditions[i].items()]
+
+    def add_effects(self, i):
+        return [self.fact(x, value) for x, value in self.effects[i].items()]
+
+    def positive_goals(self):
+        return [self.fact(x, value) for x, value in self.goals.items()]
+
+    def condition_masks(self, i):
+        """ Returns the preconditions of the i-th action as (mask, value) pairs over single fields. """
+        return [self.pack({x: value}) for x, value in sorted(self.conditions[i].items())]
+
+    # -----------------------------------------------
+    # Applicable
+    # -----------------------------------------------
+
+    def applicable(self, state, i):
+        return state & self.pre_mask[i] == self.pre_value[i]
+
+    # -----------------------------------------------
+    # Apply
+    # -----------------------------------------------
+
+    def apply(self, state, i):
+        return state & self.keep[i] | self.add[i]
+
+    # -----------------------------------------------
+    # Goal
+    # -----------------------------------------------
+
+    def goal_reached(self, state):
+        return state & self.goal_mask == self.goal_value
+
+    # -----------------------------------------------
+    # Plan
+    # -----------------------------------------------
+
+    def plan(self, indices):
+        return [self.actions[i] for i in indices]
@@ -16,6 +16,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/> """
 
 
+import io
 import unittest
 
 from action import Action
@@ -57,6 +58,19 @@ class Test_PDDL(unittest.TestCase):
                           [':goal', ['and', ['dinner'], ['present'], ['not', ['garbage']]]]]
                          )
 
+    def test_read_tokens_chunks(self):
+        parser = PDDL_Parser()
+        text = '; header\n(define (Problem pb1) ; comment (with parentheses)\n  (:init (at-robot r1)))'
+        expected = ['define', ['problem', 'pb1'], [':init', ['at-robot', 'r1']]]
+        for size in [1, 2, 3, 7, 1 << 16]:
+            parser.CHUNK_SIZE = size
+            self.assertEqual(parser.read_tokens(io.StringIO(text)), expected)
+        with open('examples/dwr/dwr.pddl') as f:
+            self.assertEqual(parser.read_tokens(f), PDDL_Parser().scan_tokens('examples/dwr/dwr.pddl'))
+        with open('examples/dwr/dwr.pddl') as f:
+            text = f.read()
+        self.assertEqual(parser.scan_tokens(io.StringIO(text)), PDDL_Parser().scan_tokens('examples/dwr/dwr.pddl'))
+
     # -----------------------------------------------
     # Test parse domain
     # -----------------------------------------------
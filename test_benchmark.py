@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import json
+import tempfile
+import unittest
+
+from benchmark import EXAMPLES, compare, generate_instances, measure, parse_sizes
+
+
+class Test_Benchmark(unittest.TestCase):
+
+    # -----------------------------------------------
+    # Test generators
+    # -----------------------------------------------
+
+    def test_generate_instances(self):
+        sizes = parse_sizes(['blocksworld=4', 'n_puzzle=3', 'tsp=5', 'dwr=2'])
+        self.assertEqual(sizes, {'blocksworld': [4], 'n_puzzle': [3], 'tsp': [5], 'dwr': [2]})
+        with tempfile.TemporaryDirectory() as directory:
+            for name, domain, problem in generate_instances(directory, sizes):
+                result = measure(name, domain, problem, {'search': 'gbfs'})
+                self.assertEqual(result['status'], 'solved', name)
+                self.assertGreater(result['expanded'], 0)
+
+    # -----------------------------------------------
+    # Test compare
+    # -----------------------------------------------
+
+    def test_compare(self):
+        old = {'name': 'tsp-5', 'status': 'solved', 'plan_length': 5, 'parse': 0.1, 'ground': 0.1, 'search': 1.0}
+        new = dict(old, search=2.0, ground=0.105)
+        self.assertEqual(compare([old], {'results': [old]}), [])
+        self.assertEqual(compare([new], {'results': [old]}), ['tsp-5 search took 2.0000s, baseline 1.0000s'])
+        self.assertEqual(compare([dict(old, plan_length=6)], {'results': [old]}),
+                         ['tsp-5 plan_length changed from 5 to 6'])
+
+    def test_baseline(self):
+        # make bench compares against the committed baseline, which must cover the default suite
+        with open('bench_baseline.json') as f:
+            baseline = json.load(f)
+        names = [result['name'] for result in baseline['results']]
+        self.assertEqual(names[:len(EXAMPLES)], [name for name, _, _ in EXAMPLES])
+        self.assertEqual(names[len(EXAMPLES):], ['blocksworld-6', 'blocksworld-8', 'n_puzzle-3', 'tsp-6', 'tsp-8',
+                                                 'dwr-2', 'dwr-3'])
+        self.assertEqual(compare(baseline['results'], baseline), [])
+
+
+# -----------------------------------------------
+# Main
+# -----------------------------------------------
+if __name__ == '__main__':
+    unittest.main()
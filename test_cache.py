@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import os
+import tempfile
+import time
+import unittest
+
+from cache import TaskCache
+from planner import Planner
+
+
+class Test_Cache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.directory = self.temp.name
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    # -----------------------------------------------
+    # Test planner with cache
+    # -----------------------------------------------
+
+    def test_solve_cached(self):
+        domain, problem = 'examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'
+        expected = Planner().solve(domain, problem)
+        planner = Planner(self.directory)
+        self.assertEqual(planner.solve(domain, problem), expected)
+        entries = sorted(name.split('-')[0] for name in os.listdir(planner.cache.directory))
+        self.assertEqual(entries, ['domain', 'task'])
+        self.assertEqual(Planner(self.directory).solve(domain, problem), expected)
+
+    def test_solve_batch_cached(self):
+        domain = 'examples/blocksworld/blocksworld.pddl'
+        problems = ['examples/blocksworld/pb1.pddl', 'examples/blocksworld/pb2.pddl']
+        planner = Planner(self.directory, grounding_workers=2)
+        for result in planner.solve_batch(domain, problems, 2):
+            self.assertEqual(result['status'], 'solved')
+        entries = sorted(name.split('-')[0] for name in os.listdir(planner.cache.directory))
+        self.assertEqual(entries, ['task', 'task'])
+
+    # -----------------------------------------------
+    # Test load and store
+    # -----------------------------------------------
+
+    def test_load_store(self):
+        cache = TaskCache(self.directory)
+        self.assertIsNone(cache.load('task', 'k'))
+        cache.store('task', 'k', {'atoms': [('at', 'r1', 'l1')]})
+        self.assertEqual(cache.load('task', 'k'), {'atoms': [('at', 'r1', 'l1')]})
+        with open(cache.path('task', 'k'), 'wb') as f:
+            f.write(b'corrupted')
+        self.assertIsNone(cache.load('task', 'k'))
+        self.assertFalse(os.path.exists(cache.path('task', 'k')))
+
+    def test_evict(self):
+        cache = TaskCache(self.directory, max_size=3500)
+        now = time.time()
+        for age, key in [(30, 'a'), (20, 'b'), (10, 'c')]:
+            cache.store('task', key, os.urandom(1000))
+            os.utime(cache.path('task', key), (now - age, now - age))
+        cache.load('task', 'a')
+        cache.store('task', 'd', os.urandom(1000))
+        self.assertEqual(sorted(os.listdir(cache.directory)), ['task-a', 'task-c', 'task-d'])
+
+    def test_version(self):
+        stale = os.path.join(self.directory, 'v-0000000000000000')
+        os.makedirs(stale)
+        other = os.path.join(self.directory, 'other')
+        os.makedirs(other)
+        cache = TaskCache(self.directory)
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(other))
+        self.assertTrue(os.path.isdir(cache.directory))
+
+
+# -----------------------------------------------
+# Main
+# -----------------------------------------------
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import concurrent.futures
+import os
+import tempfile
+import unittest
+
+from mapped import MappedTask, write_task
+from planner import Planner
+
+
+def solve_mapped(filename):
+    task = MappedTask(filename)
+    try:
+        return [(act.name, act.parameters) for act in Planner().solve_task(task)]
+    finally:
+        task.close()
+
+
+class Test_MappedTask(unittest.TestCase):
+
+    def setUp(self):
+        self.task = Planner().prepare('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl')
+        self.temp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.temp.name, 'dwr.task')
+        write_task(self.task, self.filename)
+        self.mapped = MappedTask(self.filename)
+
+    def tearDown(self):
+        self.mapped.close()
+        self.temp.cleanup()
+
+    # -----------------------------------------------
+    # Test write
+    # -----------------------------------------------
+
+    def test_round_trip(self):
+        task = self.task
+        mapped = self.mapped
+        self.assertEqual(list(mapped.atoms), task.atoms)
+        self.assertEqual(mapped.atom_ids, task.atom_ids)
+        self.assertEqual((mapped.init, mapped.goal_mask, mapped.goal_value),
+                         (task.init, task.goal_mask, task.goal_value))
+        for i in range(len(task.actions)):
+            self.assertEqual(mapped.pre_mask[i], task.pre_mask[i])
+            self.assertEqual(mapped.pre_value[i], task.pre_value[i])
+            self.assertEqual(mapped.keep[i], task.keep[i])
+            self.assertEqual(mapped.add[i], task.add[i])
+            self.assertEqual(mapped.negative_preconditions(i), task.negative_preconditions(i))
+            self.assertEqual(mapped.del_effects(i), task.del_effects(i))
+        self.assertEqual(list(mapped.actions), task.actions)
+        self.assertEqual(mapped.positive_goals(), task.positive_goals())
+        self.assertEqual(mapped.encode(task.decode(task.init)), task.init)
+
+    def test_parameterless_actions(self):
+        task = Planner().prepare('examples/dinner/dinner.pddl', 'examples/dinner/pb1.pddl')
+        write_task(task, self.filename + '-dinner')
+        mapped = MappedTask(self.filename + '-dinner')
+        self.assertEqual(list(mapped.actions), task.actions)
+        mapped.close()
+
+    def test_invalid_file(self):
+        with open(self.filename + '-invalid', 'wb') as f:
+            f.write(b'\0' * 256)
+        with self.assertRaises(ValueError):
+            MappedTask(self.filename + '-invalid')
+
+    # -----------------------------------------------
+    # Test solve
+    # -----------------------------------------------
+
+    def test_solve(self):
+        for search in ['bfs', 'astar', 'gbfs']:
+            self.assertEqual(Planner().solve_task(self.mapped, search=search),
+                             Planner().solve_task(self.task, search=search))
+        planner = Planner()
+        planner.solve_task(self.mapped, pruning='stubborn')
+        self.assertEqual(planner.statistics.status, 'solved')
+
+    def test_workers(self):
+        expected = [(act.name, act.parameters) for act in Planner().solve_task(self.task)]
+        with concurrent.futures.ProcessPoolExecutor(2) as pool:
+            self.assertEqual(list(pool.map(solve_mapped, [self.filename] * 2)), [expected] * 2)
+
+
+# -----------------------------------------------
+# Main
+# -----------------------------------------------
+if __name__ == '__main__':
+    unittest.main()
@@ -16,14 +16,32 @@ See the GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/> """
 
+import asyncio
+import tempfile
 import unittest
 
 from action import Action
-from planner import Planner
+from grounding import Grounder, read_facts, write_facts
+from parallel import HashDistributedSearch
+from PDDL import PDDL_Parser
+from planner import Planner, expand_problems
+from search import CancellationToken, SearchObserver, SearchStatistics, current_memory
+from task import Task
 
 
 class Test_Planner(unittest.TestCase):
 
+    def assertValidPlan(self, domain, problem, plan):
+        planner = Planner()
+        parser = PDDL_Parser()
+        parser.parse_domain(domain)
+        parser.parse_problem(problem)
+        state = parser.state
+        for act in plan:
+            self.assertTrue(planner.applicable(state, act.positive_preconditions, act.negative_preconditions))
+            state = planner.apply(state, act.add_effects, act.del_effects)
+        self.assertTrue(planner.applicable(state, parser.positive_goals, parser.negative_goals))
+
     # -----------------------------------------------
     # Test solve
     # -----------------------------------------------
@@ -38,6 +56,359 @@ class Test_Planner(unittest.TestCase):
                          ]
                          )
 
+    def test_solve_dinner_compiled(self):
+        planner = Planner()
+        self.assertEqual(planner.solve('examples/dinner/dinner.pddl', 'examples/dinner/pb1.pddl', compiled=True),
+                         planner.solve('examples/dinner/dinner.pddl', 'examples/dinner/pb1.pddl'))
+
+    def test_solve_blocksworld_compiled(self):
+        planner = Planner()
+        for pb in ['pb1', 'pb2', 'pb3']:
+            problem = 'examples/blocksworld/' + pb + '.pddl'
+            self.assertEqual(planner.solve('examples/blocksworld/blocksworld.pddl', problem, compiled=True),
+                             planner.solve('examples/blocksworld/blocksworld.pddl', problem))
+
+    def test_solve_dwr_grounding(self):
+        planner = Planner()
+        self.assertEqual(planner.solve('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl', True, 'reachable'),
+                         planner.solve('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl', True, 'full'))
+
+    # -----------------------------------------------
+    # Test heuristic search
+    # -----------------------------------------------
+
+    def test_solve_astar_optimal(self):
+        planner = Planner()
+        for domain, problem in [('examples/blocksworld/blocksworld.pddl', 'examples/blocksworld/pb4.pddl'),
+                                ('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'),
+                                ('examples/tsp/tsp.pddl', 'examples/tsp/pb1.pddl')]:
+            plan = planner.solve(domain, problem, search='astar')
+            self.assertValidPlan(domain, problem, plan)
+            self.assertEqual(len(plan), len(planner.solve(domain, problem)))
+
+    def test_solve_heuristic_searches(self):
+        planner = Planner()
+        domain, problem = 'examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'
+        for search in ['astar', 'gbfs', 'wastar']:
+            for heuristic in ['hmax', 'hadd', 'hff']:
+                self.assertValidPlan(domain, problem, planner.solve(domain, problem, search=search,
+                                                                    heuristic=heuristic))
+
+    def test_solve_hashing(self):
+        planner = Planner()
+        domain, problem = 'examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'
+        expected = planner.solve(domain, problem)
+        for compiled in [False, True]:
+            for hashing in ['zobrist', 'compact']:
+                self.assertEqual(planner.solve(domain, problem, compiled, hashing=hashing), expected)
+        with self.assertRaises(ValueError):
+            planner.solve(domain, problem, search='astar', hashing='compact')
+
+    def test_solve_memory_bounded(self):
+        planner = Planner()
+        domain = 'examples/blocksworld/blocksworld.pddl'
+        for problem in ['examples/blocksworld/pb%d.pddl' % i for i in range(1, 5)]:
+            plan = planner.solve(domain, problem, search='idastar')
+            self.assertValidPlan(domain, problem, plan)
+            self.assertEqual(len(plan), len(planner.solve(domain, problem)))
+        domain, problem = 'examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'
+        for width in [1, 5, 100]:
+            plan = planner.solve(domain, problem, search='beam', width=width)
+            if plan is not None:
+                self.assertValidPlan(domain, problem, plan)
+        # An empty beam after cutting successors is a limit, not unsolvability, so the fallback runs
+        domain, problem = 'examples/tsp/tsp.pddl', 'examples/tsp/pb1.pddl'
+        self.assertIsNone(planner.solve(domain, problem, search='beam', width=1))
+        self.assertEqual(planner.statistics.status, 'limit')
+        plan = planner.solve(domain, problem, search='beam', width=1, fallback='astar')
+        self.assertValidPlan(domain, problem, plan)
+        self.assertEqual(planner.statistics.fallback, 'astar')
+
+    def test_solve_stubborn(self):
+        planner = Planner()
+        for domain, problem in [('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'),
+                                ('examples/blocksworld/blocksworld.pddl', 'examples/blocksworld/pb4.pddl')]:
+            expected = len(planner.solve(domain, problem))
+            for compiled, search in [(False, 'bfs'), (True, 'bfs'), (True, 'astar')]:
+                plan = planner.solve(domain, problem, compiled, search=search, pruning='stubborn')
+                self.assertValidPlan(domain, problem, plan)
+                self.assertEqual(len(plan), expected)
+
+    def test_solve_symmetry(self):
+        planner = Planner()
+        domain, problem = 'examples/gripper/gripper.pddl', 'examples/gripper/pb1.pddl'
+        for compiled, search in [(False, 'bfs'), (True, 'bfs'), (True, 'astar')]:
+            expected = planner.solve(domain, problem, compiled, search=search)
+            expanded = planner.statistics.expanded
+            plan = planner.solve(domain, problem, compiled, search=search, symmetry=True)
+            self.assertValidPlan(domain, problem, plan)
+            self.assertEqual(len(plan), len(expected))
+            self.assertLess(planner.statistics.expanded, expanded)
+
+    def test_solve_lifted(self):
+        planner = Planner()
+        for domain, problem in [('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'),
+                                ('examples/blocksworld/blocksworld.pddl', 'examples/blocksworld/pb4.pddl'),
+                                ('examples/gripper/gripper.pddl', 'examples/gripper/pb1.pddl')]:
+            expected = planner.solve(domain, problem)
+            self.assertEqual(planner.solve(domain, problem, grounding='lifted'), expected)
+            self.assertEqual(planner.statistics.ground_time, 0)
+        self.assertIsNone(planner.solve(domain, problem, grounding='lifted', max_expansions=1))
+        self.assertEqual(planner.statistics.status, 'budget')
+        with self.assertRaises(ValueError):
+            planner.solve(domain, problem, grounding='lifted', search='astar')
+
+    def test_solve_sas(self):
+        planner = Planner()
+        for domain, problem in [('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'),
+                                ('examples/blocksworld/blocksworld.pddl', 'examples/blocksworld/pb4.pddl'),
+                                ('examples/gripper/gripper.pddl', 'examples/gripper/pb1.pddl')]:
+            for search in ['bfs', 'astar']:
+                expected = planner.solve(domain, problem, search=search)
+                plan = planner.solve(domain, problem, search=search, encoding='sas')
+                self.assertValidPlan(domain, problem, plan)
+                self.assertEqual(len(plan), len(expected))
+        with self.assertRaises(ValueError):
+            planner.solve(domain, problem, encoding='sas', hashing='zobrist')
+
+    def test_solve_generator(self):
+        planner = Planner()
+        domain, problem = 'examples/blocksworld/blocksworld.pddl', 'examples/blocksworld/pb4.pddl'
+        for compiled, search, encoding in [(False, 'bfs', 'atoms'), (True, 'bfs', 'atoms'), (True, 'astar', 'atoms'),
+                                           (True, 'astar', 'sas')]:
+            expected = planner.solve(domain, problem, compiled, search=search, encoding=encoding)
+            self.assertEqual(planner.solve(domain, problem, compiled, search=search, encoding=encoding,
+                                           generator='code'), expected)
+        with self.assertRaises(ValueError):
+            planner.solve(domain, problem, generator='jit')
+
+    def test_solve_parallel(self):
+        planner = Planner()
+        for domain, problem in [('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'),
+                                ('examples/gripper/gripper.pddl', 'examples/gripper/pb1.pddl')]:
+            task = planner.prepare(domain, problem)
+            for search in ['bfs', 'astar', 'gbfs']:
+                expected = planner.solve_task(task, search=search)
+                plan = planner.solve_task(task, search=search, search_workers=3)
+                self.assertValidPlan(domain, problem, plan)
+                if search != 'gbfs':
+                    self.assertEqual(len(plan), len(expected))
+                self.assertEqual(planner.statistics.status, 'solved')
+                self.assertGreater(planner.statistics.expanded, 0)
+        task = Task(task.decode(task.init), [('unreachable',)], [], task.actions)
+        self.assertIsNone(planner.solve_task(task, search_workers=2))
+        self.assertEqual(planner.statistics.status, 'unsolvable')
+        self.assertIsNone(planner.solve_task(task, search_workers=2, max_expansions=10))
+        self.assertEqual(planner.statistics.status, 'budget')
+        with self.assertRaises(ValueError):
+            planner.solve_task(task, search='idastar', search_workers=2)
+        with self.assertRaises(ValueError):
+            planner.solve_task(task, pruning='stubborn', search_workers=2)
+        with self.assertRaises(ValueError):
+            planner.solve_task(task, search='astar', heuristic='hbogus', search_workers=2)
+        # Workers failing to open the task die, which must stop the search rather than hang it
+        search = HashDistributedSearch(task, 2)
+        with self.assertRaises(RuntimeError):
+            search.run_file('missing.task', SearchStatistics(), None, None)
+
+    def test_solve_width(self):
+        planner = Planner()
+        for domain, problem, search in [
+                ('examples/blocksworld/blocksworld.pddl', 'examples/blocksworld/pb4.pddl', 'iw'),
+                ('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl', 'siw'),
+                ('examples/gripper/gripper.pddl', 'examples/gripper/pb1.pddl', 'siw')]:
+            planner.solve(domain, problem)
+            expanded = planner.statistics.expanded
+            plan = planner.solve(domain, problem, search=search)
+            self.assertValidPlan(domain, problem, plan)
+            self.assertEqual(planner.statistics.status, 'solved')
+            self.assertLess(planner.statistics.expanded, expanded)
+        # Goals of many atoms are beyond the width of iw, while siw commits to a tour that strands the salesman
+        self.assertIsNone(planner.solve(domain, problem, search='iw'))
+        self.assertEqual(planner.statistics.status, 'limit')
+        domain, problem = 'examples/tsp/tsp.pddl', 'examples/tsp/pb1.pddl'
+        plan = planner.solve(domain, problem, search='siw', fallback='bfs')
+        self.assertValidPlan(domain, problem, plan)
+        self.assertEqual(planner.statistics.fallback, 'bfs')
+        with self.assertRaises(ValueError):
+            planner.solve(domain, problem, search='iw', encoding='sas')
+        with self.assertRaises(ValueError):
+            planner.solve(domain, problem, search='iw', max_width=0)
+
+    def test_solve_limits(self):
+        planner = Planner()
+        domain, problem = 'examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'
+        for compiled in [False, True]:
+            for hashing in ['state', 'compact']:
+                self.assertIsNone(planner.solve(domain, problem, compiled, max_nodes=100, hashing=hashing))
+                self.assertEqual(planner.statistics.status, 'limit')
+        self.assertIsNone(planner.solve(domain, problem, search='astar', max_nodes=100))
+        self.assertEqual(planner.statistics.status, 'limit')
+        plan = planner.solve(domain, problem, max_nodes=100, fallback='beam', width=10)
+        self.assertValidPlan(domain, problem, plan)
+        self.assertEqual(planner.statistics.status, 'solved')
+        self.assertEqual(planner.statistics.fallback, 'beam')
+
+    def test_solve_memory_limit(self):
+        planner = Planner()
+        domain, problem = 'examples/blocksworld/blocksworld.pddl', 'examples/blocksworld/pb4.pddl'
+        if current_memory() is None:
+            self.skipTest('memory not measured on this platform')
+        # Memory freed by an earlier allocation no longer counts against the limit
+        block = bytearray(300 << 20)
+        del block
+        plan = planner.solve(domain, problem, max_memory=current_memory() + (100 << 20))
+        self.assertValidPlan(domain, problem, plan)
+        self.assertIsNone(planner.solve(domain, problem, max_memory=1))
+        self.assertEqual(planner.statistics.status, 'limit')
+
+    def test_solve_deadline(self):
+        planner = Planner()
+        domain, problem = 'examples/n_puzzle/n_puzzle.pddl', 'examples/n_puzzle/eight_puzzle_pb1.pddl'
+        self.assertIsNone(planner.solve(domain, problem, time_limit=0))
+        self.assertEqual(planner.statistics.status, 'timeout')
+        self.assertIsNone(planner.solve(domain, problem, search='astar', max_expansions=50))
+        self.assertEqual(planner.statistics.status, 'budget')
+        self.assertEqual(planner.statistics.expanded, 50)
+        token = CancellationToken()
+        token.cancel()
+        self.assertIsNone(planner.solve(domain, problem, True, token=token))
+        self.assertEqual(planner.statistics.status, 'cancelled')
+
+    def test_solve_anytime(self):
+
+        class Observer(SearchObserver):
+
+            def __init__(self):
+                self.plans = []
+
+            def on_goal(self, plan, statistics):
+                self.plans.append(plan)
+
+        planner = Planner()
+        domain, problem = 'examples/blocksworld/blocksworld.pddl', 'examples/blocksworld/pb4.pddl'
+        observer = Observer()
+        plan = planner.solve(domain, problem, search='anytime', heuristic='hmax', weight=5, observer=observer)
+        self.assertValidPlan(domain, problem, plan)
+        self.assertEqual(len(plan), len(planner.solve(domain, problem)))
+        lengths = [len(plan) for plan in observer.plans]
+        self.assertEqual(lengths, sorted(set(lengths), reverse=True))
+        self.assertEqual(lengths[-1], len(plan))
+
+    def test_solve_async(self):
+        planner = Planner()
+        domain = 'examples/blocksworld/blocksworld.pddl'
+        problems = ['examples/blocksworld/pb%d.pddl' % i for i in range(1, 5)]
+
+        async def solve_all():
+            return await asyncio.gather(*[planner.solve_async(domain, problem) for problem in problems])
+
+        for problem, plan in zip(problems, asyncio.run(solve_all())):
+            self.assertEqual(plan, planner.solve(domain, problem))
+        # Statistics tell a timeout from an unsolvable task
+        self.assertIsNone(asyncio.run(planner.solve_async('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl',
+                                                          time_limit=0)))
+        self.assertEqual(planner.statistics.status, 'timeout')
+        plan = asyncio.run(planner.solve_async(domain, problems[0]))
+        self.assertEqual((planner.statistics.status, planner.statistics.plan_length), ('solved', len(plan)))
+
+    # -----------------------------------------------
+    # Test statistics
+    # -----------------------------------------------
+
+    def test_statistics(self):
+        planner = Planner()
+        domain, problem = 'examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'
+        for compiled in [False, True]:
+            plan = planner.solve(domain, problem, compiled)
+            statistics = planner.statistics
+            self.assertEqual(statistics.status, 'solved')
+            self.assertEqual(statistics.plan_length, len(plan))
+            self.assertGreater(statistics.expanded, 0)
+            self.assertGreater(statistics.parse_time, 0)
+            self.assertGreater(statistics.ground_time, 0)
+            self.assertGreater(statistics.search_time, 0)
+            self.assertLessEqual(statistics.duplicates, statistics.generated)
+            self.assertAlmostEqual(statistics.branching_factor, statistics.generated / statistics.expanded)
+        planner.solve(domain, problem, search='astar')
+        self.assertEqual(planner.statistics.to_dict()['status'], 'solved')
+
+    def test_observer(self):
+
+        class Observer(SearchObserver):
+            interval = 10
+
+            def __init__(self):
+                self.expanded = 0
+                self.progress = 0
+                self.plan = None
+
+            def on_expand(self, state, statistics):
+                self.expanded += 1
+
+            def on_progress(self, statistics):
+                self.progress += 1
+
+            def on_goal(self, plan, statistics):
+                self.plan = plan
+
+        planner = Planner()
+        for search in ['bfs', 'astar']:
+            observer = Observer()
+            plan = planner.solve('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl', search=search, observer=observer)
+            self.assertEqual(observer.expanded, planner.statistics.expanded)
+            self.assertEqual(observer.progress, -(-observer.expanded // 10))
+            self.assertEqual(len(observer.plan), len(plan))
+
+    # -----------------------------------------------
+    # Test batch
+    # -----------------------------------------------
+
+    def test_solve_batch(self):
+        planner = Planner()
+        domain = 'examples/blocksworld/blocksworld.pddl'
+        problems = expand_problems(['examples/blocksworld/pb[1-3].pddl', 'examples/blocksworld/missing.pddl'])
+        self.assertEqual(problems[-1], 'examples/blocksworld/missing.pddl')
+        results = {result['problem']: result for result in planner.solve_batch(domain, problems, 2)}
+        self.assertEqual(sorted(results), sorted(problems))
+        self.assertEqual(results['examples/blocksworld/missing.pddl']['status'], 'error')
+        for problem in problems[:-1]:
+            self.assertEqual(results[problem]['status'], 'solved')
+            self.assertEqual(results[problem]['plan'], [' '.join([act.name] + list(act.parameters))
+                                                        for act in planner.solve(domain, problem)])
+
+    # -----------------------------------------------
+    # Test grounding
+    # -----------------------------------------------
+
+    def test_ground_reachable(self):
+        parser = PDDL_Parser()
+        parser.parse_domain('examples/tsp/tsp.pddl')
+        parser.parse_problem('examples/tsp/pb1.pddl')
+        grounder = Grounder(parser.actions, parser.objects, parser.types)
+        self.assertEqual(grounder.static_predicates(), {'connected'})
+        full = grounder.ground(parser.state, 'full')
+        reachable = grounder.ground(parser.state)
+        self.assertEqual(len(full), 25)
+        self.assertEqual(reachable, [act for act in full if ('connected',) + act.parameters in parser.state])
+
+    def test_ground_parallel(self):
+        parser = PDDL_Parser()
+        parser.parse_domain('examples/dwr/dwr.pddl')
+        parser.parse_problem('examples/dwr/pb1.pddl')
+        grounder = Grounder(parser.actions, parser.objects, parser.types)
+        for grounding in Grounder.GROUNDINGS:
+            self.assertEqual(grounder.ground(parser.state, grounding, 3), grounder.ground(parser.state, grounding))
+
+    def test_read_facts(self):
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot = write_facts(directory, [('at', 'a'), ('on', 'b')])
+            self.assertEqual(read_facts(snapshot), {'at': {('at', 'a')}, 'on': {('on', 'b')}})
+            snapshot = write_facts(directory, [('at', 'c')])
+            self.assertEqual(snapshot, (directory, 2))
+            self.assertEqual(read_facts(snapshot)['at'], {('at', 'a'), ('at', 'c')})
+        self.assertIsNone(read_facts(None))
+
 
 # -----------------------------------------------
 # Main
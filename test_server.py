@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from server import LRUCache, PlanningServer, UnixServer
+
+
+class Test_Server(unittest.TestCase):
+
+    def setUp(self):
+        self.server = PlanningServer(workers=2, max_domains=2, max_tasks=2)
+
+    def tearDown(self):
+        self.server.close()
+
+    # -----------------------------------------------
+    # Test LRU cache
+    # -----------------------------------------------
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c'), len(cache)), (1, 3, 2))
+        evicted = []
+        cache = LRUCache(1, evicted.append)
+        cache.put('a', 1)
+        cache.put('a', 2)
+        cache.put('b', 3)
+        self.assertEqual(evicted, [1, 2])
+
+    # -----------------------------------------------
+    # Test handle
+    # -----------------------------------------------
+
+    def test_handle(self):
+        request = {'id': 1, 'domain': 'examples/dinner/dinner.pddl', 'problem': 'examples/dinner/pb1.pddl'}
+        response = self.server.handle(request)
+        self.assertEqual((response['id'], response['status']), (1, 'solved'))
+        self.assertEqual(response['plan'], ['cook', 'wrap', 'carry'])
+        self.assertGreater(response['statistics']['parse_time'], 0)
+        # Repeated requests only search, even when given as text
+        with open('examples/dinner/dinner.pddl') as f:
+            domain_text = f.read()
+        with open('examples/dinner/pb1.pddl') as f:
+            problem_text = f.read()
+        response = self.server.handle({'id': 2, 'domain_text': domain_text, 'problem_text': problem_text,
+                                       'search': 'astar'})
+        self.assertEqual(response['plan'], ['cook', 'wrap', 'carry'])
+        self.assertEqual(response['statistics']['parse_time'], 0)
+        self.assertEqual(response['statistics']['ground_time'], 0)
+        self.assertEqual((len(self.server.domains), len(self.server.tasks)), (1, 1))
+        response = self.server.handle({'domain_text': domain_text, 'problem_text': problem_text, 'grounding': 'lifted'})
+        self.assertEqual(response['plan'], ['cook', 'wrap', 'carry'])
+
+    def test_task_files(self):
+        problems = [('blocksworld', 'pb1'), ('blocksworld', 'pb2'), ('dinner', 'pb1')]
+        for domain, problem in problems * 2:
+            response = self.server.handle({'domain': 'examples/%s/%s.pddl' % (domain, domain),
+                                           'problem': 'examples/%s/%s.pddl' % (domain, problem)})
+            self.assertEqual(response['status'], 'solved')
+        # Files of evicted tasks are removed
+        self.assertEqual(len(os.listdir(self.server.directory.name)), 2)
+
+    def test_handle_errors(self):
+        response = self.server.handle({'id': 1, 'domain': 'examples/dinner/dinner.pddl'})
+        self.assertEqual((response['status'], response['error']), ('error', 'Request without problem'))
+        response = self.server.handle({'domain': 'examples/dinner/dinner.pddl', 'problem': 'examples/dinner/pb1.pddl',
+                                       'search': 'dfs'})
+        self.assertEqual((response['status'], response['error']), ('error', 'Search dfs not supported'))
+        response = self.server.handle({'domain': 'examples/dinner/dinner.pddl', 'problem': 'examples/dinner/pb1.pddl',
+                                       'observer': None})
+        self.assertEqual(response['status'], 'error')
+        response = self.server.handle({'domain': 'examples/dwr/dwr.pddl', 'problem': 'examples/dwr/pb1.pddl',
+                                       'max_expansions': 1})
+        self.assertEqual(response['status'], 'budget')
+
+    # -----------------------------------------------
+    # Test serve
+    # -----------------------------------------------
+
+    def test_serve(self):
+        requests = [{'id': i, 'domain': 'examples/blocksworld/blocksworld.pddl',
+                     'problem': 'examples/blocksworld/pb%d.pddl' % (i % 2 + 1)} for i in range(4)]
+        reader = io.StringIO('\n'.join(json.dumps(request) for request in requests) + '\nnot json\n')
+        writer = io.StringIO()
+        self.server.serve(reader, writer)
+        responses = [json.loads(line) for line in writer.getvalue().splitlines()]
+        self.assertEqual(len(responses), 5)
+        self.assertEqual(sorted(r['id'] for r in responses if r['status'] == 'solved'), [0, 1, 2, 3])
+        self.assertEqual(len(self.server.tasks), 2)
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix sockets not available')
+    def test_serve_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'planner.sock')
+            with UnixServer(path, self.server) as server:
+                thread = threading.Thread(target=server.serve_forever)
+                thread.start()
+                try:
+                    with socket.socket(socket.AF_UNIX) as client:
+                        client.connect(path)
+                        request = {'id': 'a', 'domain': 'examples/dinner/dinner.pddl',
+                                   'problem': 'examples/dinner/pb1.pddl'}
+                        client.sendall((json.dumps(request) + '\n').encode())
+                        client.shutdown(socket.SHUT_WR)
+                        with client.makefile() as f:
+                            response = json.loads(f.readline())
+                finally:
+                    server.shutdown()
+                    thread.join()
+        self.assertEqual((response['id'], response['plan']), ('a', ['cook', 'wrap', 'carry']))
+
+
+# -----------------------------------------------
+# Main
+# -----------------------------------------------
+if __name__ == '__main__':
+    unittest.main()
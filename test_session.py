@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+
+import unittest
+
+from session import PlanningSession
+
+
+class Test_Session(unittest.TestCase):
+
+    def setUp(self):
+        self.session = PlanningSession('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl')
+        self.plan = self.session.solve()
+
+    def assertValidPlan(self, plan):
+        parser = self.session.parser
+        state = set(parser.state)
+        for act in plan:
+            self.assertTrue(act.positive_preconditions.issubset(state))
+            self.assertTrue(act.negative_preconditions.isdisjoint(state))
+            state.difference_update(act.del_effects)
+            state.update(act.add_effects)
+        self.assertTrue(parser.positive_goals.issubset(state))
+        self.assertTrue(parser.negative_goals.isdisjoint(state))
+
+    # -----------------------------------------------
+    # Test update
+    # -----------------------------------------------
+
+    def test_update_unchanged(self):
+        self.assertEqual(self.session.update(), self.plan)
+        self.assertEqual(self.session.planner.statistics.expanded, 0)
+
+    def test_update_init(self):
+        task = self.session.task
+        expanded = self.session.planner.statistics.expanded
+        plan = self.session.update(remove_init=['(at r1 l1)', '(occupied l1)'],
+                                   add_init=[('at', 'r1', 'l2'), ('occupied', 'l2')])
+        self.assertValidPlan(plan)
+        # Grounding is reused and the previous plan is repaired instead of searched again
+        self.assertIs(self.session.task.actions, task.actions)
+        self.assertEqual(self.session.planner.statistics.ground_time, 0)
+        self.assertLess(self.session.planner.statistics.expanded, expanded)
+        self.assertEqual(plan[1:], self.plan)
+
+    def test_update_goals(self):
+        plan = self.session.update(remove_goals=['(in ca p2)'], add_goals=['(in ca q2)'])
+        self.assertValidPlan(plan)
+        self.assertIn(('in', 'ca', 'q2'), self.session.parser.positive_goals)
+        plan = self.session.update(remove_goals=['(in cb q2)', '(in cc p2)'])
+        self.assertValidPlan(plan)
+        self.assertEqual(self.session.planner.statistics.expanded, 0)
+
+    def test_update_new_atoms(self):
+        task = self.session.task
+        atoms = list(task.atoms)
+        self.session.update(add_goals=['(at r1 nowhere)'], time_limit=0)
+        self.assertIn(('at', 'r1', 'nowhere'), self.session.task.atom_ids)
+        self.assertEqual(task.atoms, atoms)
+        self.assertNotIn(('at', 'r1', 'nowhere'), task.atom_ids)
+
+    def test_update_static(self):
+        self.assertIsNone(self.session.update(remove_init=['(adjacent l1 l2)']))
+        self.assertEqual(self.session.planner.statistics.status, 'unsolvable')
+        plan = self.session.update(add_init=['(adjacent l1 l2)'])
+        self.assertGreater(self.session.planner.statistics.ground_time, 0)
+        self.assertEqual(len(plan), len(self.plan))
+
+
+# -----------------------------------------------
+# Main
+# -----------------------------------------------
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+import unittest
+
+from action import Action
+from grounding import Grounder
+from hashing import ZobristHasher
+from heuristic import Heuristic
+from invariants import MutexGroups
+from lifted import LiftedSuccessorGenerator
+from PDDL import PDDL_Parser
+from planner import Planner
+from pruning import StubbornSetGenerator
+from search import NoveltyTable, breadth_first_search
+from successor import CodeSuccessorGenerator, FiniteDomainSuccessorGenerator, SuccessorGenerator
+from symmetry import ObjectSymmetries
+from task import FiniteDomainTask, Task
+
+
+class Test_Task(unittest.TestCase):
+
+    def setUp(self):
+        self.actions = [
+            Action('cook', [], [['clean']], [], [['dinner']], []),
+            Action('carry', [], [['garbage']], [['dinner']], [], [['garbage'], ['clean']])
+        ]
+        self.task = Task(frozenset([('garbage',), ('clean',)]), frozenset([('dinner',)]),
+                         frozenset([('garbage',)]), self.actions)
+
+    # -----------------------------------------------
+    # Test encode
+    # -----------------------------------------------
+
+    def test_encode_decode(self):
+        state = frozenset([('clean',), ('dinner',)])
+        self.assertEqual(self.task.decode(self.task.encode(state)), state)
+        self.assertEqual(self.task.decode(self.task.init), frozenset([('garbage',), ('clean',)]))
+
+    # -----------------------------------------------
+    # Test applicable and apply
+    # -----------------------------------------------
+
+    def test_applicable_apply(self):
+        task = self.task
+        state = task.apply(task.init, 0)
+        self.assertTrue(task.applicable(task.init, 0))
+        self.assertEqual(task.decode(state), frozenset([('garbage',), ('clean',), ('dinner',)]))
+        self.assertFalse(task.applicable(state, 1))
+        self.assertEqual(task.decode(task.apply(task.init, 1)), frozenset())
+        self.assertFalse(task.goal_reached(state))
+        self.assertTrue(task.goal_reached(task.encode([('dinner',)])))
+        self.assertEqual(task.plan([0, 1]), self.actions)
+
+    # -----------------------------------------------
+    # Test successor generator
+    # -----------------------------------------------
+
+    def test_successor_generator(self):
+        task = self.task
+        bitset_generator = SuccessorGenerator(self.actions, task)
+        set_generator = SuccessorGenerator(self.actions)
+        for state in [task.init, task.apply(task.init, 0), task.apply(task.init, 1), 0]:
+            expected = [i for i in range(len(self.actions)) if task.applicable(state, i)]
+            self.assertEqual(bitset_generator.applicable(state), expected)
+            self.assertEqual(set_generator.applicable(task.decode(state)), expected)
+
+    def test_code_successor_generator(self):
+        task = Planner().prepare('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl')
+        fd_task = FiniteDomainTask(task, MutexGroups(task).groups)
+        trees = [SuccessorGenerator(task.actions, task), SuccessorGenerator(task.actions),
+                 FiniteDomainSuccessorGenerator(fd_task)]
+
+        class ShallowSuccessorGenerator(CodeSuccessorGenerator):
+            MAX_DEPTH = 2
+
+        shallow = ShallowSuccessorGenerator(trees[0])
+        for tree, generator in zip(trees + [trees[0]], [CodeSuccessorGenerator(tree) for tree in trees] + [shallow]):
+            state = tree.task.init if tree.task else task.decode(task.init)
+            for _ in range(4):
+                self.assertEqual(generator.applicable(state), tree.applicable(state))
+                self.assertEqual(generator.successors(state), tree.successors(state))
+                state = generator.apply(state, generator.applicable(state)[-1])
+        self.assertIn('walk(', shallow.source)
+
+    def test_lifted_successor_generator(self):
+        parser = PDDL_Parser()
+        parser.parse_domain('examples/dwr/dwr.pddl')
+        parser.parse_problem('examples/dwr/pb1.pddl')
+        actions = Grounder(parser.actions, parser.objects, parser.types).ground(parser.state, 'full')
+        ground_generator = SuccessorGenerator(actions)
+        lifted_generator = LiftedSuccessorGenerator(parser.actions, parser.objects, parser.types, parser.state)
+        state = parser.state
+        for _ in range(4):
+            ids = lifted_generator.applicable(state)
+            self.assertEqual(lifted_generator.plan(ids), [actions[i] for i in ground_generator.applicable(state)])
+            self.assertEqual([new_state for _, new_state in lifted_generator.successors(state)],
+                             [new_state for _, new_state in ground_generator.successors(state)])
+            state = lifted_generator.apply(state, ids[-1])
+        self.assertLess(len(lifted_generator.instances), len(actions))
+
+    # -----------------------------------------------
+    # Test hashing
+    # -----------------------------------------------
+
+    def test_zobrist_hasher(self):
+        actions = self.actions + [Action('tidy', [], [], [], [['clean'], ['dinner']], [['clean']])]
+        task = Task(frozenset([('garbage',), ('clean',)]), frozenset([('dinner',)]), frozenset([('garbage',)]),
+                    actions)
+        for compiled in [True, False]:
+            hasher = ZobristHasher(task, compiled)
+            generator = SuccessorGenerator(actions, task if compiled else None)
+            state = task.init if compiled else task.decode(task.init)
+            for i in [2, 0, 2, 1, 2]:
+                h = hasher.successor(hasher.hash(state), state, i)
+                state = generator.apply(state, i)
+                self.assertEqual(h, hasher.hash(state))
+            self.assertEqual(hasher.hash(task.encode([('dinner',)]) if compiled else frozenset([('dinner',)])),
+                             hasher.keys[task.atom_ids[('dinner',)]])
+
+    # -----------------------------------------------
+    # Test pruning
+    # -----------------------------------------------
+
+    def test_stubborn_sets(self):
+        lights = ['l%d' % i for i in range(6)]
+        actions = [Action('on', [light], [], [['on', light]], [['on', light]], []) for light in lights]
+        actions += [Action('off', [light], [['on', light]], [], [], [['on', light]]) for light in lights]
+        task = Task(frozenset(), frozenset(('on', light) for light in lights), frozenset(), actions)
+        for generator in [SuccessorGenerator(actions, task), SuccessorGenerator(actions)]:
+            pruned = StubbornSetGenerator(generator, task)
+            state = task.init if generator.task else task.decode(task.init)
+            self.assertEqual(generator.applicable(state), list(range(6)))
+            self.assertEqual(len(pruned.applicable(state)), 1)
+            goal = task.goal_reached if generator.task else lambda s: len(s) == 6
+            self.assertEqual(sorted(breadth_first_search(state, pruned.successors, goal)), list(range(6)))
+        pruned = StubbornSetGenerator(SuccessorGenerator(self.actions, self.task), self.task)
+        self.assertEqual(pruned.applicable(self.task.init), [0, 1])
+
+    # -----------------------------------------------
+    # Test symmetry
+    # -----------------------------------------------
+
+    def test_object_symmetries(self):
+        lights = ['l%d' % i for i in range(4)]
+        actions = [Action('on', [light], [], [['on', light]], [['on', light]], []) for light in lights]
+        task = Task(frozenset(), frozenset(('on', light) for light in lights[1:]), frozenset(), actions)
+        symmetries = ObjectSymmetries(task)
+        self.assertEqual(symmetries.classes, [['l1', 'l2', 'l3']])
+        keys = [symmetries.canonical(task.encode([('on', light)])) for light in lights]
+        self.assertNotEqual(keys[0], keys[1])
+        self.assertEqual(keys[1], keys[2])
+        self.assertEqual(keys[1], keys[3])
+        self.assertEqual(ObjectSymmetries(task, False).canonical(frozenset([('on', 'l3')])), keys[1])
+        self.assertEqual(ObjectSymmetries(self.task).classes, [])
+
+    # -----------------------------------------------
+    # Test mutex groups
+    # -----------------------------------------------
+
+    def test_mutex_groups(self):
+        task = Planner().prepare('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl')
+        mutexes = MutexGroups(task)
+        groups = [set(task.atoms[a] for a in group) for group in mutexes.groups]
+        # Where a container is, held by a crane, loaded on a robot or on a pile
+        self.assertTrue(any({('holding', 'k1', 'ca'), ('loaded', 'r1', 'ca'), ('on', 'ca', 'pallet')} <= group
+                            for group in groups))
+        self.assertEqual(sum(len(group) for group in groups), len(set().union(*groups)))
+        for group in mutexes.groups:
+            self.assertTrue(mutexes.invariant(sum(1 << a for a in group)))
+        self.assertEqual(MutexGroups(self.task).groups, [])
+
+    def test_finite_domain_task(self):
+        for domain, problem in [('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl'),
+                                ('examples/blocksworld/blocksworld.pddl', 'examples/blocksworld/pb4.pddl')]:
+            task = Planner().prepare(domain, problem)
+            sas = FiniteDomainTask(task, MutexGroups(task).groups)
+            self.assertLess(sum(sas.widths), len(task.atoms))
+            generator = SuccessorGenerator(task.actions, task)
+            sas_generator = FiniteDomainSuccessorGenerator(sas)
+            # Both encodings follow the same path through the state space
+            state, sas_state = task.init, sas.init
+            for step in range(40):
+                self.assertEqual(sas.decode(sas_state), task.decode(state))
+                self.assertEqual(sas.goal_reached(sas_state), task.goal_reached(state))
+                ids = generator.applicable(state)
+                sas_ids = sas_generator.applicable(sas_state)
+                self.assertEqual(sas.plan(sas_ids), task.plan(ids))
+                state = task.apply(state, ids[step % len(ids)])
+                sas_state = sas.apply(sas_state, sas_ids[step % len(ids)])
+
+    # -----------------------------------------------
+    # Test heuristic
+    # -----------------------------------------------
+
+    def test_heuristic(self):
+        actions = [
+            Action('a', [], [['p']], [], [['q']], []),
+            Action('b', [], [['p']], [], [['r']], []),
+            Action('c', [], [['q'], ['r']], [], [['g']], [])
+        ]
+        task = Task(frozenset([('p',)]), frozenset([('g',), ('q',)]), frozenset(), actions)
+        self.assertEqual(Heuristic(task, 'hmax')(task.init), 2)
+        self.assertEqual(Heuristic(task, 'hadd')(task.init), 4)
+        self.assertEqual(Heuristic(task, 'hff')(task.init), 3)
+        self.assertEqual(Heuristic(task, 'hff')(task.encode([('q',), ('r',)])), 1)
+        self.assertIsNone(Heuristic(task, 'hff')(0))
+
+    # -----------------------------------------------
+    # Test novelty
+    # -----------------------------------------------
+
+    def test_novelty_table(self):
+        for k in [1, 2, 3]:
+            table = NoveltyTable(k, 3)
+            self.assertTrue(table.novel(0b011, [0, 1]))
+            self.assertFalse(table.novel(0b011, [0, 1]))
+            self.assertFalse(table.novel(0b001, [0]))
+            self.assertEqual(table.novel(0b101, [0, 2]), True)
+            self.assertEqual(table.novel(0b110, [1, 2]), k > 1)
+            self.assertEqual(table.novel(0b111, [0, 1, 2]), k > 2)
+
+
+# -----------------------------------------------
+# Main
+# -----------------------------------------------
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+
+import os
+import tempfile
+import unittest
+
+from planner import Planner
+from validator import Validator
+
+
+class Test_Validator(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = Validator('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl')
+        self.temp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def write_plan(self, name, text):
+        filename = os.path.join(self.temp.name, name)
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    # -----------------------------------------------
+    # Test parse plan
+    # -----------------------------------------------
+
+    def test_parse_plan(self):
+        lines = ['Time: 0.1s', 'plan:', 'move r1 l1 l2', '(MOVE r1 l2 l1) ; back', '0.000: (take k1 ca cb p1) [1]', '',
+                 '\n', '  \t\n', '()', '; comment\n']
+        self.assertEqual(self.validator.parse_plan(lines),
+                         [('move', ('r1', 'l1', 'l2')), ('move', ('r1', 'l2', 'l1')),
+                          ('take', ('k1', 'ca', 'cb', 'p1'))])
+
+    # -----------------------------------------------
+    # Test validate
+    # -----------------------------------------------
+
+    def test_validate(self):
+        plan = Planner().solve('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl')
+        steps = [(act.name, tuple(act.parameters)) for act in plan]
+        self.assertEqual(self.validator.validate(steps), {'status': 'valid', 'length': len(plan)})
+        result = self.validator.validate(steps[:-1])
+        self.assertEqual((result['status'], result['step'], result['reason']),
+                         ('invalid', len(plan), 'Goals not satisfied'))
+        result = self.validator.validate([('move', ('r1', 'l2', 'l1'))])
+        self.assertEqual((result['step'], result['action'], result['missing'], result['violated']),
+                         (1, 'move r1 l2 l1', ['(at r1 l2)'], ['(occupied l1)']))
+
+    def test_validate_errors(self):
+        for step, reason in [(('fly', ('r1',)), 'Unknown action fly'),
+                             (('move', ('r1', 'l1')), 'Action move expects 3 arguments, got 2'),
+                             (('move', ('k1', 'l1', 'l2')), 'Object k1 is not a robot for parameter ?r of move')]:
+            result = self.validator.validate([step])
+            self.assertEqual((result['status'], result['reason']), ('invalid', reason))
+
+    # -----------------------------------------------
+    # Test validate batch
+    # -----------------------------------------------
+
+    def test_validate_batch(self):
+        plan = Planner().solve('examples/dwr/dwr.pddl', 'examples/dwr/pb1.pddl')
+        valid = self.write_plan('valid.txt', ''.join(act.name + ' ' + ' '.join(act.parameters) + '\n'
+                                                     for act in plan))
+        invalid = self.write_plan('invalid.txt', 'move r1 l2 l1\n')
+        missing = os.path.join(self.temp.name, 'missing.txt')
+        filenames = [valid, invalid, missing] * 3
+        for workers in [1, 2]:
+            results = list(self.validator.validate_batch(filenames, workers))
+            self.assertEqual([result['plan'] for result in results], filenames)
+            self.assertEqual([result['status'] for result in results], ['valid', 'invalid', 'error'] * 3)
+
+
+# -----------------------------------------------
+# Main
+# -----------------------------------------------
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# Four spaces as indentation [no tabs]
+
+""" This file is part of PDDL Parser, available at
+<https://github.com/bcorfman/pddl-parser>.
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/> """
+
+
+import argparse
+import concurrent.futures
+import json
+import os
+import re
+import sys
+import time
+
+from PDDL import PDDL_Parser
+from planner import expand_problems
+
+
+class Validator:
+    """ Plan validator replaying plans over a parsed domain and problem """
+
+    # A plan step, name and arguments with optional parentheses, time stamp and duration
+    STEP = re.compile(r'^\s*(?:[\d.]+\s*:)?\s*\(?([^()\[\]:\s][^()\[\]:]*?)\)?\s*(?:\[[^\]]*\])?\s*$')
+
+    # -----------------------------------------------
+    # Initialize
+    # -----------------------------------------------
+
+    def __init__(self, domain, problem):
+        """ Parses the domain and problem once. Actions are grounded on demand, only those referenced by plans,
+        and kept for later plans. """
+        self.parser = PDDL_Parser()
+        self.parser.parse_domain(domain)
+        self.parser.parse_problem(problem)
+        self.schemas = {action.name: action for action in self.parser.actions}
+        self.objects = {}
+        self.actions = {}
+
+    # -----------------------------------------------
+    # Read plan
+    # -----------------------------------------------
+
+    def read_plan(self, filename):
+        with open(filename) as f:
+            return self.parse_plan(f)
+
+    def parse_plan(self, lines):
+        """ Returns the steps of a plan as (name, arguments), one step per line in the format printed by
+        run_planner, or in parentheses. Comments and lines which are not steps, such as headers, are skipped. """
+        steps = []
+        for line in lines:
+            match = self.STEP.match(line.split(';', 1)[0].lower())
+            if match:
+                name, *args = match.group(1).split()
+                steps.append((name, tuple(args)))
+        return steps
+
+    # -----------------------------------------------
+    # Ground
+    # -----------------------------------------------
+
+    def ground(self, name, args):
+        """ Returns the ground action of a step, raising ValueError when its name, number of arguments or
+        argument types do not match the domain. """
+        act = self.actions.get((name, args))
+        if act is None:
+            schema = self.schemas.get(name)
+            if schema is None:
+                raise ValueError('Unknown action ' + name)
+            if len(args) != len(schema.parameters):
+                raise ValueError('Action %s expects %d arguments, got %d' % (name, len(schema.parameters), len(args)))
+            if name not in self.objects:
+                self.objects[name] = [set(items) for items in
+                                      schema.parameter_objects(self.parser.objects, self.parser.types)]
+            for (var, typ), obj, items in zip(schema.parameters, args, self.objects[name]):
+                if obj not in items:
+                    raise ValueError('Object %s is not a %s for parameter %s of %s' % (obj, typ, var, name))
+            if schema.parameters:
+                act = schema.ground([var for var, _ in schema.parameters], args)
+            else:
+                act = schema
+            self.actions[(name, args)] = act
+        return act
+
+    # -----------------------------------------------
+    # Validate
+    # -----------------------------------------------
+
+    def validate(self, steps):
+        """ Replays the steps from the initial state and returns a dictionary with the status, valid or invalid,
+        and the plan length. For an invalid plan it also gives the 1-based step that failed, with the step, the
+        reason, the positive preconditions missing and the negative ones holding, or, once every step applies,
+        the goals not reached. """
+        result = {'status': 'valid', 'length': len(steps)}
+        state = set(self.parser.state)
+        for k, (name, args) in enumerate(steps):
+            try:
+                act = self.ground(name, args)
+            except ValueError as e:
+                result.update(status='invalid', step=k + 1, action=' '.join((name,) + args), reason=str(e))
+                return result
+            if not act.positive_preconditions.issubset(state) or not act.negative_preconditions.isdisjoint(state):
+                result.update(status='invalid', step=k + 1, action=' '.join((name,) + args),
+                              reason='Preconditions not satisfied',
+                              missing=self.atoms(act.positive_preconditions.difference(state)),
+                              violated=self.atoms(act.negative_preconditions.intersection(state)))
+                return result
+            state.difference_update(act.del_effects)
+            state.update(act.add_effects)
+        unsatisfied = self.atoms(self.parser.positive_goals.difference(state))
+        violated = self.atoms(self.parser.negative_goals.intersection(state))
+        if unsatisfied or violated:
+            result.update(status='invalid', step=len(steps) + 1, reason='Goals not satisfied', missing=unsatisfied,
+                          violated=violated)
+        return result
+
+    def atoms(self, atoms):
+        return sorted('(' + ' '.join(atom) + ')' for atom in atoms)
+
+    def validate_file(self, filename):
+        """ Validates a plan file, see validate, with the status error when it cannot be read. """
+        start_time = time.time()
+        try:
+            result = {'plan': filename}
+            result.update(self.validate(self.read_plan(filename)))
+        except OSError as e:
+            result = {'plan': filename, 'status': 'error', 'error': str(e)}
+        result['time'] = time.time() - start_time
+        return result
+
+    # -----------------------------------------------
+    # Validate batch
+    # -----------------------------------------------
+
+    def validate_batch(self, filenames, workers=None):
+        """ Validates many plan files, yielding results in order. With more than one worker, plans are split in
+        chunks over a pool of processes, each receiving the parsed task once. """
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for filename in filenames:
+                yield self.validate_file(filename)
+            return
+        chunk = max(1, len(filenames) // (4 * workers))
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=init_validation_worker,
+                                                    initargs=(self,)) as pool:
+            yield from pool.map(validate_plan_file, filenames, chunksize=chunk)
+
+
+# -----------------------------------------------
+# Validation worker
+# -----------------------------------------------
+
+validation_worker = {}
+
+
+def init_validation_worker(validator):
+    validation_worker['validator'] = validator
+
+
+def validate_plan_file(filename):
+    return validation_worker['validator'].validate_file(filename)
+
+
+def run_validator():
+    """ Interprets command-line arguments to validate plans, printing a
+    JSON line for each plan and exiting with 1 unless all are valid. """
+    parser = argparse.ArgumentParser(description='Validates plans against a planning domain and problem in PDDL.')
+    parser.add_argument('domain_file', help='defines a problem domain using Planning Domain Definition Language')
+    parser.add_argument('problem_file', help='defines a problem using Planning Domain Definition Language')
+    parser.add_argument('plan_file', help='plan with one action per line, as printed by the planner, many plans, '
+                                          'glob patterns or @files listing plans', nargs='+')
+    parser.add_argument('-j', '--jobs', help='number of worker processes, all cores by default', type=int)
+    args = parser.parse_args()
+    validator = Validator(args.domain_file, args.problem_file)
+    valid = True
+    for result in validator.validate_batch(expand_problems(args.plan_file), args.jobs):
+        valid = valid and result['status'] == 'valid'
+        print(json.dumps(result), flush=True)
+    sys.exit(0 if valid else 1)
+
+
+# -----------------------------------------------
+# Main
+# -----------------------------------------------
+if __name__ == '__main__':
+    run_validator()